@@ -0,0 +1,60 @@
+"""Add conversation summary columns and listing index
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-01-03 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('conversations', sa.Column('message_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('conversations', sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('conversations', sa.Column('last_message_preview', sa.String(), nullable=True))
+
+    # 기존 데이터 채우기 (미리보기 길이는 app.models.conversation.PREVIEW_LENGTH와 동일)
+    op.execute("""
+        UPDATE conversations SET
+            message_count = (
+                SELECT COUNT(*) FROM messages WHERE messages.conversation_id = conversations.id
+            ),
+            last_message_at = (
+                SELECT MAX(messages.created_at) FROM messages WHERE messages.conversation_id = conversations.id
+            ),
+            last_message_preview = (
+                SELECT SUBSTR(messages.content, 1, 100) FROM messages
+                WHERE messages.conversation_id = conversations.id
+                ORDER BY messages.id DESC LIMIT 1
+            )
+    """)
+    # updated_at이 비어 있으면 목록 정렬에서 빠지므로 마지막 메시지/생성 시간으로 채움
+    op.execute("""
+        UPDATE conversations SET updated_at = COALESCE(last_message_at, created_at)
+        WHERE updated_at IS NULL
+    """)
+    with op.batch_alter_table('conversations') as batch_op:
+        batch_op.alter_column('updated_at', server_default=sa.text('now()'))
+
+    op.create_index(
+        'ix_conversations_user_id_updated_at',
+        'conversations',
+        ['user_id', sa.text('updated_at DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversations_user_id_updated_at', table_name='conversations')
+    with op.batch_alter_table('conversations') as batch_op:
+        batch_op.alter_column('updated_at', server_default=None)
+    op.drop_column('conversations', 'last_message_preview')
+    op.drop_column('conversations', 'last_message_at')
+    op.drop_column('conversations', 'message_count')
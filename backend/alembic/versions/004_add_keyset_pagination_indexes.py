@@ -0,0 +1,49 @@
+"""Add keyset pagination indexes for conversations and messages
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-01-04 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 대화 목록: (updated_at, id) 커서 순서와 같은 인덱스로 교체
+    op.drop_index('ix_conversations_user_id_updated_at', table_name='conversations')
+    op.create_index(
+        'ix_conversations_user_id_updated_at_id',
+        'conversations',
+        ['user_id', sa.text('updated_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    # 메시지 페이지: (created_at, id) 커서
+    op.create_index(
+        'ix_messages_conversation_id_created_at_id',
+        'messages',
+        ['conversation_id', 'created_at', 'id'],
+        unique=False,
+    )
+    # 복합 인덱스의 첫 컬럼과 같은 단일 컬럼 인덱스는 중복이므로 제거
+    op.drop_index(op.f('ix_conversations_user_id'), table_name='conversations')
+    op.drop_index(op.f('ix_messages_conversation_id'), table_name='messages')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_messages_conversation_id'), 'messages', ['conversation_id'], unique=False)
+    op.create_index(op.f('ix_conversations_user_id'), 'conversations', ['user_id'], unique=False)
+    op.drop_index('ix_messages_conversation_id_created_at_id', table_name='messages')
+    op.drop_index('ix_conversations_user_id_updated_at_id', table_name='conversations')
+    op.create_index(
+        'ix_conversations_user_id_updated_at',
+        'conversations',
+        ['user_id', sa.text('updated_at DESC')],
+        unique=False,
+    )
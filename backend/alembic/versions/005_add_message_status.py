@@ -0,0 +1,24 @@
+"""Add message status for checkpointed streaming replies
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-01-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 기존 메시지는 모두 완료 상태
+    op.add_column('messages', sa.Column('status', sa.String(), nullable=False, server_default='complete'))
+
+
+def downgrade() -> None:
+    op.drop_column('messages', 'status')
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.schemas.user import UserCreate, UserLogin, Token
 from app.services.auth_service import AuthService
 from app.core.security import create_access_token
@@ -10,12 +10,12 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """회원가입"""
     auth_service = AuthService()
     
     # 사용자 생성
-    user = auth_service.create_user(db, user_data)
+    user = await auth_service.create_user(db, user_data)
     
     # JWT 토큰 생성
     access_token = create_access_token(data={"sub": user.email})
@@ -28,12 +28,12 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """로그인"""
     auth_service = AuthService()
     
     # 사용자 인증
-    user = auth_service.authenticate_user(db, user_data.email, user_data.password)
+    user = await auth_service.authenticate_user(db, user_data.email, user_data.password)
     
     # JWT 토큰 생성
     access_token = create_access_token(data={"sub": user.email})
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from typing import List
-from app.api.deps import get_current_user, get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import desc, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import List, Optional, Tuple
+from app.api.deps import get_current_user, get_async_db
 from app.models.user import User
 from app.models.conversation import Conversation, Message
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
 from app.schemas.conversation import (
     ConversationCreate,
     ConversationResponse,
@@ -12,15 +15,65 @@ from app.schemas.conversation import (
     MessageCreate,
     MessageResponse
 )
+from app.services.history_service import conversation_history
+from app.services.message_persister import message_persister
 
 router = APIRouter()
 
 
+async def _get_user_conversation(
+    db: AsyncSession,
+    conversation_id: int,
+    user_id: int,
+    with_messages: bool = False
+) -> Optional[Conversation]:
+    """사용자 소유의 대화 세션 조회 (비동기 세션에서는 지연 로딩이 불가하므로 메시지는 미리 로드)"""
+    query = select(Conversation).where(
+        Conversation.id == conversation_id,
+        Conversation.user_id == user_id
+    )
+    if with_messages:
+        query = query.options(selectinload(Conversation.messages))
+    return await db.scalar(query)
+
+
+def _decode_cursor_param(cursor: Optional[str]):
+    """cursor 쿼리 파라미터 디코딩 (잘못된 값은 400)"""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+async def _get_message_page(
+    db: AsyncSession,
+    conversation_id: int,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[Message], Optional[str]]:
+    """커서 이전의 최근 메시지 limit개 (오래된 순)와 더 오래된 메시지의 커서"""
+    query = select(Message).where(Message.conversation_id == conversation_id)
+    position = _decode_cursor_param(cursor)
+    if position is not None:
+        query = query.where(tuple_(Message.created_at, Message.id) < position)
+    # 한 개 더 읽어 다음 페이지 존재 여부 확인
+    rows = (await db.scalars(
+        query.order_by(desc(Message.created_at), desc(Message.id)).limit(limit + 1)
+    )).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return list(reversed(rows)), next_cursor
+
+
 @router.post("/", response_model=ConversationResponse, status_code=status.HTTP_201_CREATED)
-def create_conversation(
+async def create_conversation(
     conversation: ConversationCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """새 대화 세션 생성"""
     db_conversation = Conversation(
@@ -31,53 +84,59 @@ def create_conversation(
         max_tokens=conversation.max_tokens
     )
     db.add(db_conversation)
-    db.commit()
-    db.refresh(db_conversation)
+    await db.commit()
+    await db.refresh(db_conversation, ["created_at", "updated_at", "messages"])
     return db_conversation
 
 
 @router.get("/", response_model=List[ConversationListResponse])
-def get_conversations(
-    skip: int = 0,
-    limit: int = 50,
+async def get_conversations(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    skip: int = Query(0, ge=0, deprecated=True, description="cursor를 사용하세요 (cursor가 있으면 무시)"),
+    limit: int = Query(50, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """사용자의 대화 세션 목록 조회"""
-    conversations = db.query(Conversation).filter(
-        Conversation.user_id == current_user.id
-    ).order_by(desc(Conversation.updated_at)).offset(skip).limit(limit).all()
-    
-    result = []
-    for conv in conversations:
-        message_count = db.query(func.count(Message.id)).filter(
-            Message.conversation_id == conv.id
-        ).scalar()
-        
-        result.append({
-            "id": conv.id,
-            "user_id": conv.user_id,
-            "title": conv.title,
-            "model": conv.model,
-            "created_at": conv.created_at,
-            "updated_at": conv.updated_at,
-            "message_count": message_count or 0
-        })
-    
-    return result
+    """
+    사용자의 대화 세션 목록 조회 (최근 활동 순, 단일 쿼리)
+    다음 페이지가 있으면 X-Next-Cursor 헤더로 커서를 반환합니다.
+    """
+    await message_persister.sync(user_id=current_user.id)
+    query = select(Conversation).where(Conversation.user_id == current_user.id)
+    position = _decode_cursor_param(cursor)
+    if position is not None:
+        query = query.where(tuple_(Conversation.updated_at, Conversation.id) < position)
+    elif skip:
+        query = query.offset(skip)
+    # 한 개 더 읽어 다음 페이지 존재 여부 확인
+    conversations = (await db.scalars(
+        query.order_by(desc(Conversation.updated_at), desc(Conversation.id)).limit(limit + 1)
+    )).all()
+    if len(conversations) > limit:
+        conversations = conversations[:limit]
+        last = conversations[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.updated_at, last.id)
+    return conversations
 
 
 @router.get("/{conversation_id}", response_model=ConversationResponse)
-def get_conversation(
+async def get_conversation(
     conversation_id: int,
+    response: Response,
+    message_limit: Optional[int] = Query(None, ge=1, le=200, description="최근 메시지만 이 개수만큼 포함"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """특정 대화 세션 조회 (메시지 포함)"""
-    conversation = db.query(Conversation).filter(
-        Conversation.id == conversation_id,
-        Conversation.user_id == current_user.id
-    ).first()
+    """
+    특정 대화 세션 조회 (메시지 포함)
+    message_limit을 지정하면 최근 메시지만 포함하고, 더 오래된 메시지가 있으면
+    /messages 엔드포인트용 커서를 X-Next-Cursor 헤더로 반환합니다.
+    """
+    await message_persister.sync(conversation_id=conversation_id)
+    conversation = await _get_user_conversation(
+        db, conversation_id, current_user.id, with_messages=message_limit is None
+    )
     
     if not conversation:
         raise HTTPException(
@@ -85,20 +144,52 @@ def get_conversation(
             detail="대화 세션을 찾을 수 없습니다."
         )
     
+    if message_limit is not None:
+        messages, next_cursor = await _get_message_page(db, conversation.id, message_limit)
+        # 관계를 지연 로딩하지 않고 조회한 페이지로 채움
+        set_committed_value(conversation, "messages", messages)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
     return conversation
 
 
+@router.get("/{conversation_id}/messages", response_model=List[MessageResponse])
+async def get_conversation_messages(
+    conversation_id: int,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    대화 메시지 페이지 조회 (최근 메시지부터 과거 방향으로, 페이지 안에서는 오래된 순)
+    더 오래된 메시지가 있으면 X-Next-Cursor 헤더로 커서를 반환합니다.
+    """
+    conversation = await _get_user_conversation(db, conversation_id, current_user.id)
+    
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="대화 세션을 찾을 수 없습니다."
+        )
+    
+    await message_persister.sync(conversation_id=conversation.id)
+    messages, next_cursor = await _get_message_page(db, conversation.id, limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return messages
+
+
 @router.delete("/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_conversation(
+async def delete_conversation(
     conversation_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """대화 세션 삭제"""
-    conversation = db.query(Conversation).filter(
-        Conversation.id == conversation_id,
-        Conversation.user_id == current_user.id
-    ).first()
+    conversation = await _get_user_conversation(db, conversation_id, current_user.id)
     
     if not conversation:
         raise HTTPException(
@@ -106,23 +197,24 @@ def delete_conversation(
             detail="대화 세션을 찾을 수 없습니다."
         )
     
-    db.delete(conversation)
-    db.commit()
+    # 저장 대기 중인 메시지가 삭제 이후에 저장되지 않도록 먼저 플러시
+    await message_persister.sync(conversation_id=conversation.id)
+    await db.delete(conversation)
+    await db.commit()
+    conversation_history.invalidate(conversation_id)
     return None
 
 
 @router.patch("/{conversation_id}/title", response_model=ConversationResponse)
-def update_conversation_title(
+async def update_conversation_title(
     conversation_id: int,
     title: str = Query(..., description="새 제목"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """대화 세션 제목 업데이트"""
-    conversation = db.query(Conversation).filter(
-        Conversation.id == conversation_id,
-        Conversation.user_id == current_user.id
-    ).first()
+    await message_persister.sync(conversation_id=conversation_id)
+    conversation = await _get_user_conversation(db, conversation_id, current_user.id, with_messages=True)
     
     if not conversation:
         raise HTTPException(
@@ -131,7 +223,7 @@ def update_conversation_title(
         )
     
     conversation.title = title
-    db.commit()
-    db.refresh(conversation)
+    await db.commit()
+    await db.refresh(conversation, ["updated_at"])
     return conversation
 
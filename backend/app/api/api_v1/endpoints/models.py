@@ -2,6 +2,8 @@ from fastapi import APIRouter, Depends
 from app.api.deps import get_current_user
 from app.models.user import User
 from app.constants.models import AVAILABLE_MODELS, DEFAULT_MODEL, MODEL_INFO
+from app.services.openai_service import openai_service
+from app.services.search_service import search_service
 
 router = APIRouter()
 
@@ -28,3 +30,63 @@ async def get_available_models(
         "models": models,
         "default_model": DEFAULT_MODEL,
     }
+
+
+@router.get("/rate-limits")
+async def get_rate_limit_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    모델별 요청 한도 예산과 대기열 통계 반환
+    """
+    return {"models": openai_service.get_rate_limit_stats()}
+
+
+@router.get("/hedging")
+async def get_hedge_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    헤지 요청(대체 모델 동시 요청) 통계 반환
+    """
+    return openai_service.get_hedge_stats()
+
+
+@router.get("/breakers")
+async def get_breaker_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    모델별 서킷 브레이커 상태(closed/open/half_open)와 재시도 통계 반환
+    """
+    return openai_service.get_breaker_stats()
+
+
+@router.get("/clients")
+async def get_client_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    LLM 클라이언트/Agent 실행기 재사용과 커넥션 풀 통계 반환
+    """
+    return openai_service.get_client_stats()
+
+
+@router.get("/caches")
+async def get_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    응답 캐시, 유사 프롬프트 캐시 히트율과 동시 요청 병합 통계 반환
+    """
+    return openai_service.get_cache_stats()
+
+
+@router.get("/search")
+async def get_search_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    웹 검색 호출(대기/실행 시간, 시간 초과, 예산 초과)과 검색 캐시 계층별 히트율 반환
+    """
+    return search_service.get_stats()
@@ -1,17 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.api.deps import get_current_user, get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import get_current_user, get_async_db
 from app.models.user import User
-from app.models.conversation import Conversation, Message
-from app.schemas.prompt import PromptRequest, PromptResponse, ChatRequest, ChatMessage
-from app.services.openai_service import openai_service
+from app.models.conversation import Conversation
+from app.schemas.prompt import PromptRequest, PromptResponse, ChatRequest, ChatMessage, BatchPromptRequest
+from app.services.openai_service import openai_service, StreamEvent
+from app.services.history_service import conversation_history
+from app.services.message_persister import message_persister
+from app.services.streaming_reply import StreamingReply
+from app.core.config import settings
+from app.core.sse import coalesce_chunks, encode_chunk, encode_event, DONE_FRAME, SSE_HEADERS
+from app.core.exceptions import LLMServiceError
+import asyncio
 import json
+import math
 
 router = APIRouter()
 
 
+def _llm_error_to_http(e: LLMServiceError) -> HTTPException:
+    """LLM 서비스 오류를 상태 코드에 맞는 HTTP 오류로 변환"""
+    headers = None
+    retry_after = getattr(e, "retry_after", None)
+    if retry_after is not None:
+        headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
+    return HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+
+
 @router.post("/completion", response_model=PromptResponse)
 async def get_completion(
     request: PromptRequest,
@@ -24,22 +41,22 @@ async def get_completion(
         if request.stream:
             # 스트리밍 응답
             async def generate_stream():
-                async for chunk in openai_service.stream_completion(
+                async for chunk in coalesce_chunks(openai_service.stream_completion(
                     message=request.message,
                     model=request.model,
                     temperature=request.temperature,
-                    max_tokens=request.max_tokens
-                ):
-                    yield f"data: {json.dumps({'chunk': chunk}, ensure_ascii=False)}\n\n"
-                yield "data: [DONE]\n\n"
+                    max_tokens=request.max_tokens,
+                    use_cache=request.use_cache,
+                    use_semantic_cache=request.use_semantic_cache,
+                    user_id=current_user.id
+                )):
+                    yield encode_chunk(chunk)
+                yield DONE_FRAME
             
             return StreamingResponse(
                 generate_stream(),
                 media_type="text/event-stream",
-                headers={
-                    "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                }
+                headers=SSE_HEADERS
             )
         else:
             # 일반 응답
@@ -47,7 +64,10 @@ async def get_completion(
                 message=request.message,
                 model=request.model,
                 temperature=request.temperature,
-                max_tokens=request.max_tokens
+                max_tokens=request.max_tokens,
+                use_cache=request.use_cache,
+                use_semantic_cache=request.use_semantic_cache,
+                user_id=current_user.id
             )
             return PromptResponse(**result)
     
@@ -56,6 +76,8 @@ async def get_completion(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except LLMServiceError as e:
+        raise _llm_error_to_http(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -63,25 +85,108 @@ async def get_completion(
         )
 
 
+@router.post("/batch")
+async def get_batch_completion(
+    request: BatchPromptRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    여러 프롬프트를 한 번의 요청으로 처리
+    결과는 완료되는 순서대로 NDJSON(한 줄에 하나의 JSON)으로 스트리밍되며,
+    각 줄에는 요청 목록의 index와 결과(result) 또는 오류(error)가 포함됩니다.
+    """
+    concurrency = min(
+        request.concurrency or settings.BATCH_DEFAULT_CONCURRENCY,
+        settings.BATCH_MAX_CONCURRENCY
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run_item(index: int, item: PromptRequest) -> dict:
+        async with semaphore:
+            try:
+                result = await openai_service.get_completion(
+                    message=item.message,
+                    model=item.model,
+                    temperature=item.temperature,
+                    max_tokens=item.max_tokens,
+                    use_cache=item.use_cache,
+                    use_semantic_cache=item.use_semantic_cache,
+                    user_id=current_user.id
+                )
+                return {"index": index, "result": PromptResponse(**result).model_dump()}
+            except LLMServiceError as e:
+                return {
+                    "index": index,
+                    "error": {"status_code": e.status_code, "detail": str(e)}
+                }
+            except ValueError as e:
+                return {
+                    "index": index,
+                    "error": {"status_code": status.HTTP_400_BAD_REQUEST, "detail": str(e)}
+                }
+            except Exception as e:
+                return {
+                    "index": index,
+                    "error": {
+                        "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        "detail": f"AI 응답 생성 중 오류 발생: {str(e)}"
+                    }
+                }
+    
+    async def generate_results():
+        tasks = [
+            asyncio.ensure_future(run_item(index, item))
+            for index, item in enumerate(request.items)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                line = await next_done
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        finally:
+            # 클라이언트 연결이 끊기면 남은 작업 취소
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(
+        generate_results(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
 @router.post("/chat", response_model=PromptResponse)
 async def get_chat_completion(
     request: ChatRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     대화 히스토리를 포함한 AI 채팅 완성 응답 반환
     대화 세션 ID가 제공되면 기존 대화를 이어가고, 없으면 새 대화를 생성합니다.
+    messages 대신 message(새 사용자 메시지)만 보내면 서버에 저장된 히스토리로 대화를 이어갑니다.
     """
     try:
+        # 검색 파이프라인 모드: 아래 DB 작업과 겹치도록 웹 검색을 먼저 시작
+        if request.use_search:
+            if request.message is not None:
+                search_query = request.message
+            else:
+                search_query = next(
+                    (msg.content for msg in reversed(request.messages) if msg.role == "user"), None
+                )
+            if openai_service.prefetch_search(search_query):
+                await asyncio.sleep(0)  # 검색 요청이 전송을 시작하도록 이벤트 루프에 양보
+        
         # 대화 세션 처리
         conversation = None
         if request.conversation_id:
             # 기존 대화 세션 조회
-            conversation = db.query(Conversation).filter(
-                Conversation.id == request.conversation_id,
-                Conversation.user_id == current_user.id
-            ).first()
+            conversation = await db.scalar(
+                select(Conversation).where(
+                    Conversation.id == request.conversation_id,
+                    Conversation.user_id == current_user.id
+                )
+            )
             if not conversation:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -89,8 +194,11 @@ async def get_chat_completion(
                 )
         else:
             # 새 대화 세션 생성
-            first_user_message = next((msg for msg in request.messages if msg.role == "user"), None)
-            title = first_user_message.content[:50] if first_user_message else "새 대화"
+            if request.message is not None:
+                title = request.message[:50]
+            else:
+                first_user_message = next((msg for msg in request.messages if msg.role == "user"), None)
+                title = first_user_message.content[:50] if first_user_message else "새 대화"
             
             conversation = Conversation(
                 user_id=current_user.id,
@@ -100,67 +208,70 @@ async def get_chat_completion(
                 max_tokens=request.max_tokens
             )
             db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
-        
-        # 마지막 사용자 메시지 저장
-        last_user_message = None
-        for msg in reversed(request.messages):
-            if msg.role == "user":
-                last_user_message = msg
-                break
+            await db.commit()
+            await db.refresh(conversation)
         
-        if last_user_message:
-            user_msg = Message(
-                conversation_id=conversation.id,
-                role=last_user_message.role,
-                content=last_user_message.content
+        if request.message is not None:
+            # 서버에 저장된 히스토리 + 새 사용자 메시지로 대화 재구성
+            history = []
+            if request.conversation_id:
+                await message_persister.sync(conversation_id=conversation.id)
+                history = await conversation_history.get_history(db, conversation.id, current_user.id)
+            messages = history + [{"role": "user", "content": request.message}]
+            last_user_message = request.message
+        else:
+            # 메시지 리스트를 딕셔너리로 변환
+            messages = [
+                {"role": msg.role, "content": msg.content}
+                for msg in request.messages
+            ]
+            last_user_message = next(
+                (msg["content"] for msg in reversed(messages) if msg["role"] == "user"),
+                None
             )
-            db.add(user_msg)
-            db.commit()
         
-        # 메시지 리스트를 딕셔너리로 변환
-        messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in request.messages
-        ]
+        # 마지막 사용자 메시지 저장
+        if last_user_message is not None:
+            await message_persister.save(db, conversation, current_user.id, "user", last_user_message)
         
         if request.stream:
-            # 스트리밍 응답
-            full_response = ""
+            # 스트리밍 응답 (청크를 모아 두고 주기적으로 부분 응답을 체크포인트)
+            reply = StreamingReply(db, conversation, current_user.id)
             async def generate_stream():
-                nonlocal full_response
-                async for chunk in openai_service.stream_chat_completion(
-                    messages=messages,
-                    model=request.model,
-                    temperature=request.temperature,
-                    max_tokens=request.max_tokens,
-                    use_search=request.use_search
-                ):
-                    full_response += chunk
-                    yield f"data: {json.dumps({'chunk': chunk}, ensure_ascii=False)}\n\n"
+                try:
+                    async for chunk in coalesce_chunks(openai_service.stream_chat_completion(
+                        messages=messages,
+                        model=request.model,
+                        temperature=request.temperature,
+                        max_tokens=request.max_tokens,
+                        use_search=request.use_search,
+                        use_cache=request.use_cache,
+                        use_semantic_cache=request.use_semantic_cache,
+                        user_id=current_user.id
+                    )):
+                        if isinstance(chunk, StreamEvent):
+                            # 검색 진행 상황 등 텍스트가 아닌 이벤트
+                            yield encode_event(chunk.to_payload())
+                            continue
+                        reply.append(chunk)
+                        yield encode_chunk(chunk)
+                        await reply.maybe_checkpoint()
+                except BaseException:
+                    # 클라이언트 연결 끊김(취소), 업스트림 오류 등: 부분 응답을 중단 상태로 저장
+                    await reply.abort()
+                    raise
                 
                 # 스트리밍 완료 후 메시지 저장
-                assistant_msg = Message(
-                    conversation_id=conversation.id,
-                    role="assistant",
-                    content=full_response
-                )
-                db.add(assistant_msg)
-                conversation.updated_at = func.now()
-                db.commit()
+                await reply.complete()
                 
                 # conversation_id를 포함한 완료 메시지 전송
-                yield f"data: {json.dumps({'conversation_id': conversation.id}, ensure_ascii=False)}\n\n"
-                yield "data: [DONE]\n\n"
+                yield encode_event({"conversation_id": conversation.id})
+                yield DONE_FRAME
             
             return StreamingResponse(
                 generate_stream(),
                 media_type="text/event-stream",
-                headers={
-                    "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                }
+                headers=SSE_HEADERS
             )
         else:
             # 일반 응답
@@ -169,19 +280,16 @@ async def get_chat_completion(
                 model=request.model,
                 temperature=request.temperature,
                 max_tokens=request.max_tokens,
-                use_search=request.use_search
+                use_search=request.use_search,
+                use_cache=request.use_cache,
+                use_semantic_cache=request.use_semantic_cache,
+                user_id=current_user.id
             )
             
             # AI 응답 메시지 저장
-            assistant_msg = Message(
-                conversation_id=conversation.id,
-                role="assistant",
-                content=result["response"],
-                usage=result.get("usage")
+            await message_persister.save(
+                db, conversation, current_user.id, "assistant", result["response"], usage=result.get("usage")
             )
-            db.add(assistant_msg)
-            conversation.updated_at = func.now()
-            db.commit()
             
             result["conversation_id"] = conversation.id
             return PromptResponse(**result)
@@ -191,6 +299,8 @@ async def get_chat_completion(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except LLMServiceError as e:
+        raise _llm_error_to_http(e)
     except HTTPException:
         raise
     except Exception as e:
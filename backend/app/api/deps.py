@@ -1,17 +1,19 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.core.security import decode_access_token
+from app.core.metrics import AUTH_DURATION
 from app.models.user import User
 from app.schemas.auth import TokenData
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> User:
     """현재 로그인한 사용자 가져오기"""
     credentials_exception = HTTPException(
@@ -20,7 +22,8 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    payload = decode_access_token(token)
+    with AUTH_DURATION.labels(stage="jwt_decode").time():
+        payload = decode_access_token(token)
     if payload is None:
         raise credentials_exception
     
@@ -29,7 +32,8 @@ def get_current_user(
         raise credentials_exception
     
     token_data = TokenData(email=email)
-    user = db.query(User).filter(User.email == token_data.email).first()
+    with AUTH_DURATION.labels(stage="user_lookup").time():
+        user = await db.scalar(select(User).where(User.email == token_data.email))
     if user is None:
         raise credentials_exception
     
@@ -221,6 +221,98 @@ MODEL_INFO: Dict[str, Dict[str, str]] = {
     },
 }
 
+# 모델별 컨텍스트 윈도우 (입력 + 출력 토큰 합계 상한)
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    # GPT-5 시리즈
+    "gpt-5": 400000,
+    "gpt-5.1": 400000,
+    "gpt-5.2": 400000,
+    "gpt-5-mini": 400000,
+    "gpt-5-nano": 400000,
+    # GPT-4o 시리즈
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-4o-2024-05-13": 128000,
+    "gpt-4o-2024-08-06": 128000,
+    "gpt-4o-2024-11-20": 128000,
+    # GPT-4 시리즈
+    "gpt-4-turbo": 128000,
+    "gpt-4-turbo-2024-04-09": 128000,
+    "gpt-4-turbo-preview": 128000,
+    "gpt-4-0125-preview": 128000,
+    "gpt-4-1106-preview": 128000,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-0613": 8192,
+    "gpt-4-32k-0613": 32768,
+    # GPT-3.5 시리즈
+    "gpt-3.5-turbo": 16385,
+    "gpt-3.5-turbo-0125": 16385,
+    "gpt-3.5-turbo-1106": 16385,
+    "gpt-3.5-turbo-16k": 16385,
+    "gpt-3.5-turbo-0613": 4096,
+    "gpt-3.5-turbo-16k-0613": 16385,
+    # o1/o3 시리즈 (Reasoning 모델)
+    "o1-preview": 128000,
+    "o1-mini": 128000,
+    "o1": 200000,
+    "o3": 200000,
+    "o3-mini": 200000,
+    "o3-pro": 200000,
+    "o1-2024-12-17": 200000,
+    "o1-mini-2024-09-12": 128000,
+}
+
+# 알 수 없는 모델의 컨텍스트 윈도우
+DEFAULT_CONTEXT_WINDOW: int = 8192
+
+
+# 모델별 요청 한도 (rpm: 분당 요청 수, tpm: 분당 토큰 수)
+# OpenAI 기본 티어 기준 값이며, 실제 계정 한도는 RATE_LIMIT_OVERRIDES 설정으로 덮어씁니다.
+MODEL_RATE_LIMITS: Dict[str, Dict[str, int]] = {
+    # GPT-5 시리즈
+    "gpt-5": {"rpm": 500, "tpm": 500000},
+    "gpt-5.1": {"rpm": 500, "tpm": 500000},
+    "gpt-5.2": {"rpm": 500, "tpm": 500000},
+    "gpt-5-mini": {"rpm": 500, "tpm": 500000},
+    "gpt-5-nano": {"rpm": 500, "tpm": 200000},
+    # GPT-4o 시리즈
+    "gpt-4o": {"rpm": 500, "tpm": 30000},
+    "gpt-4o-mini": {"rpm": 500, "tpm": 200000},
+    "gpt-4o-2024-05-13": {"rpm": 500, "tpm": 30000},
+    "gpt-4o-2024-08-06": {"rpm": 500, "tpm": 30000},
+    "gpt-4o-2024-11-20": {"rpm": 500, "tpm": 30000},
+    # GPT-4 시리즈
+    "gpt-4-turbo": {"rpm": 500, "tpm": 30000},
+    "gpt-4-turbo-2024-04-09": {"rpm": 500, "tpm": 30000},
+    "gpt-4-turbo-preview": {"rpm": 500, "tpm": 30000},
+    "gpt-4-0125-preview": {"rpm": 500, "tpm": 30000},
+    "gpt-4-1106-preview": {"rpm": 500, "tpm": 30000},
+    "gpt-4": {"rpm": 500, "tpm": 10000},
+    "gpt-4-32k": {"rpm": 500, "tpm": 10000},
+    "gpt-4-0613": {"rpm": 500, "tpm": 10000},
+    "gpt-4-32k-0613": {"rpm": 500, "tpm": 10000},
+    # GPT-3.5 시리즈
+    "gpt-3.5-turbo": {"rpm": 3500, "tpm": 200000},
+    "gpt-3.5-turbo-0125": {"rpm": 3500, "tpm": 200000},
+    "gpt-3.5-turbo-1106": {"rpm": 3500, "tpm": 200000},
+    "gpt-3.5-turbo-16k": {"rpm": 3500, "tpm": 200000},
+    "gpt-3.5-turbo-0613": {"rpm": 3500, "tpm": 200000},
+    "gpt-3.5-turbo-16k-0613": {"rpm": 3500, "tpm": 200000},
+    # o1/o3 시리즈 (Reasoning 모델)
+    "o1-preview": {"rpm": 500, "tpm": 30000},
+    "o1-mini": {"rpm": 500, "tpm": 200000},
+    "o1": {"rpm": 500, "tpm": 30000},
+    "o3": {"rpm": 500, "tpm": 30000},
+    "o3-mini": {"rpm": 1000, "tpm": 100000},
+    "o3-pro": {"rpm": 500, "tpm": 30000},
+    "o1-2024-12-17": {"rpm": 500, "tpm": 30000},
+    "o1-mini-2024-09-12": {"rpm": 500, "tpm": 200000},
+}
+
+# 알 수 없는 모델의 요청 한도
+DEFAULT_RATE_LIMIT: Dict[str, int] = {"rpm": 500, "tpm": 30000}
+
 
 def is_valid_model(model: str) -> bool:
     """모델이 유효한지 확인"""
@@ -234,3 +326,13 @@ def get_model_info(model: str) -> Dict[str, str]:
         "description": "알 수 없는 모델",
         "category": "unknown",
     })
+
+
+def get_context_window(model: str) -> int:
+    """모델의 컨텍스트 윈도우 크기 반환"""
+    return MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+
+def get_rate_limits(model: str) -> Dict[str, int]:
+    """모델의 요청 한도 반환 ({"rpm": ..., "tpm": ...})"""
+    return MODEL_RATE_LIMITS.get(model, DEFAULT_RATE_LIMIT)
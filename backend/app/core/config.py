@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 
@@ -18,9 +18,125 @@ class Settings(BaseSettings):
     
     # OpenAI - OPEN_AI_KEY 환경 변수도 지원
     OPENAI_API_KEY: str = ""
-    
+    OPENAI_BASE_URL: str = ""  # 비우면 기본 주소 (로컬 스텁 서버 등 호환 서버로 교체할 때 사용)
+
+    # OpenAI HTTP 커넥션 풀 (모든 LLM 클라이언트가 공유)
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY: float = 30.0  # 초
+    OPENAI_CONNECT_TIMEOUT: float = 10.0  # 초
+    OPENAI_READ_TIMEOUT: float = 120.0  # 초
+    OPENAI_CLIENT_CACHE_SIZE: int = 64  # 재사용할 ChatOpenAI 인스턴스 최대 개수
+
+    AGENT_EXECUTOR_CACHE_SIZE: int = 32  # 재사용할 검색 모드 AgentExecutor 최대 개수
+
+    # 응답 캐시 (temperature 0 이거나 요청에서 use_cache를 켠 경우에만 적용)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    RESPONSE_CACHE_TTL_SECONDS: float = 3600.0
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    RESPONSE_CACHE_REPLAY_CHUNK_SIZE: int = 32  # 캐시 히트 시 스트리밍으로 재생할 청크 크기 (문자 수)
+
+    # 유사 프롬프트 캐시 (요청에서 use_semantic_cache를 켠 경우에만 적용)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_CAPACITY: int = 2048
+    SEMANTIC_CACHE_DIM: int = 1024  # 해싱 임베딩 차원
+    SEMANTIC_CACHE_THRESHOLD: float = 0.9  # 코사인 유사도 임계값
+    SEMANTIC_CACHE_TTL_SECONDS: float = 3600.0
+
+    # 동일한 요청이 동시에 들어오면 하나의 업스트림 호출을 공유
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # 컨텍스트 윈도우 관리 (모델 한도 - max_tokens - 여유분 안에서 최신 메시지 우선 유지)
+    CONTEXT_WINDOW_ENABLED: bool = True
+    CONTEXT_SAFETY_MARGIN_TOKENS: int = 128
+
+    # 서버 측 대화 히스토리 캐시 (대화별 최근 메시지)
+    HISTORY_CACHE_MAX_CONVERSATIONS: int = 1024
+    HISTORY_CACHE_MAX_MESSAGES: int = 200  # 대화별 최대 메시지 수 (모델 컨텍스트에 맞게는 토큰 기준으로 다시 자름)
+
+    # 메시지 쓰기 지연(write-behind): 메시지 저장을 요청 경로에서 빼고 모아서 일괄 저장
+    # (N건 또는 M초 중 먼저 도달하는 조건에서 플러시, 같은 프로세스 안에서만 read-your-writes 보장)
+    MESSAGE_WRITE_BEHIND: bool = False
+    MESSAGE_WRITE_BEHIND_BATCH_SIZE: int = 100
+    MESSAGE_WRITE_BEHIND_FLUSH_SECONDS: float = 0.05
+    # 플러시 실패 시 메시지를 버리지 않고 지수 백오프(full jitter)로 계속 재시도
+    MESSAGE_WRITE_BEHIND_RETRY_BASE_SECONDS: float = 0.1
+    MESSAGE_WRITE_BEHIND_RETRY_MAX_SECONDS: float = 5.0
+    MESSAGE_WRITE_BEHIND_MAX_PENDING: int = 10000  # 대기열이 가득 차면 저장 요청이 자리가 날 때까지 대기
+    MESSAGE_WRITE_BEHIND_SHUTDOWN_SECONDS: float = 10.0  # 종료 시 남은 메시지 저장을 재시도하는 시간
+
+    # SSE 프레임 병합 (N바이트 또는 M밀리초 중 먼저 도달하는 조건에서 전송, 0이면 토큰마다 전송)
+    SSE_COALESCE_MAX_BYTES: int = 256
+    SSE_COALESCE_MAX_DELAY_MS: float = 25.0
+    SSE_COALESCE_MAX_PENDING: int = 4  # 전송 대기 프레임 수 (가득 차면 업스트림 읽기를 멈춤)
+
+    # 스트리밍 응답 체크포인트 (N초마다 부분 응답을 messages 행에 저장, 0이면 완료/중단 시에만 저장)
+    STREAM_CHECKPOINT_SECONDS: float = 2.0
+
+    # 배치 완성 엔드포인트
+    BATCH_MAX_ITEMS: int = 1000
+    BATCH_DEFAULT_CONCURRENCY: int = 8
+    BATCH_MAX_CONCURRENCY: int = 32
+
+    # 모델별 요청 한도 스케줄러 (RPM/TPM 토큰 버킷 + 사용자별 공정 대기열)
+    # 기본 한도는 최하위 티어 기준이라 상위 티어 계정을 불필요하게 막으므로,
+    # 계정 한도를 RATE_LIMIT_OVERRIDES에 넣은 뒤 켜세요.
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = 30.0  # 대기열에서 이 시간을 넘기면 429 응답
+    # 계정 티어에 맞춘 모델별 한도 (예: {"gpt-4o": {"rpm": 5000, "tpm": 800000}})
+    RATE_LIMIT_OVERRIDES: Dict[str, Dict[str, int]] = {}
+
+    # 업스트림 재시도 (재시도 가능한 오류만, 지수 백오프 + jitter)
+    RETRY_MAX_ATTEMPTS: int = 3  # 첫 시도 포함
+    RETRY_BASE_DELAY_SECONDS: float = 0.5
+    RETRY_MAX_DELAY_SECONDS: float = 8.0
+
+    # 모델별 서킷 브레이커 (연속 장애 시 일정 시간 동안 바로 실패)
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RECOVERY_SECONDS: float = 30.0
+
+    # 지연 기반 헤지 요청 (주 모델의 첫 응답이 최근 p95 지연보다 늦으면 대체 모델로도 요청)
+    # 대체 모델은 보통 더 작은 모델이라 응답 품질이 바뀔 수 있으므로 명시적으로 켤 때만 사용
+    HEDGE_ENABLED: bool = False
+    HEDGE_FALLBACK_MODELS: Dict[str, str] = {
+        "gpt-4o": "gpt-4o-mini",
+        "gpt-5": "gpt-5-mini",
+    }
+    HEDGE_LATENCY_PERCENTILE: float = 95.0
+    HEDGE_WINDOW_SIZE: int = 200  # 모델별로 보관할 최근 지연 시간 표본 수
+    HEDGE_MIN_SAMPLES: int = 20  # 이보다 표본이 적으면 기본 임계값 사용
+    HEDGE_DEFAULT_DELAY_SECONDS: float = 5.0
+    HEDGE_MIN_DELAY_SECONDS: float = 0.5
+
     # Tavily Search API (선택적 - 없어도 검색 기능 비활성화)
     TAVILY_API_KEY: str = ""
+
+    TAVILY_BASE_URL: str = "https://api.tavily.com"
+
+    # 검색 호출 제한 (동시 실행 수, 검색어별 제한 시간)
+    SEARCH_MAX_CONCURRENCY: int = 8
+    SEARCH_TIMEOUT_SECONDS: float = 10.0
+    # 파이프라인 모드: Agent 대신 사용자 메시지로 바로 검색하고 DB 저장과 병렬로 진행
+    SEARCH_PIPELINED: bool = False
+    SEARCH_BUDGET_SECONDS: float = 3.0  # 파이프라인 모드에서 답변 전에 검색 결과를 기다리는 최대 시간
+    SEARCH_CACHE_IO_WORKERS: int = 2  # SQLite 검색 캐시 전용 스레드 수
+
+    # 검색 결과 캐시 (메모리 + SQLite 파일, 재시작 후에도 유지)
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_DB_PATH: str = "search_cache.db"  # 빈 문자열이면 메모리 캐시만 사용
+    SEARCH_CACHE_TTL_SECONDS: float = 6 * 3600.0
+    SEARCH_CACHE_MAX_MEMORY_ENTRIES: int = 1000
+    SEARCH_CACHE_MAX_PERSISTED_ENTRIES: int = 50000
+
+    # 검색 결과 컨텍스트 (중복 제거 후 검색어와의 BM25 점수 순으로 토큰 예산 안에서 포함)
+    SEARCH_CONTEXT_MAX_TOKENS: int = 800
+    SEARCH_CONTEXT_WINDOW_RATIO: float = 0.25  # 모델 컨텍스트 윈도우 대비 최대 비율
+    SEARCH_CONTEXT_MAX_RESULTS: int = 3
+    SEARCH_CONTEXT_DEDUPE_THRESHOLD: float = 0.8  # 이 이상 겹치는 스니펫은 중복으로 간주
+    
+    # Prometheus 메트릭 (/metrics)
+    METRICS_ENABLED: bool = True
     
     # CORS
     CORS_ORIGINS: List[str] = [
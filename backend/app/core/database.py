@@ -1,18 +1,64 @@
+from typing import AsyncIterator
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core.metrics import instrument_session_commits
 
+# 동기 드라이버별 비동기 드라이버
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """DB URL의 드라이버를 비동기 드라이버로 변경 (postgresql → asyncpg, sqlite → aiosqlite)"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.drivername == driver:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# 동기 엔진 (마이그레이션, 스크립트용)
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrument_session_commits(SessionLocal)
+
+# 비동기 엔진 (요청 처리용, DB 왕복 동안 이벤트 루프를 막지 않음)
+async_engine = create_async_engine(get_async_database_url(settings.DATABASE_URL), pool_pre_ping=True)
+
+
+class AsyncSyncSession(Session):
+    """AsyncSession 내부에서 사용하는 동기 세션 (커밋 시간 기록용)"""
+
+
+instrument_session_commits(AsyncSyncSession)
+
+# 커밋 후에도 로드한 속성을 사용할 수 있도록 expire_on_commit=False
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+    sync_session_class=AsyncSyncSession,
+)
 
 Base = declarative_base()
 
 
 def get_db():
-    """데이터베이스 세션 의존성"""
+    """데이터베이스 세션 의존성 (동기)"""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """데이터베이스 세션 의존성 (비동기)"""
+    async with AsyncSessionLocal() as db:
+        yield db
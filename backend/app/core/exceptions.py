@@ -0,0 +1,52 @@
+from typing import Optional
+
+
+class LLMServiceError(Exception):
+    """LLM 호출 관련 오류 (응답에 사용할 HTTP 상태 코드 포함)"""
+    status_code: int = 500
+    retryable: bool = False  # 같은 요청을 다시 보내면 성공할 수 있는 오류인지
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class RateLimitExceededError(LLMServiceError):
+    """요청 한도 초과 (대기 시간 초과 또는 업스트림 429)"""
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, retryable: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+
+class UpstreamTimeoutError(LLMServiceError):
+    """업스트림 응답 시간 초과"""
+    status_code = 504
+    retryable = True
+
+
+class UpstreamUnavailableError(LLMServiceError):
+    """업스트림 연결 실패 또는 5xx 응답"""
+    status_code = 502
+    retryable = True
+
+
+class UpstreamRequestError(LLMServiceError):
+    """업스트림이 요청 자체를 거부 (잘못된 파라미터, 컨텍스트 초과 등)"""
+    status_code = 400
+
+
+class UpstreamAuthError(LLMServiceError):
+    """업스트림 인증/권한 오류 (서버 설정 문제)"""
+    status_code = 502
+
+
+class CircuitOpenError(LLMServiceError):
+    """모델의 서킷 브레이커가 열려 있어 호출하지 않음"""
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
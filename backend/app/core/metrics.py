@@ -0,0 +1,136 @@
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+
+T = TypeVar("T")
+
+# 지연 시간 버킷 (초): 요청/LLM/검색은 넓게, 인증/커밋은 밀리초 단위로 촘촘하게
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP 요청 처리 시간 (스트리밍 응답은 전송 완료까지)",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+AUTH_DURATION = Histogram(
+    "auth_duration_seconds",
+    "get_current_user 단계별 시간 (jwt_decode, user_lookup)",
+    ["stage"],
+    buckets=FAST_BUCKETS,
+)
+DB_COMMIT_DURATION = Histogram(
+    "db_commit_duration_seconds",
+    "DB 커밋 시간 (flush 포함)",
+    buckets=FAST_BUCKETS,
+)
+SEARCH_DURATION = Histogram(
+    "search_duration_seconds",
+    "웹 검색 시간 (cache=hit은 메모리 캐시 히트)",
+    ["cache"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds",
+    "LLM 스트리밍 첫 청크까지의 시간",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_STREAM_DURATION = Histogram(
+    "llm_stream_duration_seconds",
+    "LLM 스트리밍 전체 시간",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens",
+    "LLM 토큰 수 (direction=in은 프롬프트, out은 생성)",
+    ["model", "direction"],
+)
+LLM_ACTIVE_STREAMS = Gauge(
+    "llm_active_streams",
+    "진행 중인 LLM 스트림 수",
+    ["model"],
+)
+
+
+def render_metrics() -> tuple:
+    """Prometheus 텍스트 포맷 (본문, Content-Type)"""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def record_tokens(model: str, prompt_tokens, completion_tokens) -> None:
+    """토큰 사용량 기록 (정수가 아닌 값은 무시)"""
+    if isinstance(prompt_tokens, int) and prompt_tokens > 0:
+        LLM_TOKENS.labels(model=model, direction="in").inc(prompt_tokens)
+    if isinstance(completion_tokens, int) and completion_tokens > 0:
+        LLM_TOKENS.labels(model=model, direction="out").inc(completion_tokens)
+
+
+async def observe_llm_stream(model: str, stream: AsyncIterator[T]) -> AsyncIterator[T]:
+    """LLM 스트림의 첫 청크 시간, 전체 시간, 진행 중인 스트림 수 기록"""
+    started = time.perf_counter()
+    first = True
+    active = LLM_ACTIVE_STREAMS.labels(model=model)
+    active.inc()
+    try:
+        async for chunk in stream:
+            if first:
+                first = False
+                LLM_TIME_TO_FIRST_TOKEN.labels(model=model).observe(time.perf_counter() - started)
+            yield chunk
+    finally:
+        active.dec()
+        LLM_STREAM_DURATION.labels(model=model).observe(time.perf_counter() - started)
+
+
+def instrument_session_commits(session_factory) -> None:
+    """세션 팩토리에서 만든 세션의 커밋 시간 기록"""
+
+    @event.listens_for(session_factory, "before_commit")
+    def _before_commit(session):
+        session.info["commit_started"] = time.perf_counter()
+
+    @event.listens_for(session_factory, "after_commit")
+    def _after_commit(session):
+        started = session.info.pop("commit_started", None)
+        if started is not None:
+            DB_COMMIT_DURATION.observe(time.perf_counter() - started)
+
+    @event.listens_for(session_factory, "after_rollback")
+    def _after_rollback(session):
+        session.info.pop("commit_started", None)
+
+
+class MetricsMiddleware:
+    """라우트별 요청 처리 시간 기록 (ASGI 미들웨어, 스트리밍 응답을 버퍼링하지 않음)"""
+
+    def __init__(self, app: Callable[..., Awaitable[None]]):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # 매칭된 라우트의 경로 템플릿 사용 (경로 파라미터별로 라벨이 늘어나지 않도록)
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Tuple
+import base64
+import json
+
+# 다음 페이지 커서를 전달하는 응답 헤더
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """(시간, id) 키셋 커서를 URL에 안전한 불투명 문자열로 인코딩"""
+    raw = json.dumps([timestamp.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """커서 디코딩 (형식이 잘못되면 ValueError)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(row_id, int):
+            raise TypeError(row_id)
+        return datetime.fromisoformat(timestamp), row_id
+    except (TypeError, ValueError) as e:
+        raise ValueError("잘못된 커서입니다.") from e
@@ -0,0 +1,128 @@
+from json.encoder import encode_basestring
+from typing import Any, AsyncIterator
+import asyncio
+import json
+from app.core.config import settings
+
+# 'data: {"chunk": "..."}\n\n' 형태의 프레임을 미리 만들어 둔 템플릿으로 조립
+# (json.dumps({"chunk": ...}, ensure_ascii=False)와 같은 결과)
+_CHUNK_FRAME_PREFIX = 'data: {"chunk": '
+_CHUNK_FRAME_SUFFIX = "}\n\n"
+
+DONE_FRAME = "data: [DONE]\n\n"
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+}
+
+
+def encode_chunk(text: str) -> str:
+    """텍스트 청크를 SSE 프레임으로 인코딩"""
+    return _CHUNK_FRAME_PREFIX + encode_basestring(text) + _CHUNK_FRAME_SUFFIX
+
+
+def encode_event(payload: dict) -> str:
+    """임의의 JSON 페이로드를 SSE 프레임으로 인코딩"""
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+async def coalesce_chunks(
+    source: AsyncIterator[Any],
+    max_bytes: int = None,
+    max_delay_ms: float = None,
+    max_pending: int = None,
+) -> AsyncIterator[Any]:
+    """텍스트 청크를 모아서 전달
+
+    버퍼가 max_bytes 이상이 되거나 첫 청크를 받은 뒤 max_delay_ms가 지나면
+    (둘 중 먼저 오는 조건) 모은 텍스트를 하나의 청크로 내보냅니다.
+    텍스트가 아닌 항목(이벤트 등)은 버퍼를 먼저 비운 뒤 그대로 전달합니다.
+    업스트림은 별도 태스크에서 읽으므로 토큰마다 태스크를 만들지 않고,
+    소비자는 프레임을 내보낼 때만 깨어납니다.
+    전송 대기 프레임은 max_pending개까지만 쌓이므로, 클라이언트가 느리면
+    업스트림 읽기도 멈춥니다 (버퍼는 최대 max_bytes + 청크 하나).
+    """
+    max_bytes = settings.SSE_COALESCE_MAX_BYTES if max_bytes is None else max_bytes
+    max_delay_ms = settings.SSE_COALESCE_MAX_DELAY_MS if max_delay_ms is None else max_delay_ms
+    max_pending = settings.SSE_COALESCE_MAX_PENDING if max_pending is None else max_pending
+
+    # 병합이 꺼져 있으면 그대로 전달
+    if max_bytes <= 0 or max_delay_ms <= 0:
+        async for item in source:
+            yield item
+        return
+
+    loop = asyncio.get_running_loop()
+    max_delay = max_delay_ms / 1000
+    outputs = asyncio.Queue(maxsize=max(max_pending, 1))  # 내보낼 준비가 된 항목
+    buffer = []  # 병합 중인 텍스트
+    state = {"bytes": 0, "first_at": None, "done": False, "error": None}
+    wake = asyncio.Event()
+
+    def take_buffer() -> str:
+        text = "".join(buffer)
+        buffer.clear()
+        state["bytes"] = 0
+        state["first_at"] = None
+        return text
+
+    async def put(item: Any) -> None:
+        # 대기열이 가득 차면 소비자가 꺼낼 때까지 업스트림 읽기를 멈춤
+        await outputs.put(item)
+        wake.set()
+
+    async def pump() -> None:
+        try:
+            async for item in source:
+                if isinstance(item, str):
+                    buffer.append(item)
+                    state["bytes"] += len(item.encode("utf-8"))
+                    if state["first_at"] is None:
+                        # 새 프레임의 첫 청크: 소비자가 타이머를 시작하도록 깨움
+                        state["first_at"] = loop.time()
+                        wake.set()
+                    if state["bytes"] >= max_bytes:
+                        await put(take_buffer())
+                else:
+                    if buffer:
+                        await put(take_buffer())
+                    await put(item)
+        except Exception as e:
+            state["error"] = e
+        finally:
+            state["done"] = True
+            wake.set()
+
+    pump_task = asyncio.ensure_future(pump())
+    try:
+        while True:
+            wake.clear()
+            while not outputs.empty():
+                yield outputs.get_nowait()
+            if state["done"]:
+                while not outputs.empty():
+                    yield outputs.get_nowait()
+                if buffer:
+                    yield take_buffer()
+                if state["error"] is not None:
+                    raise state["error"]
+                return
+
+            timeout = None
+            if state["first_at"] is not None:
+                timeout = max(state["first_at"] + max_delay - loop.time(), 0)
+            try:
+                await asyncio.wait_for(wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                # 시간 조건 도달 (대기열에 먼저 들어온 프레임이 있으면 그것부터 전송)
+                if buffer and outputs.empty():
+                    yield take_buffer()
+    finally:
+        # 클라이언트 연결이 끊긴 경우 업스트림 읽기 중단
+        if not pump_task.done():
+            pump_task.cancel()
+            try:
+                await pump_task
+            except asyncio.CancelledError:
+                pass
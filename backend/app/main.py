@@ -1,7 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.database import async_engine
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.pagination import NEXT_CURSOR_HEADER
 from app.api.api_v1.api import api_router
+from app.services.openai_service import openai_service
+from app.services.search_service import search_service
+from app.services.message_persister import message_persister
 
 app = FastAPI(
     title="AI Prompt Web API",
@@ -16,12 +22,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# 라우트별 요청 처리 시간 (Prometheus)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # API 라우터 등록
 app.include_router(api_router, prefix="/api/v1")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """대기 중인 메시지 저장 후 공유 HTTP/DB 커넥션 풀 정리"""
+    await message_persister.aclose()
+    await openai_service.aclose()
+    await search_service.aclose()
+    await async_engine.dispose()
+
+
 @app.get("/")
 async def root():
     return {"message": "AI Prompt Web API"}
@@ -30,3 +50,10 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 메트릭"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
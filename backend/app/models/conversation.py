@@ -1,37 +1,74 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, JSON
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
+# 대화 목록에 표시할 마지막 메시지 미리보기 길이
+PREVIEW_LENGTH = 100
+
+# 메시지 상태 (스트리밍 중 부분 응답 체크포인트 → 완료 또는 중단)
+MESSAGE_STATUS_STREAMING = "streaming"
+MESSAGE_STATUS_COMPLETE = "complete"
+MESSAGE_STATUS_ABORTED = "aborted"
+
+
+def utcnow() -> datetime:
+    """키셋 커서 시각 (DB 서버 시각 대신 파이썬에서 만들어 커서와 같은 마이크로초 정밀도로 저장)"""
+    return datetime.utcnow()
+
 
 class Conversation(Base):
     """대화 세션 모델"""
     __tablename__ = "conversations"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=True)  # 대화 제목 (첫 메시지 기반)
     model = Column(String, nullable=True)  # 사용된 모델
     temperature = Column(Float, nullable=True)  # 사용된 temperature
     max_tokens = Column(Integer, nullable=True)  # 사용된 max_tokens
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), onupdate=utcnow)
+    # 목록 조회용 비정규화 컬럼 (메시지 저장과 같은 트랜잭션에서 갱신)
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    last_message_preview = Column(String, nullable=True)
 
     # 관계
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
 
+    # 사용자별 최근 대화 목록 키셋 페이지네이션 (user_id 범위 스캔 + (updated_at, id) 역순)
+    __table_args__ = (
+        Index("ix_conversations_user_id_updated_at_id", user_id, updated_at.desc(), id.desc()),
+    )
+
+    def record_message(self, content: str) -> None:
+        """메시지 추가 시 개수/마지막 메시지 갱신 (동시 저장에도 개수가 유실되지 않도록 SQL 식으로 증가)"""
+        self.message_count = Conversation.message_count + 1
+        self.last_message_at = self.updated_at = utcnow()
+        self.last_message_preview = content[:PREVIEW_LENGTH]
+
 
 class Message(Base):
     """대화 메시지 모델"""
     __tablename__ = "messages"
 
     id = Column(Integer, primary_key=True, index=True)
-    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False, index=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False)
     role = Column(String, nullable=False)  # user, assistant, system
     content = Column(Text, nullable=False)  # 메시지 내용
     usage = Column(JSON, nullable=True)  # 토큰 사용량 정보
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    status = Column(
+        String, nullable=False, default=MESSAGE_STATUS_COMPLETE, server_default=MESSAGE_STATUS_COMPLETE
+    )  # streaming, complete, aborted
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
 
     # 관계
     conversation = relationship("Conversation", back_populates="messages")
 
+    # 대화별 메시지 키셋 페이지네이션 ((created_at, id) 순)
+    __table_args__ = (
+        Index("ix_messages_conversation_id_created_at_id", conversation_id, created_at, id),
+    )
+
@@ -19,6 +19,7 @@ class MessageResponse(MessageBase):
     """메시지 응답 스키마"""
     id: int
     conversation_id: int
+    status: str = Field(default="complete", description="메시지 상태 (streaming, complete, aborted)")
     created_at: datetime
 
     class Config:
@@ -59,6 +60,8 @@ class ConversationListResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime]
     message_count: int = Field(default=0, description="메시지 개수")
+    last_message_at: Optional[datetime] = Field(default=None, description="마지막 메시지 시간")
+    last_message_preview: Optional[str] = Field(default=None, description="마지막 메시지 미리보기")
 
     class Config:
         from_attributes = True
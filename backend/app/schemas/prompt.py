@@ -1,6 +1,7 @@
 from typing import Optional, List
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from app.constants.models import DEFAULT_MODEL, is_valid_model
+from app.core.config import settings
 
 
 class PromptRequest(BaseModel):
@@ -11,6 +12,8 @@ class PromptRequest(BaseModel):
     max_tokens: Optional[int] = Field(default=1000, ge=1, description="최대 토큰 수")
     stream: Optional[bool] = Field(default=False, description="스트리밍 응답 여부")
     use_search: Optional[bool] = Field(default=False, description="웹 검색 기능 사용 여부")
+    use_cache: Optional[bool] = Field(default=False, description="응답 캐시 사용 여부 (temperature 0이면 자동 적용)")
+    use_semantic_cache: Optional[bool] = Field(default=False, description="유사 프롬프트 캐시 사용 여부")
     
     @field_validator('model')
     @classmethod
@@ -24,12 +27,28 @@ class PromptRequest(BaseModel):
         return v
 
 
+class BatchPromptRequest(BaseModel):
+    """배치 프롬프트 요청 스키마"""
+    items: List[PromptRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.BATCH_MAX_ITEMS,
+        description="프롬프트 요청 목록 (stream/use_search는 무시됨)"
+    )
+    concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="동시 실행 수 (서버 상한 BATCH_MAX_CONCURRENCY 이내)"
+    )
+
+
 class PromptResponse(BaseModel):
     """프롬프트 응답 스키마"""
     response: str = Field(..., description="AI 응답")
     model: str = Field(..., description="사용된 모델")
     usage: Optional[dict] = Field(default=None, description="토큰 사용량 정보")
     conversation_id: Optional[int] = Field(default=None, description="대화 세션 ID")
+    context: Optional[dict] = Field(default=None, description="컨텍스트 윈도우 정보 (입력 토큰, 잘라낸 토큰/메시지 수)")
 
 
 class ChatMessage(BaseModel):
@@ -39,14 +58,21 @@ class ChatMessage(BaseModel):
 
 
 class ChatRequest(BaseModel):
-    """채팅 요청 스키마 (대화 히스토리 포함)"""
-    messages: List[ChatMessage] = Field(..., description="대화 메시지 목록")
+    """채팅 요청 스키마 (대화 히스토리 포함)
+
+    - messages: 전체 대화 히스토리를 보내는 방식
+    - conversation_id + message: 새 사용자 메시지만 보내고 히스토리는 서버에서 재구성하는 방식
+    """
+    messages: List[ChatMessage] = Field(default_factory=list, description="대화 메시지 목록")
+    message: Optional[str] = Field(default=None, description="새 사용자 메시지 (히스토리는 서버에 저장된 대화에서 재구성)")
     model: Optional[str] = Field(default=DEFAULT_MODEL, description="사용할 OpenAI 모델")
     temperature: Optional[float] = Field(default=0.7, ge=0.0, le=2.0, description="온도 설정 (0.0-2.0)")
     max_tokens: Optional[int] = Field(default=1000, ge=1, description="최대 토큰 수")
     stream: Optional[bool] = Field(default=False, description="스트리밍 응답 여부")
     conversation_id: Optional[int] = Field(default=None, description="대화 세션 ID (기존 대화 이어가기)")
     use_search: Optional[bool] = Field(default=False, description="웹 검색 기능 사용 여부")
+    use_cache: Optional[bool] = Field(default=False, description="응답 캐시 사용 여부 (temperature 0이면 자동 적용)")
+    use_semantic_cache: Optional[bool] = Field(default=False, description="유사 프롬프트 캐시 사용 여부")
     
     @field_validator('model')
     @classmethod
@@ -58,3 +84,12 @@ class ChatRequest(BaseModel):
             from app.constants.models import AVAILABLE_MODELS
             raise ValueError(f"지원하지 않는 모델입니다: {v}. 사용 가능한 모델: {', '.join(AVAILABLE_MODELS)}")
         return v
+    
+    @model_validator(mode="after")
+    def validate_messages(self) -> "ChatRequest":
+        """messages와 message 중 하나만 사용"""
+        if self.message is not None and self.messages:
+            raise ValueError("messages와 message는 함께 사용할 수 없습니다.")
+        if self.message is None and not self.messages:
+            raise ValueError("messages 또는 message가 필요합니다.")
+        return self
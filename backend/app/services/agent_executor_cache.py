@@ -0,0 +1,47 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+from app.core.config import settings
+
+
+class AgentExecutorCache:
+    """검색 모드용 AgentExecutor 캐시
+
+    (모델, 스트리밍 여부, 파라미터 형태, 툴 구성)이 같으면 Agent와 실행기를 다시 만들지 않고 재사용합니다.
+    실행기는 요청별 상태를 갖지 않으므로 동시에 여러 요청이 같은 인스턴스를 사용해도 됩니다.
+    """
+
+    def __init__(self, max_executors: int = None):
+        self.max_executors = max_executors or settings.AGENT_EXECUTOR_CACHE_SIZE
+        self._executors: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """키에 해당하는 실행기 반환, 없으면 factory로 생성 후 등록 (LRU)"""
+        executor = self._executors.get(key)
+        if executor is not None:
+            self._executors.move_to_end(key)
+            self.reused += 1
+            return executor
+
+        executor = factory()
+        self._executors[key] = executor
+        self.created += 1
+        while len(self._executors) > self.max_executors:
+            self._executors.popitem(last=False)
+            self.evicted += 1
+        return executor
+
+    def clear(self) -> None:
+        self._executors.clear()
+
+    def stats(self) -> dict:
+        """캐시 통계"""
+        return {
+            "executors": len(self._executors),
+            "max_executors": self.max_executors,
+            "created": self.created,
+            "reused": self.reused,
+            "evicted": self.evicted,
+        }
@@ -1,5 +1,7 @@
 from datetime import timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from fastapi import HTTPException, status
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin
@@ -9,15 +11,16 @@ from app.core.config import settings
 
 class AuthService:
     @staticmethod
-    def authenticate_user(db: Session, email: str, password: str) -> User:
+    async def authenticate_user(db: AsyncSession, email: str, password: str) -> User:
         """사용자 인증"""
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User).where(User.email == email))
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="이메일 또는 비밀번호가 올바르지 않습니다.",
             )
-        if not verify_password(password, user.hashed_password):
+        # bcrypt는 CPU를 오래 사용하므로 스레드 풀에서 실행
+        if not await run_in_threadpool(verify_password, password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="이메일 또는 비밀번호가 올바르지 않습니다.",
@@ -30,10 +33,10 @@ class AuthService:
         return user
 
     @staticmethod
-    def create_user(db: Session, user_create: UserCreate) -> User:
+    async def create_user(db: AsyncSession, user_create: UserCreate) -> User:
         """새 사용자 생성"""
         # 이메일 중복 확인
-        existing_user = db.query(User).filter(User.email == user_create.email).first()
+        existing_user = await db.scalar(select(User).where(User.email == user_create.email))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -48,7 +51,7 @@ class AuthService:
             )
         
         # 사용자 생성
-        hashed_password = get_password_hash(user_create.password)
+        hashed_password = await run_in_threadpool(get_password_hash, user_create.password)
         db_user = User(
             email=user_create.email,
             hashed_password=hashed_password,
@@ -56,14 +59,14 @@ class AuthService:
             is_active=True,
         )
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         return db_user
 
     @staticmethod
-    def get_user_by_email(db: Session, email: str) -> User:
+    async def get_user_by_email(db: AsyncSession, email: str) -> User:
         """이메일로 사용자 조회"""
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User).where(User.email == email))
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
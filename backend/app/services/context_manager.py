@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import hashlib
+import logging
+from app.core.config import settings
+from app.constants.models import get_context_window
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:
+    # tiktoken이 없으면 근사치로 토큰 수 계산
+    tiktoken = None
+
+# OpenAI 채팅 포맷의 메시지당 고정 토큰 (role, 구분자 등)
+TOKENS_PER_MESSAGE = 4
+# 어시스턴트 응답 시작을 위한 고정 토큰
+TOKENS_PER_REPLY = 3
+# 토큰 수 캐시 크기 (원문 대신 16바이트 해시만 보관)
+TOKEN_COUNT_CACHE_SIZE = 2048
+
+_token_counts: "OrderedDict[Tuple[bytes, str], int]" = OrderedDict()
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """모델별 토크나이저 (한 번 로드하면 재사용, 로드 실패 시 None)"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # 목록에 없는 최신 모델은 계열별 기본 인코딩 사용
+        name = "o200k_base" if model.startswith(("gpt-4o", "gpt-5", "o1", "o3")) else "cl100k_base"
+        try:
+            return tiktoken.get_encoding(name)
+        except Exception as e:
+            logger.warning(f"토크나이저 로드 실패 ({name}), 근사치로 계산합니다: {str(e)}")
+            return None
+    except Exception as e:
+        # 오프라인 환경 등에서 BPE 파일을 받을 수 없는 경우
+        logger.warning(f"토크나이저 로드 실패 ({model}), 근사치로 계산합니다: {str(e)}")
+        return None
+
+
+def _estimate_tokens(text: str) -> int:
+    """토크나이저 없이 토큰 수 근사 (ASCII 약 4자당 1토큰, 그 외 문자는 1자당 1토큰)"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def count_tokens(text: str, model: str) -> int:
+    """텍스트의 토큰 수 (같은 텍스트는 캐시된 값 사용)"""
+    if not text:
+        return 0
+    key = (hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(), model)
+    count = _token_counts.get(key)
+    if count is not None:
+        _token_counts.move_to_end(key)
+        return count
+
+    encoding = _get_encoding(model)
+    if encoding is None:
+        count = _estimate_tokens(text)
+    else:
+        count = len(encoding.encode(text, disallowed_special=()))
+    _token_counts[key] = count
+    if len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+        _token_counts.popitem(last=False)
+    return count
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str) -> str:
+    """텍스트를 max_tokens 토큰 이하로 자름"""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    if _estimate_tokens(text) <= max_tokens:
+        return text
+    # 근사치 기준으로 들어가는 가장 긴 앞부분 탐색
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if _estimate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def count_message_tokens(message: dict, model: str) -> int:
+    """채팅 메시지 하나의 토큰 수"""
+    return TOKENS_PER_MESSAGE + count_tokens(message.get("content") or "", model)
+
+
+class ContextWindowManager:
+    """모델 컨텍스트 윈도우에 맞게 대화 히스토리를 잘라내는 관리자
+
+    시스템 메시지는 항상 유지하고, 최신 메시지부터 거꾸로
+    (컨텍스트 윈도우 - max_tokens - 여유분) 예산 안에 들어가는 만큼만 포함합니다.
+    """
+
+    def __init__(self, safety_margin: int = None):
+        self.safety_margin = (
+            settings.CONTEXT_SAFETY_MARGIN_TOKENS if safety_margin is None else safety_margin
+        )
+
+    def get_budget(self, model: str, max_tokens: Optional[int]) -> int:
+        """입력 메시지에 사용할 수 있는 토큰 예산"""
+        return get_context_window(model) - (max_tokens or 0) - self.safety_margin - TOKENS_PER_REPLY
+
+    def fit(
+        self,
+        messages: List[dict],
+        model: str,
+        max_tokens: Optional[int]
+    ) -> Tuple[List[dict], dict]:
+        """예산 안에 들어가는 메시지 목록과 토큰 통계 반환
+
+        Returns:
+            (잘라낸 메시지 목록, {"input_tokens", "trimmed_tokens", "trimmed_messages", "budget"})
+        """
+        budget = self.get_budget(model, max_tokens)
+        token_counts = [count_message_tokens(msg, model) for msg in messages]
+        total_tokens = sum(token_counts)
+
+        if total_tokens <= budget:
+            return messages, {
+                "input_tokens": total_tokens,
+                "trimmed_tokens": 0,
+                "trimmed_messages": 0,
+                "budget": budget,
+            }
+
+        system_indexes = [i for i, msg in enumerate(messages) if msg.get("role") == "system"]
+        used = sum(token_counts[i] for i in system_indexes)
+        kept = set(system_indexes)
+
+        # 최신 메시지부터 예산이 허용하는 만큼 연속으로 포함
+        for i in range(len(messages) - 1, -1, -1):
+            if i in kept:
+                continue
+            if used + token_counts[i] > budget:
+                break
+            kept.add(i)
+            used += token_counts[i]
+
+        non_system = [i for i in range(len(messages)) if i not in system_indexes]
+        if non_system and non_system[-1] not in kept:
+            raise ValueError(
+                f"메시지가 모델 컨텍스트 윈도우를 초과합니다. "
+                f"(입력 예산 {budget} 토큰, 필요 {used + token_counts[non_system[-1]]} 토큰)"
+            )
+
+        fitted = [messages[i] for i in sorted(kept)]
+        stats = {
+            "input_tokens": used,
+            "trimmed_tokens": total_tokens - used,
+            "trimmed_messages": len(messages) - len(fitted),
+            "budget": budget,
+        }
+        logger.info(
+            f"컨텍스트 윈도우 초과로 메시지 {stats['trimmed_messages']}개 "
+            f"({stats['trimmed_tokens']} 토큰)를 제외했습니다. (모델: {model})"
+        )
+        return fitted, stats
+
+
+# 싱글톤 인스턴스
+context_window_manager = ContextWindowManager()
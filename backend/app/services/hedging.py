@@ -0,0 +1,236 @@
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+import asyncio
+import math
+import time
+from app.core.config import settings
+from app.core.exceptions import CircuitOpenError
+
+
+class LatencyTracker:
+    """모델별 최근 지연 시간으로 헤지 요청을 시작할 임계값 계산
+
+    헤지 후 취소된 요청처럼 끝나지 않은 시도도 "적어도 이만큼 걸림"(중도 절단 표본)으로
+    기록하고, Kaplan-Meier 추정으로 백분위수를 계산합니다. 완료된 요청만 세면 느린 요청이
+    빠져 임계값이 점점 낮아지기 때문입니다.
+    """
+
+    def __init__(
+        self,
+        window_size: int = None,
+        percentile: float = None,
+        min_samples: int = None,
+        default_delay: float = None,
+        min_delay: float = None,
+    ):
+        self.window_size = window_size or settings.HEDGE_WINDOW_SIZE
+        self.percentile = percentile or settings.HEDGE_LATENCY_PERCENTILE
+        self.min_samples = settings.HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self.default_delay = settings.HEDGE_DEFAULT_DELAY_SECONDS if default_delay is None else default_delay
+        self.min_delay = settings.HEDGE_MIN_DELAY_SECONDS if min_delay is None else min_delay
+        self._samples: Dict[str, Deque[Tuple[float, bool]]] = {}
+
+    def record(self, model: str, seconds: float, censored: bool = False) -> None:
+        """지연 시간 기록 (censored: 완료 전에 취소되어 실제 지연은 seconds 이상)"""
+        samples = self._samples.get(model)
+        if samples is None:
+            samples = deque(maxlen=self.window_size)
+            self._samples[model] = samples
+        samples.append((seconds, censored))
+
+    def _quantile(self, samples: Deque[Tuple[float, bool]]) -> float:
+        target = self.percentile / 100
+        at_risk = len(samples)
+        survival = 1.0
+        # 같은 시간이면 완료된 표본을 먼저 처리 (False < True)
+        ordered = sorted(samples)
+        for seconds, censored in ordered:
+            if not censored:
+                survival *= 1 - 1 / at_risk
+                if 1 - survival >= target - 1e-9:
+                    return seconds
+            at_risk -= 1
+        # 상위 구간이 모두 중도 절단이면 관측된 최댓값 사용
+        return ordered[-1][0]
+
+    def threshold(self, model: str) -> float:
+        """헤지 요청을 시작할 지연 시간 (표본이 부족하면 기본값)"""
+        samples = self._samples.get(model)
+        if not samples or len(samples) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, self._quantile(samples))
+
+    def stats(self) -> dict:
+        return {
+            model: {
+                "samples": len(samples),
+                "censored": sum(1 for _, censored in samples if censored),
+                "threshold": self.threshold(model),
+            }
+            for model, samples in self._samples.items()
+        }
+
+
+class RequestHedger:
+    """주 모델이 늦으면 대체 모델로 동시에 요청하고 먼저 응답한 쪽을 사용
+
+    주 모델의 첫 응답(일반 호출은 전체 응답, 스트리밍은 첫 청크)이 최근 지연 시간의
+    백분위수 임계값 안에 오지 않으면 대체 모델 요청을 시작합니다. 일반 호출은 전체 지연
+    (tracker), 스트리밍은 첫 청크까지의 지연(ttft_tracker)을 따로 추적합니다.
+    임계값 전에 업스트림 장애(서킷 브레이커 열림 포함)로 실패한 경우에도 대체 모델을 사용합니다.
+    먼저 성공한 요청을 사용하고 나머지는 취소합니다.
+    """
+
+    def __init__(self, tracker: LatencyTracker = None, ttft_tracker: LatencyTracker = None):
+        self.tracker = tracker or LatencyTracker()
+        self.ttft_tracker = ttft_tracker or LatencyTracker()
+        self.hedged = 0
+        self.primary_wins = 0
+        self.fallback_wins = 0
+
+    @staticmethod
+    def _needs_fallback(task: asyncio.Task) -> bool:
+        """주 모델 요청이 끝나지 않았거나 업스트림 장애로 실패했으면 대체 모델 요청"""
+        if not task.done():
+            return True
+        error = task.exception()
+        return error is not None and (getattr(error, "retryable", False) or isinstance(error, CircuitOpenError))
+
+    def _record_winner(self, winner: str, model: str) -> None:
+        if winner == model:
+            self.primary_wins += 1
+        else:
+            self.fallback_wins += 1
+
+    async def _timed_call(self, model: str, factory: Callable[[str], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        try:
+            result = await factory(model)
+        except asyncio.CancelledError:
+            # 헤지에서 져서 취소된 요청도 경과 시간을 하한으로 기록
+            self.tracker.record(model, time.monotonic() - started, censored=True)
+            raise
+        self.tracker.record(model, time.monotonic() - started)
+        return result
+
+    async def call(
+        self,
+        model: str,
+        fallback: Optional[str],
+        factory: Callable[[str], Awaitable[Any]]
+    ) -> Tuple[Any, str]:
+        """factory(모델)을 헤지 호출하고 (결과, 응답한 모델) 반환"""
+        if fallback is None:
+            return await factory(model), model
+
+        primary = asyncio.ensure_future(self._timed_call(model, factory))
+        tasks = {primary: model}
+        try:
+            await asyncio.wait({primary}, timeout=self.tracker.threshold(model))
+            if self._needs_fallback(primary):
+                self.hedged += 1
+                tasks[asyncio.ensure_future(self._timed_call(fallback, factory))] = fallback
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = tasks[task]
+                        if len(tasks) > 1:
+                            self._record_winner(winner, model)
+                        return task.result(), winner
+            # 모두 실패하면 주 모델의 오류 전달
+            raise primary.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _first_chunk(self, model: str, stream: AsyncIterator[Any]) -> Tuple[bool, Any]:
+        """스트림의 첫 청크 (스트림이 비어 있으면 (False, None))"""
+        started = time.monotonic()
+        try:
+            chunk = await stream.__anext__()
+        except StopAsyncIteration:
+            return False, None
+        except asyncio.CancelledError:
+            self.ttft_tracker.record(model, time.monotonic() - started, censored=True)
+            raise
+        self.ttft_tracker.record(model, time.monotonic() - started)
+        return True, chunk
+
+    @staticmethod
+    async def _discard(task: asyncio.Task, stream: AsyncIterator[Any]) -> None:
+        """패배한 스트림 정리"""
+        if not task.done():
+            task.cancel()
+        try:
+            await task
+        except BaseException:
+            pass
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    @staticmethod
+    async def _resume(has_chunk: bool, chunk: Any, stream: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """미리 받은 첫 청크부터 이어서 전달"""
+        try:
+            if not has_chunk:
+                return
+            yield chunk
+            async for chunk in stream:
+                yield chunk
+        finally:
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def start_stream(
+        self,
+        model: str,
+        fallback: Optional[str],
+        factory: Callable[[str], AsyncIterator[Any]]
+    ) -> Tuple[str, AsyncIterator[Any]]:
+        """첫 청크를 먼저 보낸 스트림을 골라 (응답한 모델, 스트림) 반환"""
+        if fallback is None:
+            return model, factory(model)
+
+        streams = {model: factory(model).__aiter__()}
+        primary = asyncio.ensure_future(self._first_chunk(model, streams[model]))
+        tasks = {primary: model}
+        winner_task = None
+        try:
+            await asyncio.wait({primary}, timeout=self.ttft_tracker.threshold(model))
+            if self._needs_fallback(primary):
+                self.hedged += 1
+                streams[fallback] = factory(fallback).__aiter__()
+                tasks[asyncio.ensure_future(self._first_chunk(fallback, streams[fallback]))] = fallback
+
+            pending = set(tasks)
+            while pending and winner_task is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner_task = next((task for task in done if task.exception() is None), None)
+            if winner_task is None:
+                raise primary.exception()
+        finally:
+            for task, task_model in tasks.items():
+                if task is not winner_task:
+                    await self._discard(task, streams[task_model])
+
+        winner = tasks[winner_task]
+        if len(tasks) > 1:
+            self._record_winner(winner, model)
+        has_chunk, chunk = winner_task.result()
+        return winner, self._resume(has_chunk, chunk, streams[winner])
+
+    def stats(self) -> dict:
+        """헤지 요청 통계"""
+        return {
+            "hedged": self.hedged,
+            "primary_wins": self.primary_wins,
+            "fallback_wins": self.fallback_wins,
+            "thresholds": self.tracker.stats(),
+            "ttft_thresholds": self.ttft_tracker.stats(),
+        }
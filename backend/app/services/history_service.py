@@ -0,0 +1,109 @@
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.conversation import Conversation, Message, MESSAGE_STATUS_COMPLETE
+
+
+class _ConversationHistory:
+    """대화 하나의 최근 메시지"""
+
+    def __init__(self, max_messages: int):
+        self.messages: Deque[dict] = deque(maxlen=max_messages)
+        self.message_ids: Deque[int] = deque(maxlen=max_messages)
+        self.last_message_id: Optional[int] = None
+
+
+class ConversationHistoryCache:
+    """대화별 최근 메시지 LRU 캐시
+
+    클라이언트가 새 메시지만 보내도 서버가 히스토리를 재구성할 수 있도록
+    최근 메시지를 프로세스 메모리에 보관하고, 메시지가 저장될 때마다 갱신합니다.
+    캐시된 마지막 메시지 ID가 DB와 다르면(다른 워커가 저장한 경우 등) DB에서 다시 읽습니다.
+    스트리밍 중이거나 중단된 응답은 프롬프트에 넣지 않도록 완료된 메시지만 다룹니다.
+    """
+
+    def __init__(self, max_conversations: int = None, max_messages: int = None):
+        self.max_conversations = (
+            settings.HISTORY_CACHE_MAX_CONVERSATIONS if max_conversations is None else max_conversations
+        )
+        self.max_messages = settings.HISTORY_CACHE_MAX_MESSAGES if max_messages is None else max_messages
+        self._entries: "OrderedDict[int, _ConversationHistory]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get_history(self, db: AsyncSession, conversation_id: int, user_id: int) -> List[dict]:
+        """대화의 최근 메시지 목록 반환 (오래된 순, 다른 사용자의 대화면 빈 목록)"""
+        latest_id = await db.scalar(
+            self._owned_messages(select(Message.id), conversation_id, user_id).order_by(Message.id.desc()).limit(1)
+        )
+        if latest_id is None:
+            return []
+
+        entry = self._entries.get(conversation_id)
+        if entry is not None and entry.last_message_id == latest_id:
+            self._entries.move_to_end(conversation_id)
+            self.hits += 1
+            return list(entry.messages)
+
+        self.misses += 1
+        rows = (await db.execute(
+            self._owned_messages(select(Message.id, Message.role, Message.content), conversation_id, user_id)
+            .order_by(Message.id.desc()).limit(self.max_messages)
+        )).all()
+
+        entry = _ConversationHistory(self.max_messages)
+        for row in reversed(rows):
+            entry.messages.append({"role": row.role, "content": row.content})
+            entry.message_ids.append(row.id)
+        entry.last_message_id = latest_id
+        self._store(conversation_id, entry)
+        return list(entry.messages)
+
+    @staticmethod
+    def _owned_messages(query, conversation_id: int, user_id: int):
+        """사용자 소유 대화의 완료된 메시지로 한정 (소유 확인을 메시지 조회와 같은 쿼리에서 처리)"""
+        return query.join(Conversation, Conversation.id == Message.conversation_id).where(
+            Message.conversation_id == conversation_id,
+            Conversation.user_id == user_id,
+            Message.status == MESSAGE_STATUS_COMPLETE,
+        )
+
+    def append(self, conversation_id: int, message_id: int, role: str, content: str) -> None:
+        """완료된 메시지를 캐시에 반영 (캐시에 있는 대화만 갱신, 이미 있는 메시지 ID는 무시)"""
+        entry = self._entries.get(conversation_id)
+        if entry is None or message_id in entry.message_ids:
+            return
+        entry.messages.append({"role": role, "content": content})
+        entry.message_ids.append(message_id)
+        entry.last_message_id = message_id
+        self._entries.move_to_end(conversation_id)
+
+    def invalidate(self, conversation_id: int) -> None:
+        """대화 캐시 제거"""
+        self._entries.pop(conversation_id, None)
+
+    def clear(self) -> None:
+        """전체 캐시 비우기"""
+        self._entries.clear()
+
+    def _store(self, conversation_id: int, entry: _ConversationHistory) -> None:
+        self._entries[conversation_id] = entry
+        self._entries.move_to_end(conversation_id)
+        while len(self._entries) > self.max_conversations:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """캐시 통계"""
+        total = self.hits + self.misses
+        return {
+            "conversations": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# 싱글톤 인스턴스
+conversation_history = ConversationHistoryCache()
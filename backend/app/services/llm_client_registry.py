@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import httpx
+from app.core.config import settings
+
+
+class LLMClientRegistry:
+    """LLM 클라이언트 레지스트리
+
+    (모델, 스트리밍 여부, 파라미터 형태) 별로 ChatOpenAI 인스턴스를 재사용하고,
+    모든 인스턴스가 하나의 비동기 HTTP 커넥션 풀을 공유하도록 합니다.
+    """
+
+    def __init__(self, max_clients: int = None):
+        self.max_clients = max_clients or settings.OPENAI_CLIENT_CACHE_SIZE
+        self._clients: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def get_http_async_client(self) -> httpx.AsyncClient:
+        """공유 비동기 HTTP 클라이언트 반환 (최초 사용 시 생성)"""
+        if self._http_async_client is None or self._http_async_client.is_closed:
+            self._http_async_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(
+                    settings.OPENAI_READ_TIMEOUT,
+                    connect=settings.OPENAI_CONNECT_TIMEOUT,
+                ),
+            )
+        return self._http_async_client
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """키에 해당하는 클라이언트 반환, 없으면 factory로 생성 후 등록 (LRU)"""
+        client = self._clients.get(key)
+        if client is not None:
+            self._clients.move_to_end(key)
+            self.reused += 1
+            return client
+
+        client = factory()
+        self._clients[key] = client
+        self.created += 1
+
+        # 최대 개수를 넘으면 가장 오래 사용되지 않은 클라이언트 제거
+        # (HTTP 커넥션 풀은 공유되므로 인스턴스만 버리면 됨)
+        while len(self._clients) > self.max_clients:
+            self._clients.popitem(last=False)
+            self.evicted += 1
+        return client
+
+    def _pool_stats(self) -> Dict[str, int]:
+        """httpx 커넥션 풀 사용 현황"""
+        client = self._http_async_client
+        if client is None or client.is_closed:
+            return {"connections": 0, "active": 0, "idle": 0, "pending_requests": 0}
+
+        # httpcore 커넥션 풀 내부 상태 (버전에 따라 없을 수 있음)
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "connections": len(connections),
+            "active": len(connections) - idle,
+            "idle": idle,
+            "pending_requests": len(getattr(pool, "_requests", []) or []),
+        }
+
+    def stats(self) -> dict:
+        """레지스트리 및 커넥션 풀 통계"""
+        return {
+            "clients": len(self._clients),
+            "max_clients": self.max_clients,
+            "created": self.created,
+            "reused": self.reused,
+            "evicted": self.evicted,
+            "pool": {
+                "max_connections": settings.OPENAI_MAX_CONNECTIONS,
+                "max_keepalive_connections": settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                "keepalive_expiry": settings.OPENAI_KEEPALIVE_EXPIRY,
+                **self._pool_stats(),
+            },
+        }
+
+    async def aclose(self) -> None:
+        """등록된 클라이언트와 HTTP 커넥션 풀 정리"""
+        self._clients.clear()
+        if self._http_async_client is not None and not self._http_async_client.is_closed:
+            await self._http_async_client.aclose()
+        self._http_async_client = None
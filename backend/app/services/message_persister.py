@@ -0,0 +1,254 @@
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import random
+import time
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.conversation import Conversation, Message, PREVIEW_LENGTH, utcnow
+from app.services.history_service import conversation_history
+
+logger = logging.getLogger(__name__)
+
+_conversations = Conversation.__table__
+
+
+class _PendingMessage:
+    """저장 대기 중인 메시지 하나"""
+
+    def __init__(self, conversation_id: int, user_id: int, role: str, content: str, usage: Optional[dict]):
+        self.conversation_id = conversation_id
+        self.user_id = user_id
+        self.role = role
+        self.content = content
+        self.usage = usage
+
+
+class MessagePersister:
+    """메시지 저장기 (write-behind를 켜면 모아서 일괄 저장)
+
+    꺼져 있으면 요청의 세션으로 바로 커밋합니다. 켜져 있으면 요청 경로에서는 메모리 대기열에
+    넣기만 하고, 백그라운드 작업이 batch_size건이 모이거나 flush_interval초가 지나면 한
+    트랜잭션으로 저장합니다 (메시지는 다중 행 INSERT, 대화 요약 컬럼은 대화별 UPDATE).
+    읽기 전에 sync()를 호출하면 해당 대화/사용자의 대기 중인 쓰기를 먼저 플러시합니다.
+    저장에 실패한 배치는 버리지 않고 대기열 앞에 되돌려 지수 백오프로 재시도하며,
+    대기열이 max_pending건으로 가득 차면 save()가 자리가 날 때까지 기다립니다(backpressure).
+    대기열은 프로세스 메모리에 있으므로 종료 시 aclose()로 플러시합니다.
+    """
+
+    def __init__(
+        self,
+        session_factory=None,
+        enabled: bool = None,
+        batch_size: int = None,
+        flush_interval: float = None,
+        retry_base_delay: float = None,
+        retry_max_delay: float = None,
+        max_pending: int = None
+    ):
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.enabled = settings.MESSAGE_WRITE_BEHIND if enabled is None else enabled
+        self.batch_size = batch_size or settings.MESSAGE_WRITE_BEHIND_BATCH_SIZE
+        self.flush_interval = settings.MESSAGE_WRITE_BEHIND_FLUSH_SECONDS if flush_interval is None else flush_interval
+        self.retry_base_delay = (
+            settings.MESSAGE_WRITE_BEHIND_RETRY_BASE_SECONDS if retry_base_delay is None else retry_base_delay
+        )
+        self.retry_max_delay = (
+            settings.MESSAGE_WRITE_BEHIND_RETRY_MAX_SECONDS if retry_max_delay is None else retry_max_delay
+        )
+        self.max_pending = max_pending or settings.MESSAGE_WRITE_BEHIND_MAX_PENDING
+        self._pending: List[_PendingMessage] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._room: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._consecutive_failures = 0
+        self._retry_at = 0.0
+        self.flushes = 0
+        self.flushed_messages = 0
+        self.failures = 0
+        self.backpressure_waits = 0
+
+    async def save(
+        self,
+        db: AsyncSession,
+        conversation: Conversation,
+        user_id: int,
+        role: str,
+        content: str,
+        usage: Optional[dict] = None
+    ) -> None:
+        """메시지 저장 (write-behind가 켜져 있으면 대기열에 넣고 바로 반환)"""
+        if self.enabled:
+            await self._wait_for_room()
+            self.enqueue(conversation.id, user_id, role, content, usage)
+            return
+
+        message = Message(conversation_id=conversation.id, role=role, content=content, usage=usage)
+        db.add(message)
+        conversation.record_message(content)
+        await db.flush()
+        message_id = message.id
+        await db.commit()
+        conversation_history.append(conversation.id, message_id, role, content)
+
+    async def _wait_for_room(self) -> None:
+        """대기열이 가득 차 있으면 플러시되어 자리가 날 때까지 대기"""
+        self._bind_loop()
+        if len(self._pending) < self.max_pending:
+            return
+        self.backpressure_waits += 1
+        while len(self._pending) >= self.max_pending:
+            self._room.clear()
+            self._ensure_worker()
+            self._wakeup.set()
+            await self._room.wait()
+
+    def enqueue(self, conversation_id: int, user_id: int, role: str, content: str, usage: Optional[dict] = None) -> None:
+        """메시지를 저장 대기열에 추가 (대기열 한도는 save()에서 확인)"""
+        self._bind_loop()
+        self._pending.append(_PendingMessage(conversation_id, user_id, role, content, usage))
+        self._ensure_worker()
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = self._loop.create_task(self._run())
+
+    def has_pending(self, conversation_id: Optional[int] = None, user_id: Optional[int] = None) -> bool:
+        """해당 대화/사용자의 저장 대기 메시지 여부 (둘 다 없으면 전체)"""
+        return any(
+            (conversation_id is None or item.conversation_id == conversation_id)
+            and (user_id is None or item.user_id == user_id)
+            for item in self._pending
+        )
+
+    async def sync(self, conversation_id: Optional[int] = None, user_id: Optional[int] = None) -> None:
+        """대기 중이거나 저장 중인 쓰기를 플러시하고 완료를 기다림 (read-your-writes)"""
+        flushing = self._lock is not None and self._loop is asyncio.get_running_loop() and self._lock.locked()
+        if flushing or self.has_pending(conversation_id, user_id):
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """대기열의 메시지를 모두 저장 (실패한 배치는 되돌려 백오프 후 재시도, 모두 저장했으면 True)"""
+        self._bind_loop()
+        async with self._lock:
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:len(batch)]
+                try:
+                    await self._write(batch)
+                except Exception as e:
+                    self._requeue(batch, e)
+                    return False
+                self._consecutive_failures = 0
+                if len(self._pending) < self.max_pending:
+                    self._room.set()
+            return True
+
+    async def _write(self, batch: List[_PendingMessage]) -> None:
+        messages = [
+            Message(conversation_id=item.conversation_id, role=item.role, content=item.content, usage=item.usage)
+            for item in batch
+        ]
+        # 대화별로 추가된 메시지 수와 마지막 메시지 미리보기를 모아 UPDATE 한 번으로 반영
+        summaries: Dict[int, dict] = {}
+        for item in batch:
+            summary = summaries.setdefault(item.conversation_id, {"cid": item.conversation_id, "added": 0})
+            summary["added"] += 1
+            summary["preview"] = item.content[:PREVIEW_LENGTH]
+
+        now = utcnow()
+        async with self.session_factory() as db:
+            db.add_all(messages)
+            await db.flush()  # PostgreSQL에서는 다중 행 INSERT ... RETURNING 한 번으로 ID 할당
+            message_ids = [message.id for message in messages]
+            await db.execute(
+                update(_conversations).where(_conversations.c.id == bindparam("cid")).values(
+                    message_count=_conversations.c.message_count + bindparam("added"),
+                    last_message_preview=bindparam("preview"),
+                    last_message_at=now,
+                    updated_at=now,
+                ),
+                list(summaries.values()),
+            )
+            await db.commit()
+
+        self.flushes += 1
+        self.flushed_messages += len(batch)
+        for item, message_id in zip(batch, message_ids):
+            conversation_history.append(item.conversation_id, message_id, item.role, item.content)
+
+    def _requeue(self, batch: List[_PendingMessage], error: Exception) -> None:
+        """실패한 배치를 순서를 유지해 대기열 앞에 되돌리고 다음 재시도 시각을 정함"""
+        self.failures += 1
+        self._consecutive_failures += 1
+        delay = self._backoff()
+        self._retry_at = time.monotonic() + delay
+        logger.warning(
+            f"메시지 {len(batch)}건 일괄 저장 실패 ({self._consecutive_failures}회 연속), "
+            f"{delay:.2f}초 후 재시도합니다: {str(error)}"
+        )
+        self._pending[:0] = batch
+
+    def _backoff(self) -> float:
+        ceiling = min(self.retry_max_delay, self.retry_base_delay * (2 ** (self._consecutive_failures - 1)))
+        return random.uniform(0, ceiling)
+
+    async def _run(self) -> None:
+        """batch_size건이 모이거나 flush_interval초가 지나면 플러시 (실패 후에는 백오프 시간만큼 대기)"""
+        while self._pending:
+            if self._consecutive_failures:
+                await asyncio.sleep(max(self._retry_at - time.monotonic(), 0))
+            else:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _bind_loop(self) -> None:
+        # asyncio 동기화 객체는 이벤트 루프에 묶이므로 루프가 바뀌면 새로 만듦
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._room = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._worker = None
+
+    async def aclose(self, timeout: float = None) -> None:
+        """대기 중인 메시지를 모두 저장하고 백그라운드 작업 종료 (실패하면 timeout초 동안 재시도)"""
+        timeout = settings.MESSAGE_WRITE_BEHIND_SHUTDOWN_SECONDS if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while self._pending and not await self.flush():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(max(self._retry_at - time.monotonic(), 0), remaining))
+        if self._pending:
+            logger.error(f"종료 시 저장하지 못한 메시지 {len(self._pending)}건이 있습니다.")
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+        self._worker = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_messages": self.flushed_messages,
+            "avg_batch_size": self.flushed_messages / self.flushes if self.flushes else 0.0,
+            "failures": self.failures,
+            "consecutive_failures": self._consecutive_failures,
+            "backpressure_waits": self.backpressure_waits,
+        }
+
+
+# 싱글톤 인스턴스
+message_persister = MessagePersister()
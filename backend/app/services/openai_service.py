@@ -1,10 +1,23 @@
-from typing import AsyncIterator, List, Optional
+from typing import AsyncIterator, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from app.core.config import settings
 from app.constants.models import DEFAULT_MODEL, is_valid_model, AVAILABLE_MODELS
 from app.services.search_service import search_service
+from app.services.search_context import build_search_messages
+from app.services.llm_client_registry import LLMClientRegistry
+from app.services.agent_executor_cache import AgentExecutorCache
+from app.services.response_cache import ResponseCache
+from app.services.semantic_cache import SemanticCache
+from app.services.single_flight import SingleFlight
+from app.services.context_manager import context_window_manager, count_tokens, count_message_tokens
+from app.services.rate_limiter import RateLimitScheduler
+from app.services.hedging import RequestHedger
+from app.services.resilience import UpstreamResilience
+from app.core.exceptions import RateLimitExceededError, CircuitOpenError
+from app.core.metrics import observe_llm_stream, record_tokens
 import json
 
 # Langchain 0.3.0에서 Agent import
@@ -20,6 +33,27 @@ except ImportError:
         create_openai_tools_agent = None
         AgentExecutor = None
 
+# 검색 모드 Agent 프롬프트 (모든 실행기가 공유)
+AGENT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """당신은 도움이 되는 AI 어시스턴트입니다. 
+사용자의 질문에 답변할 때, 최신 정보나 실시간 데이터가 필요한 경우 검색 툴을 사용하세요.
+검색 결과를 바탕으로 정확하고 유용한 답변을 제공하세요."""),
+    MessagesPlaceholder(variable_name="chat_history"),
+    ("human", "{input}"),
+    MessagesPlaceholder(variable_name="agent_scratchpad"),
+])
+
+
+@dataclass
+class StreamEvent:
+    """스트리밍 중 텍스트가 아닌 진행 상황 이벤트 (예: 검색 툴 실행)"""
+    type: str
+    data: dict = field(default_factory=dict)
+    
+    def to_payload(self) -> dict:
+        """SSE 전송용 딕셔너리"""
+        return {"event": self.type, **self.data}
+
 
 class OpenAIService:
     """Langchain을 사용한 OpenAI 서비스"""
@@ -28,6 +62,23 @@ class OpenAIService:
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY가 설정되지 않았습니다.")
         self.api_key = settings.OPENAI_API_KEY
+        self.client_registry = LLMClientRegistry()
+        self.agent_executors = AgentExecutorCache()
+        self.response_cache = ResponseCache()
+        self.semantic_cache = SemanticCache()
+        self.single_flight = SingleFlight()
+        self.rate_limiter = RateLimitScheduler()
+        self.hedger = RequestHedger()
+        self.resilience = UpstreamResilience()
+    
+    def _resolve_model(self, model: Optional[str]) -> str:
+        """모델이 제공되지 않으면 기본 모델 사용, 제공되면 검증"""
+        if model is None:
+            model = DEFAULT_MODEL
+        
+        if not is_valid_model(model):
+            raise ValueError(f"지원하지 않는 모델입니다: {model}. 사용 가능한 모델: {', '.join(AVAILABLE_MODELS)}")
+        return model
     
     def _create_llm(
         self,
@@ -36,14 +87,8 @@ class OpenAIService:
         max_tokens: int = 1000,
         streaming: bool = False
     ) -> ChatOpenAI:
-        """Langchain ChatOpenAI 인스턴스 생성"""
-        # 모델이 제공되지 않으면 기본 모델 사용
-        if model is None:
-            model = DEFAULT_MODEL
-        
-        # 모델 검증
-        if not is_valid_model(model):
-            raise ValueError(f"지원하지 않는 모델입니다: {model}. 사용 가능한 모델: {', '.join(AVAILABLE_MODELS)}")
+        """Langchain ChatOpenAI 인스턴스 반환 (레지스트리에서 재사용)"""
+        model = self._resolve_model(model)
         
         # o1, o3 시리즈는 max_completion_tokens 사용, 다른 모델은 max_tokens 사용
         # Reasoning 모델(o1, o3)은 temperature를 지원하지 않음
@@ -53,7 +98,11 @@ class OpenAIService:
             "model": model,
             "streaming": streaming,
             "openai_api_key": self.api_key,
+            # 모든 인스턴스가 하나의 커넥션 풀을 공유
+            "http_async_client": self.client_registry.get_http_async_client(),
         }
+        if settings.OPENAI_BASE_URL:
+            llm_kwargs["openai_api_base"] = settings.OPENAI_BASE_URL
         
         # Reasoning 모델은 temperature를 지원하지 않음
         if not is_reasoning_model:
@@ -65,7 +114,130 @@ class OpenAIService:
         else:
             llm_kwargs["max_tokens"] = max_tokens
         
-        return ChatOpenAI(**llm_kwargs)
+        # (모델, 스트리밍 여부, 파라미터 형태)가 같으면 기존 인스턴스 재사용
+        key = (
+            model,
+            streaming,
+            llm_kwargs.get("temperature"),
+            "max_completion_tokens" if is_reasoning_model else "max_tokens",
+            max_tokens,
+        )
+        return self.client_registry.get_or_create(key, lambda: ChatOpenAI(**llm_kwargs))
+    
+    def get_client_stats(self) -> dict:
+        """LLM 클라이언트 레지스트리 및 커넥션 풀 통계"""
+        return {**self.client_registry.stats(), "agent_executors": self.agent_executors.stats()}
+    
+    def get_cache_stats(self) -> dict:
+        """응답 캐시, 유사 프롬프트 캐시, 동시 요청 병합 통계"""
+        return {
+            "response": self.response_cache.stats(),
+            "semantic": self.semantic_cache.stats(),
+            "single_flight": self.single_flight.stats(),
+        }
+    
+    def _get_cache_key(
+        self,
+        messages: List[dict],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        use_cache: bool
+    ) -> Optional[str]:
+        """응답 캐시 적용 대상이면 캐시 키 반환 (temperature 0 이거나 명시적으로 요청한 경우)"""
+        if not self.response_cache.enabled:
+            return None
+        if not (use_cache or temperature == 0):
+            return None
+        return self.response_cache.make_key(messages, model, temperature, max_tokens)
+    
+    def _lookup_cache(
+        self,
+        messages: List[dict],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        use_cache: bool,
+        use_semantic_cache: bool
+    ) -> Tuple[Optional[dict], Optional[str], Optional[str]]:
+        """완전 일치 캐시 → 유사 프롬프트 캐시 순으로 조회
+
+        Returns:
+            (캐시된 응답, 완전 일치 캐시 키, 유사 캐시 키)
+        """
+        cache_key = self._get_cache_key(messages, model, temperature, max_tokens, use_cache)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return self._as_cache_hit(cached), cache_key, None
+        
+        semantic_key = None
+        if use_semantic_cache and self.semantic_cache.enabled:
+            semantic_key = self.semantic_cache.key_for(messages)
+            context, text = semantic_key
+            cached = self.semantic_cache.get(text, model, temperature, max_tokens, context=context)
+            if cached is not None:
+                return self._as_cache_hit(cached), cache_key, semantic_key
+        
+        return None, cache_key, semantic_key
+    
+    @staticmethod
+    def _as_cache_hit(cached: dict) -> dict:
+        """캐시 적중 응답 (이번 요청은 토큰을 쓰지 않았으므로 사용량은 0으로, cached로 표시)"""
+        usage = cached.get("usage")
+        if usage:
+            usage = {**dict.fromkeys(usage, 0), "cached": True}
+        return {**cached, "usage": usage}
+    
+    def _store_cache(
+        self,
+        result: dict,
+        cache_key: Optional[str],
+        semantic_key: Optional[Tuple[int, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> None:
+        """조회 시 사용한 캐시에 응답 저장"""
+        if cache_key:
+            self.response_cache.set(cache_key, result)
+        if semantic_key and semantic_key[1]:
+            context, text = semantic_key
+            self.semantic_cache.set(text, model, temperature, max_tokens, result, context=context)
+    
+    async def _replay_cached_response(self, text: str) -> AsyncIterator[str]:
+        """캐시된 응답을 스트리밍 청크로 재생"""
+        chunk_size = settings.RESPONSE_CACHE_REPLAY_CHUNK_SIZE
+        for i in range(0, len(text), chunk_size):
+            yield text[i:i + chunk_size]
+    
+    async def _stream_and_cache(
+        self,
+        stream: AsyncIterator[str],
+        cache_key: Optional[str],
+        semantic_key: Optional[Tuple[int, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> AsyncIterator[str]:
+        """스트리밍 응답을 그대로 전달하고, 끝까지 수신되면 캐시에 저장"""
+        parts = []
+        async for chunk in stream:
+            parts.append(chunk)
+            yield chunk
+        
+        self._store_cache(
+            {"response": "".join(parts), "model": model, "usage": None},
+            cache_key,
+            semantic_key,
+            model,
+            temperature,
+            max_tokens
+        )
+    
+    async def aclose(self) -> None:
+        """공유 HTTP 커넥션 풀 정리"""
+        await self.client_registry.aclose()
     
     def _convert_messages(self, messages: List[dict]) -> List[BaseMessage]:
         """메시지 딕셔너리를 Langchain 메시지 객체로 변환"""
@@ -83,14 +255,93 @@ class OpenAIService:
         
         return langchain_messages
     
-    async def get_completion(
+    def _fit_context(
         self,
-        message: str,
-        model: str = None,
-        temperature: float = 0.7,
-        max_tokens: int = 1000
+        messages: List[dict],
+        model: str,
+        max_tokens: int
+    ) -> Tuple[List[dict], Optional[dict]]:
+        """모델 컨텍스트 윈도우 예산에 맞게 메시지 목록 정리"""
+        if not settings.CONTEXT_WINDOW_ENABLED:
+            return messages, None
+        return context_window_manager.fit(messages, model, max_tokens)
+    
+    def _extract_usage(self, response) -> Optional[dict]:
+        """LLM 응답에서 토큰 사용량 추출"""
+        if not hasattr(response, "response_metadata"):
+            return None
+        metadata = response.response_metadata
+        if isinstance(metadata, dict):
+            token_usage = metadata.get("token_usage") or {}
+        else:
+            token_usage = getattr(metadata, "token_usage", {}) or {}
+        return {
+            "prompt_tokens": token_usage.get("prompt_tokens", 0),
+            "completion_tokens": token_usage.get("completion_tokens", 0),
+            "total_tokens": token_usage.get("total_tokens", 0),
+        }
+    
+    def _estimate_request_tokens(self, llm_input, model: str, max_tokens: int) -> int:
+        """요청 한도 계산용 토큰 추정치 (프롬프트 토큰 + max_tokens)"""
+        if isinstance(llm_input, str):
+            prompt_tokens = count_message_tokens({"content": llm_input}, model)
+        else:
+            prompt_tokens = sum(
+                count_message_tokens({"content": msg.content}, model)
+                for msg in llm_input
+                if isinstance(msg.content, str)
+            )
+        return prompt_tokens + (max_tokens or 0)
+    
+    async def _acquire_rate_limit(
+        self,
+        llm_input,
+        model: str,
+        max_tokens: int,
+        user_id: Optional[int]
+    ) -> int:
+        """모델 요청 한도 안에서 실행될 때까지 대기 후 예약한 토큰 수 반환"""
+        if not settings.RATE_LIMIT_ENABLED:
+            return 0
+        tokens = self._estimate_request_tokens(llm_input, model, max_tokens)
+        return await self.rate_limiter.acquire(model, tokens, user_id)
+    
+    def get_rate_limit_stats(self) -> dict:
+        """모델별 요청 한도 대기열 통계"""
+        return self.rate_limiter.stats()
+    
+    def _hedge_fallback(self, model: str) -> Optional[str]:
+        """헤지 요청에 사용할 대체 모델 (설정되지 않았으면 None)"""
+        if not settings.HEDGE_ENABLED:
+            return None
+        fallback = settings.HEDGE_FALLBACK_MODELS.get(model)
+        if fallback == model or not fallback or not is_valid_model(fallback):
+            return None
+        return fallback
+    
+    def _messages_for_model(self, messages: List[dict], model: str, target_model: str, max_tokens: int) -> List[dict]:
+        """대체 모델의 컨텍스트 윈도우에 맞춘 메시지 목록"""
+        if target_model == model:
+            return messages
+        return self._fit_context(messages, target_model, max_tokens)[0]
+    
+    def get_hedge_stats(self) -> dict:
+        """헤지 요청 통계"""
+        return self.hedger.stats()
+    
+    def get_breaker_stats(self) -> dict:
+        """모델별 서킷 브레이커 상태와 재시도 횟수"""
+        return self.resilience.stats()
+    
+    async def _invoke_llm(
+        self,
+        llm_input,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        user_id: Optional[int] = None
     ) -> dict:
-        """단일 프롬프트에 대한 완성 응답 반환"""
+        """LLM 단일 호출"""
         llm = self._create_llm(
             model=model,
             temperature=temperature,
@@ -98,20 +349,111 @@ class OpenAIService:
             streaming=False
         )
         
-        try:
-            response = await llm.ainvoke(message)
-            
-            return {
-                "response": response.content,
-                "model": model,
-                "usage": {
-                    "prompt_tokens": getattr(response.response_metadata, "token_usage", {}).get("prompt_tokens", 0),
-                    "completion_tokens": getattr(response.response_metadata, "token_usage", {}).get("completion_tokens", 0),
-                    "total_tokens": getattr(response.response_metadata, "token_usage", {}).get("total_tokens", 0),
-                } if hasattr(response, "response_metadata") else None
-            }
-        except Exception as e:
-            raise Exception(f"OpenAI API 호출 중 오류 발생: {str(e)}")
+        reserved = 0
+        
+        async def attempt():
+            nonlocal reserved
+            # 재시도도 실제 업스트림 요청이므로 매번 요청 한도를 확보
+            reserved = await self._acquire_rate_limit(llm_input, model, max_tokens, user_id)
+            return await llm.ainvoke(llm_input)
+        
+        response = await self.resilience.call(model, attempt)
+        
+        usage = self._extract_usage(response)
+        if usage:
+            record_tokens(model, usage["prompt_tokens"], usage["completion_tokens"])
+        if reserved and usage and isinstance(usage["total_tokens"], int) and usage["total_tokens"]:
+            self.rate_limiter.release(model, reserved, usage["total_tokens"])
+        
+        return {
+            "response": response.content,
+            "model": model,
+            "usage": usage
+        }
+    
+    def _single_flight_key(
+        self,
+        kind: str,
+        messages: List[dict],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """동시 요청 병합용 키 (스트리밍/일반 호출은 별도로 병합)"""
+        return f"{kind}:{self.response_cache.make_key(messages, model, temperature, max_tokens)}"
+    
+    async def _invoke_coalesced(
+        self,
+        messages: List[dict],
+        llm_input,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        user_id: Optional[int] = None
+    ) -> dict:
+        """동일한 요청이 진행 중이면 그 결과를 공유하는 LLM 호출"""
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await self._invoke_llm(llm_input, model, temperature, max_tokens, user_id)
+        
+        # 요청 한도는 실제 업스트림 호출을 시작하는 요청만 차감
+        key = self._single_flight_key("invoke", messages, model, temperature, max_tokens)
+        result = await self.single_flight.do(
+            key,
+            lambda: self._invoke_llm(llm_input, model, temperature, max_tokens, user_id)
+        )
+        # 호출자별로 결과를 수정할 수 있도록 복사본 반환
+        return dict(result)
+    
+    def _stream_coalesced(
+        self,
+        messages: List[dict],
+        llm_input,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        user_id: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """동일한 스트리밍 요청이 진행 중이면 하나의 업스트림 스트림을 함께 구독"""
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return self._stream_llm(llm_input, model, temperature, max_tokens, user_id)
+        
+        key = self._single_flight_key("stream", messages, model, temperature, max_tokens)
+        return self.single_flight.stream(
+            key,
+            lambda: self._stream_llm(llm_input, model, temperature, max_tokens, user_id)
+        )
+    
+    async def get_completion(
+        self,
+        message: str,
+        model: str = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        use_cache: bool = False,
+        use_semantic_cache: bool = False,
+        user_id: Optional[int] = None
+    ) -> dict:
+        """단일 프롬프트에 대한 완성 응답 반환"""
+        model = self._resolve_model(model)
+        
+        cached, cache_key, semantic_key = self._lookup_cache(
+            [{"role": "user", "content": message}],
+            model, temperature, max_tokens, use_cache, use_semantic_cache
+        )
+        if cached is not None:
+            return cached
+        
+        result = await self._invoke_coalesced(
+            [{"role": "user", "content": message}],
+            message,
+            model,
+            temperature,
+            max_tokens,
+            user_id
+        )
+        
+        self._store_cache(result, cache_key, semantic_key, model, temperature, max_tokens)
+        return result
     
     async def get_chat_completion(
         self,
@@ -119,49 +461,64 @@ class OpenAIService:
         model: str = None,
         temperature: float = 0.7,
         max_tokens: int = 1000,
-        use_search: bool = False
+        use_search: bool = False,
+        use_cache: bool = False,
+        use_semantic_cache: bool = False,
+        user_id: Optional[int] = None
     ) -> dict:
         """대화 히스토리를 포함한 채팅 완성 응답 반환"""
+        model = self._resolve_model(model)
+        
+        # 컨텍스트 윈도우에 맞게 오래된 메시지 제외
+        messages, context_stats = self._fit_context(messages, model, max_tokens)
+        
         # 검색 기능이 활성화되어 있고, 검색 툴이 사용 가능한 경우 Agent 사용
+        # (파이프라인 모드에서는 미리 시작한 검색 결과를 포함하여 바로 답변)
         if use_search and search_service.is_enabled:
-            return await self._get_chat_completion_with_agent(
+            search_completion = (
+                self._get_chat_completion_with_manual_search
+                if settings.SEARCH_PIPELINED else self._get_chat_completion_with_agent
+            )
+            result = await search_completion(
                 messages=messages,
                 model=model,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                user_id=user_id
             )
+        else:
+            # 기본 채팅 완성 (검색 없음)
+            result, cache_key, semantic_key = self._lookup_cache(
+                messages, model, temperature, max_tokens, use_cache, use_semantic_cache
+            )
+            if result is None:
+                async def invoke(target_model: str) -> dict:
+                    target_messages = self._messages_for_model(messages, model, target_model, max_tokens)
+                    return await self._invoke_coalesced(
+                        target_messages,
+                        self._convert_messages(target_messages),
+                        target_model,
+                        temperature,
+                        max_tokens,
+                        user_id
+                    )
+                
+                # 주 모델이 늦으면 대체 모델로도 요청 (result["model"]에 응답한 모델 기록)
+                result, answered_by = await self.hedger.call(model, self._hedge_fallback(model), invoke)
+                if answered_by == model:
+                    self._store_cache(result, cache_key, semantic_key, model, temperature, max_tokens)
         
-        # 기본 채팅 완성 (검색 없음)
-        llm = self._create_llm(
-            model=model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            streaming=False
-        )
-        
-        langchain_messages = self._convert_messages(messages)
-        
-        try:
-            response = await llm.ainvoke(langchain_messages)
-            
-            return {
-                "response": response.content,
-                "model": model,
-                "usage": {
-                    "prompt_tokens": getattr(response.response_metadata, "token_usage", {}).get("prompt_tokens", 0),
-                    "completion_tokens": getattr(response.response_metadata, "token_usage", {}).get("completion_tokens", 0),
-                    "total_tokens": getattr(response.response_metadata, "token_usage", {}).get("total_tokens", 0),
-                } if hasattr(response, "response_metadata") else None
-            }
-        except Exception as e:
-            raise Exception(f"OpenAI API 호출 중 오류 발생: {str(e)}")
+        if context_stats is not None:
+            result["context"] = context_stats
+        return result
     
     async def _get_chat_completion_with_agent(
         self,
         messages: List[dict],
         model: str = None,
         temperature: float = 0.7,
-        max_tokens: int = 1000
+        max_tokens: int = 1000,
+        user_id: Optional[int] = None
     ) -> dict:
         """Agent를 사용한 채팅 완성 (검색 툴 포함)"""
         # Agent 기능이 사용 불가능한 경우
@@ -171,16 +528,10 @@ class OpenAIService:
                 messages=messages,
                 model=model,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                user_id=user_id
             )
         
-        llm = self._create_llm(
-            model=model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            streaming=False
-        )
-        
         # 검색 툴 가져오기
         tools = search_service.get_tools()
         if not tools:
@@ -190,58 +541,139 @@ class OpenAIService:
                 model=model,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                use_search=False
+                use_search=False,
+                user_id=user_id
             )
         
-        # Agent 프롬프트 생성
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """당신은 도움이 되는 AI 어시스턴트입니다. 
-사용자의 질문에 답변할 때, 최신 정보나 실시간 데이터가 필요한 경우 검색 툴을 사용하세요.
-검색 결과를 바탕으로 정확하고 유용한 답변을 제공하세요."""),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ])
+        agent_executor = self._build_agent_executor(model, temperature, max_tokens, tools, streaming=False)
+        agent_input = self._prepare_agent_input(messages)
         
-        # Agent 생성
-        agent = create_openai_tools_agent(llm, tools, prompt)
-        agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=False)
+        async def attempt():
+            # Agent는 내부에서 여러 번 호출하지만 대화 전체 기준으로 한 번 예산을 확보
+            await self._acquire_rate_limit(self._convert_messages(messages), model, max_tokens, user_id)
+            return await agent_executor.ainvoke(agent_input)
         
-        # 마지막 사용자 메시지 추출
-        last_user_message = None
-        chat_history = []
-        for msg in messages:
-            if msg.get("role") == "user":
-                last_user_message = msg.get("content", "")
-            elif msg.get("role") == "assistant":
-                chat_history.append(("assistant", msg.get("content", "")))
-            elif msg.get("role") == "system":
-                chat_history.append(("system", msg.get("content", "")))
+        # Agent 실행
+        result = await self.resilience.call(model, attempt, action="Agent 실행")
         
-        if not last_user_message:
+        return {
+            "response": result.get("output", ""),
+            "model": model,
+            "usage": None  # Agent 사용 시 토큰 사용량은 복잡하므로 None
+        }
+    
+    def _build_agent_executor(
+        self,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        tools: List,
+        streaming: bool
+    ):
+        """검색 툴을 사용하는 Agent 실행기 반환 (같은 구성이면 캐시된 실행기 재사용)"""
+        key = (model, streaming, temperature, max_tokens, tuple(tool.name for tool in tools))
+        
+        def create_executor():
+            llm = self._create_llm(
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                streaming=streaming
+            )
+            agent = create_openai_tools_agent(llm, tools, AGENT_PROMPT)
+            return AgentExecutor(agent=agent, tools=tools, verbose=False)
+        
+        return self.agent_executors.get_or_create(key, create_executor)
+    
+    def _prepare_agent_input(self, messages: List[dict]) -> dict:
+        """마지막 사용자 메시지를 input으로, 그 이전 메시지를 chat_history로 분리"""
+        last_user_index = next(
+            (i for i in range(len(messages) - 1, -1, -1) if messages[i].get("role") == "user"),
+            None
+        )
+        if last_user_index is None or not messages[last_user_index].get("content"):
             raise ValueError("사용자 메시지를 찾을 수 없습니다.")
         
-        try:
-            # Agent 실행
-            result = await agent_executor.ainvoke({
-                "input": last_user_message,
-                "chat_history": chat_history
-            })
-            
-            return {
-                "response": result.get("output", ""),
-                "model": model,
-                "usage": None  # Agent 사용 시 토큰 사용량은 복잡하므로 None
-            }
-        except Exception as e:
-            raise Exception(f"Agent 실행 중 오류 발생: {str(e)}")
+        role_map = {"user": "human", "assistant": "assistant", "system": "system"}
+        chat_history = [
+            (role_map[msg.get("role")], msg.get("content", ""))
+            for msg in messages[:last_user_index]
+            if msg.get("role") in role_map
+        ]
+        return {
+            "input": messages[last_user_index].get("content", ""),
+            "chat_history": chat_history
+        }
+    
+    async def _stream_chat_completion_with_agent(
+        self,
+        messages: List[dict],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        user_id: Optional[int] = None
+    ) -> AsyncIterator[Union[str, StreamEvent]]:
+        """Agent를 사용한 채팅 스트리밍 (툴 진행 이벤트 + 최종 답변 토큰)"""
+        tools = search_service.get_tools()
+        if create_openai_tools_agent is None or AgentExecutor is None or not tools:
+            # Agent를 사용할 수 없으면 검색 결과를 포함한 일반 스트리밍으로 처리
+            async for chunk in self._stream_chat_completion_with_manual_search(
+                messages, model, temperature, max_tokens, user_id
+            ):
+                yield chunk
+            return
+        
+        agent_executor = self._build_agent_executor(model, temperature, max_tokens, tools, streaming=True)
+        agent_input = self._prepare_agent_input(messages)
+        
+        async def attempt_stream() -> AsyncIterator[Union[str, StreamEvent]]:
+            await self._acquire_rate_limit(self._convert_messages(messages), model, max_tokens, user_id)
+            async for event in agent_executor.astream_events(agent_input, version="v2"):
+                kind = event.get("event")
+                if kind == "on_chat_model_stream":
+                    chunk = event.get("data", {}).get("chunk")
+                    content = getattr(chunk, "content", None)
+                    # 툴 호출을 결정하는 단계의 청크는 content가 비어 있음
+                    if content and isinstance(content, str):
+                        yield content
+                elif kind == "on_tool_start":
+                    yield StreamEvent("tool", {
+                        "tool": event.get("name"),
+                        "status": "running",
+                        "message": "웹 검색 중..."
+                    })
+                elif kind == "on_tool_end":
+                    yield StreamEvent("tool", {
+                        "tool": event.get("name"),
+                        "status": "done",
+                        "message": "검색 완료"
+                    })
+        
+        # 툴 이벤트도 청크로 간주하여 첫 이벤트 이후에는 재시도하지 않음
+        async for chunk in observe_llm_stream(
+            model, self.resilience.stream(model, attempt_stream, action="Agent 실행")
+        ):
+            yield chunk
+    
+    def prefetch_search(self, query: Optional[str]) -> bool:
+        """파이프라인 모드이면 답변에 사용할 검색을 미리 시작 (시작했으면 True)"""
+        if not settings.SEARCH_PIPELINED or not query or not search_service.is_enabled:
+            return False
+        return search_service.prefetch(query) is not None
+    
+    async def _search(self, query: str) -> List[dict]:
+        """답변에 포함할 검색 결과 (파이프라인 모드에서는 검색 예산을 넘기면 검색 결과 없이 진행)"""
+        if settings.SEARCH_PIPELINED:
+            return await search_service.search_within_budget(query, settings.SEARCH_BUDGET_SECONDS)
+        return await search_service.search(query)
     
     async def _get_chat_completion_with_manual_search(
         self,
         messages: List[dict],
         model: str = None,
         temperature: float = 0.7,
-        max_tokens: int = 1000
+        max_tokens: int = 1000,
+        user_id: Optional[int] = None
     ) -> dict:
         """수동 검색을 포함한 채팅 완성 (Agent가 없는 경우)"""
         # 마지막 사용자 메시지 추출
@@ -255,32 +687,10 @@ class OpenAIService:
             raise ValueError("사용자 메시지를 찾을 수 없습니다.")
         
         # 검색 수행 (간단한 키워드 추출)
-        search_results = await search_service.search(last_user_message)
-        
-        # 검색 결과를 시스템 메시지에 추가
-        search_context = ""
-        if search_results:
-            search_context = "\n\n[검색 결과]\n"
-            for i, result in enumerate(search_results[:3], 1):  # 상위 3개만 사용
-                content = result.get("content", "") or result.get("snippet", "")
-                url = result.get("url", "")
-                search_context += f"{i}. {content}\n출처: {url}\n\n"
-        
-        # 메시지에 검색 결과 추가
-        enhanced_messages = messages.copy()
-        if search_context:
-            # 시스템 메시지가 있으면 업데이트, 없으면 추가
-            system_msg_index = next(
-                (i for i, msg in enumerate(enhanced_messages) if msg.get("role") == "system"),
-                None
-            )
-            if system_msg_index is not None:
-                enhanced_messages[system_msg_index]["content"] += search_context
-            else:
-                enhanced_messages.insert(0, {
-                    "role": "system",
-                    "content": f"다음 검색 결과를 참고하여 답변하세요.{search_context}"
-                })
+        search_results = await self._search(last_user_message)
+        enhanced_messages = build_search_messages(
+            messages, search_results, last_user_message, self._resolve_model(model)
+        )
         
         # 일반 채팅 완성으로 처리
         return await self.get_chat_completion(
@@ -288,17 +698,49 @@ class OpenAIService:
             model=model,
             temperature=temperature,
             max_tokens=max_tokens,
-            use_search=False
+            use_search=False,
+            user_id=user_id
         )
     
-    async def stream_completion(
+    async def _stream_chat_completion_with_manual_search(
         self,
-        message: str,
-        model: str = None,
-        temperature: float = 0.7,
-        max_tokens: int = 1000
+        messages: List[dict],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        user_id: Optional[int] = None
+    ) -> AsyncIterator[Union[str, StreamEvent]]:
+        """수동 검색 후 검색 결과를 포함하여 스트리밍 (Agent가 없는 경우)"""
+        last_user_message = next(
+            (msg.get("content", "") for msg in reversed(messages) if msg.get("role") == "user"),
+            None
+        )
+        if not last_user_message:
+            raise ValueError("사용자 메시지를 찾을 수 없습니다.")
+        
+        yield StreamEvent("tool", {"tool": "search", "status": "running", "message": "웹 검색 중..."})
+        search_results = await self._search(last_user_message)
+        yield StreamEvent("tool", {"tool": "search", "status": "done", "message": "검색 완료"})
+        
+        enhanced_messages = build_search_messages(
+            messages, search_results, last_user_message, self._resolve_model(model)
+        )
+        # 검색 결과가 시스템 메시지에 더해졌으므로 컨텍스트 윈도우 예산에 다시 맞춤
+        enhanced_messages, _ = self._fit_context(enhanced_messages, model, max_tokens)
+        async for chunk in self._stream_llm(
+            self._convert_messages(enhanced_messages), model, temperature, max_tokens, user_id
+        ):
+            yield chunk
+    
+    async def _stream_llm(
+        self,
+        llm_input,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        user_id: Optional[int] = None
     ) -> AsyncIterator[str]:
-        """단일 프롬프트에 대한 스트리밍 응답 반환"""
+        """LLM 스트리밍 호출 (텍스트 청크만 전달)"""
         llm = self._create_llm(
             model=model,
             temperature=temperature,
@@ -306,12 +748,69 @@ class OpenAIService:
             streaming=True
         )
         
-        try:
-            async for chunk in llm.astream(message):
+        reserved = 0
+        completion_parts = []
+        
+        async def attempt_stream() -> AsyncIterator[str]:
+            nonlocal reserved
+            reserved = await self._acquire_rate_limit(llm_input, model, max_tokens, user_id)
+            async for chunk in llm.astream(llm_input):
                 if chunk.content:
+                    completion_parts.append(chunk.content)
                     yield chunk.content
-        except Exception as e:
-            raise Exception(f"OpenAI API 스트리밍 중 오류 발생: {str(e)}")
+        
+        # 첫 청크 전에 실패한 경우에만 재시도
+        try:
+            async for chunk in observe_llm_stream(model, self.resilience.stream(model, attempt_stream)):
+                yield chunk
+        finally:
+            # 스트리밍은 사용량이 오지 않으므로 프롬프트 추정치 + 생성된 텍스트로 계산
+            completion_tokens = count_tokens("".join(completion_parts), model)
+            if completion_parts:
+                record_tokens(model, self._estimate_request_tokens(llm_input, model, 0), completion_tokens)
+        
+        if reserved:
+            used = reserved - (max_tokens or 0) + completion_tokens
+            self.rate_limiter.release(model, reserved, used)
+    
+    async def stream_completion(
+        self,
+        message: str,
+        model: str = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        use_cache: bool = False,
+        use_semantic_cache: bool = False,
+        user_id: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """단일 프롬프트에 대한 스트리밍 응답 반환"""
+        model = self._resolve_model(model)
+        
+        cached, cache_key, semantic_key = self._lookup_cache(
+            [{"role": "user", "content": message}],
+            model, temperature, max_tokens, use_cache, use_semantic_cache
+        )
+        if cached is not None:
+            stream = self._replay_cached_response(cached.get("response", ""))
+        else:
+            stream = self._stream_and_cache(
+                self._stream_coalesced(
+                    [{"role": "user", "content": message}],
+                    message,
+                    model,
+                    temperature,
+                    max_tokens,
+                    user_id
+                ),
+                cache_key,
+                semantic_key,
+                model,
+                temperature,
+                max_tokens
+            )
+        
+        async for chunk in stream:
+            yield chunk
     
     async def stream_chat_completion(
         self,
@@ -319,46 +818,74 @@ class OpenAIService:
         model: str = None,
         temperature: float = 0.7,
         max_tokens: int = 1000,
-        use_search: bool = False
-    ) -> AsyncIterator[str]:
-        """대화 히스토리를 포함한 채팅 스트리밍 응답 반환"""
+        use_search: bool = False,
+        use_cache: bool = False,
+        use_semantic_cache: bool = False,
+        user_id: Optional[int] = None
+    ) -> AsyncIterator[Union[str, StreamEvent]]:
+        """대화 히스토리를 포함한 채팅 스트리밍 응답 반환
+
+        텍스트 청크(str) 외에 검색 진행 상황 등을 알리는 StreamEvent가 섞여 전달될 수 있습니다.
+        """
+        model = self._resolve_model(model)
+        messages, _ = self._fit_context(messages, model, max_tokens)
+        
         # 검색 기능이 활성화되어 있고, 검색 툴이 사용 가능한 경우
-        # Agent는 스트리밍을 완전히 지원하지 않으므로, 검색 후 일반 스트리밍으로 처리
+        # Agent 이벤트를 스트리밍: 검색 진행 이벤트 후 최종 답변 토큰을 도착하는 대로 전달
+        # (파이프라인 모드에서는 미리 시작한 검색 결과를 포함하여 바로 스트리밍)
         if use_search and search_service.is_enabled:
-            # Agent로 검색 수행 후 결과를 포함하여 스트리밍
+            text_started = False
+            search_stream = (
+                self._stream_chat_completion_with_manual_search
+                if settings.SEARCH_PIPELINED else self._stream_chat_completion_with_agent
+            )
             try:
-                # 먼저 Agent로 검색 포함 응답 생성
-                agent_result = await self._get_chat_completion_with_agent(
-                    messages=messages,
-                    model=model,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-                # 결과를 스트리밍 형태로 반환
-                response_text = agent_result.get("response", "")
-                for char in response_text:
-                    yield char
+                async for chunk in search_stream(
+                    messages, model, temperature, max_tokens, user_id
+                ):
+                    if isinstance(chunk, str):
+                        text_started = True
+                    yield chunk
                 return
-            except Exception as e:
-                # Agent 실패 시 일반 스트리밍으로 폴백
-                pass
+            except (RateLimitExceededError, CircuitOpenError):
+                raise
+            except Exception:
+                # 답변이 시작되기 전에 Agent가 실패하면 일반 스트리밍으로 폴백
+                if text_started:
+                    raise
         
-        # 기본 스트리밍 (검색 없음)
-        llm = self._create_llm(
-            model=model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            streaming=True
+        # 기본 스트리밍 (검색 없음) - 캐시 히트 시 캐시된 응답을 청크로 재생
+        cached, cache_key, semantic_key = self._lookup_cache(
+            messages, model, temperature, max_tokens, use_cache, use_semantic_cache
         )
+        if cached is not None:
+            stream = self._replay_cached_response(cached.get("response", ""))
+        else:
+            def open_stream(target_model: str) -> AsyncIterator[str]:
+                target_messages = self._messages_for_model(messages, model, target_model, max_tokens)
+                return self._stream_coalesced(
+                    target_messages,
+                    self._convert_messages(target_messages),
+                    target_model,
+                    temperature,
+                    max_tokens,
+                    user_id
+                )
+            
+            # 주 모델의 첫 청크가 늦으면 대체 모델로도 요청하고 먼저 도착한 스트림 사용
+            answered_by, upstream = await self.hedger.start_stream(
+                model, self._hedge_fallback(model), open_stream
+            )
+            if answered_by == model:
+                stream = self._stream_and_cache(
+                    upstream, cache_key, semantic_key, model, temperature, max_tokens
+                )
+            else:
+                yield StreamEvent("model", {"model": answered_by})
+                stream = upstream
         
-        langchain_messages = self._convert_messages(messages)
-        
-        try:
-            async for chunk in llm.astream(langchain_messages):
-                if chunk.content:
-                    yield chunk.content
-        except Exception as e:
-            raise Exception(f"OpenAI API 스트리밍 중 오류 발생: {str(e)}")
+        async for chunk in stream:
+            yield chunk
 
 
 # 싱글톤 인스턴스
@@ -0,0 +1,214 @@
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Hashable, Optional
+import asyncio
+import time
+from app.core.config import settings
+from app.core.exceptions import RateLimitExceededError
+from app.constants.models import get_rate_limits
+
+
+class TokenBucket:
+    """초당 일정 속도로 채워지는 토큰 버킷"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def time_until(self, amount: float) -> float:
+        """amount만큼 사용할 수 있을 때까지 남은 시간 (초)"""
+        self._refill()
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class _Waiter:
+    """대기열에 있는 요청 하나"""
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+
+class ModelRateLimiter:
+    """모델 하나의 RPM/TPM 예산과 사용자별 대기열
+
+    예산이 남아 있고 대기열이 비어 있으면 바로 통과시키고, 아니면 사용자별 대기열에 넣은 뒤
+    사용자 간 라운드 로빈으로 한 건씩 예산이 채워지는 대로 내보냅니다.
+    """
+
+    def __init__(self, model: str, rpm: int, tpm: int):
+        self.model = model
+        self.request_bucket = TokenBucket(rpm, rpm / 60)
+        self.token_bucket = TokenBucket(tpm, tpm / 60)
+        self._queues: "OrderedDict[Hashable, Deque[_Waiter]]" = OrderedDict()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _clamp(self, tokens: int) -> int:
+        # 분당 한도보다 큰 요청도 버킷이 가득 차면 실행될 수 있도록 제한
+        return max(1, min(tokens, int(self.token_bucket.capacity)))
+
+    def _wait_time(self, tokens: int) -> float:
+        return max(self.request_bucket.time_until(1), self.token_bucket.time_until(tokens))
+
+    def _consume(self, tokens: int) -> None:
+        self.request_bucket.consume(1)
+        self.token_bucket.consume(tokens)
+
+    def _record_admit(self, waited: float) -> None:
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    async def acquire(self, tokens: int, user_key: Hashable, max_wait: float) -> int:
+        """예산을 확보할 때까지 대기 후 실제로 예약한 토큰 수 반환"""
+        tokens = self._clamp(tokens)
+        if not self._queues and self._wait_time(tokens) == 0:
+            self._consume(tokens)
+            self._record_admit(0.0)
+            return tokens
+
+        waiter = _Waiter(tokens)
+        self._queues.setdefault(user_key, deque()).append(waiter)
+        self.queued += 1
+        self._ensure_dispatcher()
+        try:
+            await asyncio.wait({waiter.future}, timeout=max_wait)
+        except asyncio.CancelledError:
+            if waiter.future.done():
+                # 예산을 확보한 직후 취소된 경우 되돌려 놓음
+                self.release(tokens, 0, requests=1)
+            else:
+                self._remove(user_key, waiter)
+            raise
+
+        if not waiter.future.done():
+            self._remove(user_key, waiter)
+            self.rejected += 1
+            raise RateLimitExceededError(
+                f"모델 {self.model}의 요청 한도를 초과했습니다. 잠시 후 다시 시도해주세요. "
+                f"(대기열 {self.queue_depth}건)",
+                retry_after=self._wait_time(tokens)
+            )
+        return tokens
+
+    def release(self, reserved: int, used: int, requests: int = 0) -> None:
+        """예약한 토큰 중 사용하지 않은 만큼 반환"""
+        if reserved > used:
+            self.token_bucket.refund(reserved - used)
+        if requests:
+            self.request_bucket.refund(requests)
+
+    def _remove(self, user_key: Hashable, waiter: _Waiter) -> None:
+        queue = self._queues.get(user_key)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+        if not queue:
+            del self._queues[user_key]
+
+    def _ensure_dispatcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if (
+            self._dispatcher is None
+            or self._dispatcher.done()
+            or self._dispatcher.get_loop() is not loop
+        ):
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        """사용자 간 라운드 로빈으로 대기 중인 요청을 예산이 허용하는 대로 내보냄"""
+        while self._queues:
+            user_key, queue = next(iter(self._queues.items()))
+            waiter = queue[0]
+            wait = self._wait_time(waiter.tokens)
+            if wait > 0:
+                # 대기 중 요청이 취소될 수 있으므로 깨어난 뒤 다시 확인
+                await asyncio.sleep(wait)
+                continue
+
+            self._consume(waiter.tokens)
+            queue.popleft()
+            if queue:
+                self._queues.move_to_end(user_key)
+            else:
+                del self._queues[user_key]
+            waiter.future.set_result(None)
+            self._record_admit(time.monotonic() - waiter.enqueued_at)
+
+    def stats(self) -> dict:
+        return {
+            "rpm": int(self.request_bucket.capacity),
+            "tpm": int(self.token_bucket.capacity),
+            "available_requests": int(self.request_bucket.tokens),
+            "available_tokens": int(self.token_bucket.tokens),
+            "queue_depth": self.queue_depth,
+            "queued_users": len(self._queues),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "avg_wait_ms": self.total_wait / self.admitted * 1000 if self.admitted else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+class RateLimitScheduler:
+    """모델별 요청 한도 스케줄러"""
+
+    def __init__(self, max_wait: float = None):
+        self.max_wait = settings.RATE_LIMIT_MAX_WAIT_SECONDS if max_wait is None else max_wait
+        self._limiters: Dict[str, ModelRateLimiter] = {}
+
+    def _get_limiter(self, model: str) -> ModelRateLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            limits = settings.RATE_LIMIT_OVERRIDES.get(model) or get_rate_limits(model)
+            limiter = ModelRateLimiter(model, limits["rpm"], limits["tpm"])
+            self._limiters[model] = limiter
+        return limiter
+
+    async def acquire(self, model: str, tokens: int, user_key: Optional[Hashable] = None) -> int:
+        """모델 예산을 확보할 때까지 대기 (초과 시 RateLimitExceededError)
+
+        Returns:
+            예약한 토큰 수 (요청 완료 후 release에 전달)
+        """
+        return await self._get_limiter(model).acquire(tokens, user_key, self.max_wait)
+
+    def release(self, model: str, reserved: int, used: int) -> None:
+        """실제 사용량이 예약보다 적으면 차이만큼 예산 반환"""
+        limiter = self._limiters.get(model)
+        if limiter is not None:
+            limiter.release(reserved, used)
+
+    def stats(self) -> dict:
+        """모델별 예산, 대기열 길이, 대기 시간 통계"""
+        return {model: limiter.stats() for model, limiter in self._limiters.items()}
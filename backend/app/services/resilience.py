@@ -0,0 +1,233 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+import random
+import time
+import openai
+from app.core.config import settings
+from app.core.exceptions import (
+    LLMServiceError,
+    RateLimitExceededError,
+    UpstreamTimeoutError,
+    UpstreamUnavailableError,
+    UpstreamRequestError,
+    UpstreamAuthError,
+    CircuitOpenError,
+)
+
+T = TypeVar("T")
+
+
+def _retry_after_header(error: openai.APIStatusError) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def classify_error(error: Exception, action: str = "OpenAI API 호출") -> LLMServiceError:
+    """업스트림 예외를 재시도 가능 여부가 담긴 LLMServiceError로 변환"""
+    if isinstance(error, LLMServiceError):
+        return error
+    message = f"{action} 중 오류 발생: {str(error)}"
+
+    if isinstance(error, openai.RateLimitError):
+        # 크레딧 소진은 기다려도 풀리지 않음
+        retryable = getattr(error, "code", None) != "insufficient_quota"
+        return RateLimitExceededError(message, retry_after=_retry_after_header(error), retryable=retryable)
+    if isinstance(error, (openai.APITimeoutError, asyncio.TimeoutError)):
+        return UpstreamTimeoutError(message)
+    if isinstance(error, (openai.APIConnectionError, openai.InternalServerError)):
+        return UpstreamUnavailableError(message)
+    if isinstance(error, (openai.AuthenticationError, openai.PermissionDeniedError)):
+        return UpstreamAuthError(message)
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code in (408, 409) or error.status_code >= 500:
+            return UpstreamUnavailableError(message)
+        return UpstreamRequestError(message)
+    return LLMServiceError(message)
+
+
+class CircuitBreaker:
+    """모델 하나의 서킷 브레이커
+
+    closed: 정상 호출. 업스트림 장애(시간 초과, 연결 실패, 5xx)가 연속으로 임계값만큼 발생하면 open.
+    open: 복구 대기 시간 동안 호출하지 않고 바로 실패.
+    half_open: 대기 시간이 지나면 한 건만 시험 호출하여 성공하면 closed, 실패하면 다시 open.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, model: str, failure_threshold: int = None, recovery_seconds: float = None):
+        self.model = model
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_FAILURE_THRESHOLD
+        self.recovery_seconds = (
+            settings.CIRCUIT_RECOVERY_SECONDS if recovery_seconds is None else recovery_seconds
+        )
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_in_flight = False
+        self.rejected = 0
+        self.times_opened = 0
+
+    def before_call(self) -> None:
+        """호출 가능 여부 확인 (불가능하면 CircuitOpenError)"""
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.recovery_seconds - time.monotonic()
+            if remaining > 0:
+                self._reject(remaining)
+            self.state = self.HALF_OPEN
+        if self.probe_in_flight:
+            self._reject(self.recovery_seconds)
+        self.probe_in_flight = True
+
+    def _reject(self, retry_after: float) -> None:
+        self.rejected += 1
+        raise CircuitOpenError(
+            f"모델 {self.model}의 업스트림 장애로 일시적으로 호출을 중단했습니다. 잠시 후 다시 시도해주세요.",
+            retry_after=retry_after
+        )
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self, error: LLMServiceError) -> None:
+        self.probe_in_flight = False
+        if not isinstance(error, (UpstreamTimeoutError, UpstreamUnavailableError)):
+            # 요청 자체의 문제는 모델 상태와 무관 (시험 호출이었다면 다음 요청이 다시 시험)
+            return
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+
+    def release(self) -> None:
+        """결과 없이 끝난 호출 (취소 등) 정리"""
+        self.probe_in_flight = False
+
+    def stats(self) -> dict:
+        retry_after = None
+        if self.state == self.OPEN:
+            retry_after = max(0.0, self.opened_at + self.recovery_seconds - time.monotonic())
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after": retry_after,
+        }
+
+
+class UpstreamResilience:
+    """업스트림 호출 재시도 + 모델별 서킷 브레이커
+
+    재시도 가능한 오류만 지수 백오프(full jitter)로 재시도하고,
+    스트리밍은 첫 청크를 전달하기 전까지만 재시도합니다.
+    """
+
+    def __init__(self, max_attempts: int = None, base_delay: float = None, max_delay: float = None):
+        self.max_attempts = max_attempts or settings.RETRY_MAX_ATTEMPTS
+        self.base_delay = settings.RETRY_BASE_DELAY_SECONDS if base_delay is None else base_delay
+        self.max_delay = settings.RETRY_MAX_DELAY_SECONDS if max_delay is None else max_delay
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = CircuitBreaker(model)
+            self._breakers[model] = breaker
+        return breaker
+
+    def _backoff(self, attempt: int, error: LLMServiceError) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def _should_retry(self, attempt: int, error: LLMServiceError) -> bool:
+        return error.retryable and attempt < self.max_attempts - 1
+
+    async def call(
+        self,
+        model: str,
+        operation: Callable[[], Awaitable[T]],
+        action: str = "OpenAI API 호출"
+    ) -> T:
+        """operation을 재시도/서킷 브레이커와 함께 실행"""
+        breaker = self.breaker(model)
+        attempt = 0
+        while True:
+            breaker.before_call()
+            try:
+                result = await operation()
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                error = classify_error(e, action)
+                breaker.record_failure(error)
+                if not self._should_retry(attempt, error):
+                    if error is e:
+                        raise
+                    raise error from e
+                self.retries += 1
+                await asyncio.sleep(self._backoff(attempt, error))
+                attempt += 1
+                continue
+            breaker.record_success()
+            return result
+
+    async def stream(
+        self,
+        model: str,
+        open_stream: Callable[[], AsyncIterator[Any]],
+        action: str = "OpenAI API 스트리밍"
+    ) -> AsyncIterator[Any]:
+        """스트림을 재시도/서킷 브레이커와 함께 전달 (첫 청크 이후에는 재시도하지 않음)"""
+        breaker = self.breaker(model)
+        attempt = 0
+        while True:
+            breaker.before_call()
+            started = False
+            settled = False
+            try:
+                async for chunk in open_stream():
+                    started = True
+                    yield chunk
+            except Exception as e:
+                settled = True
+                error = classify_error(e, action)
+                breaker.record_failure(error)
+                if started or not self._should_retry(attempt, error):
+                    if error is e:
+                        raise
+                    raise error from e
+            else:
+                settled = True
+                breaker.record_success()
+                return
+            finally:
+                if not settled:
+                    # 클라이언트 연결 종료 등으로 결과 없이 끝난 경우
+                    breaker.release()
+            self.retries += 1
+            await asyncio.sleep(self._backoff(attempt, error))
+            attempt += 1
+
+    def stats(self) -> dict:
+        """모델별 서킷 브레이커 상태"""
+        return {
+            "retries": self.retries,
+            "breakers": {model: breaker.stats() for model, breaker in self._breakers.items()},
+        }
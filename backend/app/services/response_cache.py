@@ -0,0 +1,106 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import hashlib
+import json
+import time
+from app.core.config import settings
+
+
+class ResponseCache:
+    """완전 일치 응답 캐시 (LRU + TTL + 메모리 상한)"""
+
+    def __init__(
+        self,
+        max_entries: int = None,
+        ttl_seconds: float = None,
+        max_bytes: int = None,
+        enabled: bool = None,
+    ):
+        self.max_entries = settings.RESPONSE_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl_seconds = settings.RESPONSE_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_bytes = settings.RESPONSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.enabled = settings.RESPONSE_CACHE_ENABLED if enabled is None else enabled
+        # key -> (만료 시각, 크기(bytes), 값)
+        self._entries: "OrderedDict[str, Tuple[float, int, dict]]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        messages: List[dict],
+        model: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+    ) -> str:
+        """정규화된 메시지 목록과 모델 파라미터로 캐시 키 생성"""
+        normalized = [
+            [(msg.get("role") or "user").lower(), (msg.get("content") or "").strip()]
+            for msg in messages
+        ]
+        payload = json.dumps(
+            [normalized, model, temperature, max_tokens],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """캐시 조회 (만료된 항목은 제거)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(value)
+
+    def set(self, key: str, value: dict) -> None:
+        """캐시 저장 후 개수/메모리 상한을 넘으면 오래된 항목부터 제거"""
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, dict(value))
+        self.current_bytes += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes
+        ):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def clear(self) -> None:
+        """캐시 비우기"""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """캐시 통계"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
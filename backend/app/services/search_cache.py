@@ -0,0 +1,202 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """검색어 정규화 (대소문자, 공백, 문장부호 차이 무시)"""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = "".join(" " if unicodedata.category(ch).startswith("P") else ch for ch in text)
+    return " ".join(text.split())
+
+
+class SearchResultCache:
+    """웹 검색 결과 캐시
+
+    정규화한 검색어를 키로 사용하고, 최근 결과는 메모리(hot)에, 전체 결과는
+    SQLite 파일(warm)에 보관하여 재시작 후에도 재사용합니다.
+    저장 시각을 기준으로 TTL이 지나면 두 계층 모두에서 만료됩니다.
+    """
+
+    def __init__(
+        self,
+        db_path: str = None,
+        max_memory_entries: int = None,
+        max_persisted_entries: int = None,
+        ttl_seconds: float = None,
+        enabled: bool = None,
+    ):
+        self.db_path = settings.SEARCH_CACHE_DB_PATH if db_path is None else db_path
+        self.max_memory_entries = max_memory_entries or settings.SEARCH_CACHE_MAX_MEMORY_ENTRIES
+        self.max_persisted_entries = max_persisted_entries or settings.SEARCH_CACHE_MAX_PERSISTED_ENTRIES
+        self.ttl_seconds = settings.SEARCH_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.enabled = settings.SEARCH_CACHE_ENABLED if enabled is None else enabled
+        self._memory: "OrderedDict[str, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes_since_prune = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def persistent(self) -> bool:
+        """SQLite 계층 사용 여부"""
+        return self.enabled and bool(self.db_path)
+
+    @staticmethod
+    def make_key(query: str) -> str:
+        return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+    def _get_conn(self) -> Optional[sqlite3.Connection]:
+        """SQLite 연결 (최초 사용 시 생성, 경로가 비어 있으면 메모리만 사용)"""
+        if not self.db_path:
+            return None
+        if self._conn is None:
+            try:
+                directory = os.path.dirname(self.db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS search_cache ("
+                    "key TEXT PRIMARY KEY, query TEXT NOT NULL, results TEXT NOT NULL, "
+                    "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS ix_search_cache_last_access ON search_cache (last_access)"
+                )
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                logger.warning(f"검색 캐시 DB를 열 수 없어 메모리 캐시만 사용합니다: {str(e)}")
+                self.db_path = ""
+                return None
+        return self._conn
+
+    def _remember(self, key: str, expires_at: float, results: List[Dict]) -> None:
+        self._memory[key] = (expires_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_hot(self, query: str) -> Optional[List[Dict]]:
+        """메모리 계층만 조회 (디스크 I/O 없음)"""
+        if not self.enabled:
+            return None
+        key = self.make_key(query)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return entry[1]
+
+    def get(self, query: str) -> Optional[List[Dict]]:
+        """메모리 → SQLite 순으로 조회 (SQLite 히트는 메모리로 올림)"""
+        if not self.enabled:
+            return None
+        hot = self.get_hot(query)
+        if hot is not None:
+            return hot
+
+        key = self.make_key(query)
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            row = None
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        "SELECT results, expires_at FROM search_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None and row[1] > now:
+                        conn.execute("UPDATE search_cache SET last_access = ? WHERE key = ?", (now, key))
+                        conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"검색 캐시 조회 실패: {str(e)}")
+                    row = None
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return None
+            results = json.loads(row[0])
+            self._remember(key, row[1], results)
+            self.disk_hits += 1
+            return results
+
+    def set(self, query: str, results: List[Dict]) -> None:
+        """검색 결과 저장 (빈 결과는 저장하지 않음)"""
+        if not self.enabled or not results:
+            return
+        key = self.make_key(query)
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, results)
+            conn = self._get_conn()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, query, results, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, normalize_query(query), json.dumps(results, ensure_ascii=False), expires_at, now)
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= 100:
+                    self._prune(conn, now)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"검색 캐시 저장 실패: {str(e)}")
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        """만료된 항목과 한도를 넘는 오래된 항목 삭제"""
+        self._writes_since_prune = 0
+        conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "DELETE FROM search_cache WHERE key IN ("
+            "SELECT key FROM search_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_persisted_entries,)
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            conn = self._get_conn()
+            if conn is not None:
+                conn.execute("DELETE FROM search_cache")
+                conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> dict:
+        """계층별 히트율"""
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
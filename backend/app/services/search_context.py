@@ -0,0 +1,150 @@
+from collections import Counter
+from typing import Dict, List, Optional, Set
+import math
+import re
+import unicodedata
+from app.core.config import settings
+from app.constants.models import get_context_window
+from app.services.context_manager import count_tokens, truncate_tokens
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# 예산이 이보다 적게 남으면 잘린 스니펫을 넣지 않음
+MIN_SNIPPET_TOKENS = 32
+
+
+def _terms(text: str) -> List[str]:
+    """검색어/스니펫의 색인어 (단어 + 비ASCII 단어의 문자 bigram)"""
+    words = _WORD_PATTERN.findall(unicodedata.normalize("NFKC", text).casefold())
+    terms = list(words)
+    for word in words:
+        # 조사가 붙는 한국어 등은 문자 bigram으로도 매칭
+        if len(word) > 2 and not word.isascii():
+            terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def _shingles(text: str) -> Set[str]:
+    words = _WORD_PATTERN.findall(unicodedata.normalize("NFKC", text).casefold())
+    if len(words) < 3:
+        return set(words)
+    return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def _snippet(result: Dict) -> str:
+    return (result.get("content", "") or result.get("snippet", "") or "").strip()
+
+
+def dedupe_results(results: List[Dict], threshold: float = None) -> List[Dict]:
+    """같은 URL이거나 단어 3-gram 자카드 유사도가 threshold 이상인 결과 제거 (앞선 결과 유지)"""
+    threshold = settings.SEARCH_CONTEXT_DEDUPE_THRESHOLD if threshold is None else threshold
+    kept: List[Dict] = []
+    kept_shingles: List[Set[str]] = []
+    seen_urls: Set[str] = set()
+    for result in results:
+        snippet = _snippet(result)
+        url = result.get("url", "")
+        if not snippet or (url and url in seen_urls):
+            continue
+        shingles = _shingles(snippet)
+        if any(
+            len(shingles & other) / len(shingles | other) >= threshold
+            for other in kept_shingles if shingles | other
+        ):
+            continue
+        kept.append(result)
+        kept_shingles.append(shingles)
+        if url:
+            seen_urls.add(url)
+    return kept
+
+
+def bm25_scores(query: str, documents: List[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """검색 결과 집합을 말뭉치로 한 BM25 점수"""
+    query_terms = set(_terms(query))
+    doc_terms = [Counter(_terms(doc)) for doc in documents]
+    if not query_terms or not doc_terms:
+        return [0.0] * len(documents)
+
+    avg_length = sum(sum(terms.values()) for terms in doc_terms) / len(doc_terms) or 1.0
+    doc_freq = Counter(term for terms in doc_terms for term in query_terms if term in terms)
+    scores = []
+    for terms in doc_terms:
+        length = sum(terms.values())
+        score = 0.0
+        for term in query_terms:
+            freq = terms.get(term, 0)
+            if not freq:
+                continue
+            idf = math.log(1 + (len(doc_terms) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * freq * (k1 + 1) / (freq + k1 * (1 - b + b * length / avg_length))
+        scores.append(score)
+    return scores
+
+
+def get_search_context_budget(model: str) -> int:
+    """모델별 검색 결과 컨텍스트 토큰 예산"""
+    return min(
+        settings.SEARCH_CONTEXT_MAX_TOKENS,
+        int(get_context_window(model) * settings.SEARCH_CONTEXT_WINDOW_RATIO)
+    )
+
+
+def build_search_context(
+    query: str,
+    search_results: List[Dict],
+    model: str,
+    budget: Optional[int] = None
+) -> str:
+    """중복을 제거하고 검색어 관련도 순으로 토큰 예산 안에서 검색 결과 컨텍스트 생성"""
+    results = dedupe_results(search_results)
+    if not results:
+        return ""
+    budget = get_search_context_budget(model) if budget is None else budget
+
+    scores = bm25_scores(query, [_snippet(result) for result in results])
+    # 점수가 같으면 검색 엔진의 순서 유지
+    ranked = sorted(range(len(results)), key=lambda i: -scores[i])[:settings.SEARCH_CONTEXT_MAX_RESULTS]
+
+    header = "\n\n[검색 결과]\n"
+    remaining = budget - count_tokens(header, model)
+    entries = []
+    for index in ranked:
+        url = results[index].get("url", "")
+        prefix = f"{len(entries) + 1}. "
+        suffix = f"\n출처: {url}\n\n"
+        overhead = count_tokens(prefix + suffix, model)
+        snippet = _snippet(results[index])
+        available = remaining - overhead
+        if available < min(MIN_SNIPPET_TOKENS, count_tokens(snippet, model)):
+            break
+        snippet = truncate_tokens(snippet, available, model)
+        entries.append(prefix + snippet + suffix)
+        remaining -= overhead + count_tokens(snippet, model)
+    if not entries:
+        return ""
+    return header + "".join(entries)
+
+
+def build_search_messages(
+    messages: List[Dict],
+    search_results: List[Dict],
+    query: str,
+    model: str
+) -> List[Dict]:
+    """검색 결과 컨텍스트를 시스템 메시지에 추가한 새 메시지 목록 (원본 메시지는 변경하지 않음)"""
+    search_context = build_search_context(query, search_results, model)
+    if not search_context:
+        return list(messages)
+
+    # 시스템 메시지가 있으면 검색 결과를 덧붙인 새 메시지로 교체, 없으면 추가
+    system_index = next((i for i, msg in enumerate(messages) if msg.get("role") == "system"), None)
+    if system_index is None:
+        return [{
+            "role": "system",
+            "content": f"다음 검색 결과를 참고하여 답변하세요.{search_context}"
+        }] + list(messages)
+    enhanced = list(messages)
+    system_message = messages[system_index]
+    enhanced[system_index] = {**system_message, "content": (system_message.get("content") or "") + search_context}
+    return enhanced
@@ -1,46 +1,245 @@
-from typing import Optional, List, Dict
-from langchain_community.tools.tavily_search import TavilySearchResults
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, List, Dict
+from pydantic import BaseModel, Field
+from langchain_core.tools import BaseTool
 from app.core.config import settings
+from app.core.metrics import SEARCH_DURATION
+from app.services.search_cache import SearchResultCache
+from app.services.single_flight import SingleFlight
+import asyncio
+import httpx
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# 완료된 미리 시작한 검색의 결과를 보관하는 시간 (같은 요청의 search_within_budget이 사용)
+PREFETCH_RESULT_TTL_SECONDS = 30.0
+
+
+class SearchInput(BaseModel):
+    """검색 툴 입력"""
+    query: str = Field(description="검색 쿼리")
+
+
+class CachedSearchTool(BaseTool):
+    """검색 결과 캐시와 동시 실행 제한을 거치는 Agent용 웹 검색 툴"""
+    name: str = "tavily_search_results_json"
+    description: str = (
+        "A search engine optimized for comprehensive, accurate, and trusted results. "
+        "Useful for when you need to answer questions about current events. "
+        "Input should be a search query."
+    )
+    args_schema: type = SearchInput
+    service: Any = None
+
+    def _run(self, query: str, run_manager=None) -> List[Dict]:
+        """동기 호출 (이벤트 루프가 실행 중인 스레드에서는 ainvoke를 사용해야 함)"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return self.service.search_sync(query)
+        raise RuntimeError("이벤트 루프 안에서는 검색 툴을 동기로 호출할 수 없습니다. ainvoke를 사용하세요.")
+
+    async def _arun(self, query: str, run_manager=None) -> List[Dict]:
+        return await self.service.search(query)
+
+
+class SearchCallStats:
+    """검색 호출의 대기 시간(동시 실행 제한)과 실행 시간(HTTP) 통계"""
+
+    def __init__(self):
+        self.requests = 0
+        self.in_flight = 0
+        self.timeouts = 0
+        self.budget_exceeded = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self.total_execution = 0.0
+        self.max_execution = 0.0
+
+    def record(self, queue_wait: float, execution: float) -> None:
+        self.requests += 1
+        self.total_queue_wait += queue_wait
+        self.max_queue_wait = max(self.max_queue_wait, queue_wait)
+        self.total_execution += execution
+        self.max_execution = max(self.max_execution, execution)
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "timeouts": self.timeouts,
+            "budget_exceeded": self.budget_exceeded,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "avg_queue_wait_ms": self.total_queue_wait / self.requests * 1000 if self.requests else 0.0,
+            "max_queue_wait_ms": self.max_queue_wait * 1000,
+            "avg_execution_ms": self.total_execution / self.requests * 1000 if self.requests else 0.0,
+            "max_execution_ms": self.max_execution * 1000,
+        }
+
 
 class SearchService:
-    """검색 서비스 - Tavily Search를 사용한 웹 검색"""
-    
+    """검색 서비스 - Tavily Search를 사용한 웹 검색
+
+    Tavily API는 비동기 HTTP 클라이언트로 직접 호출하므로 요청이 취소되면 HTTP 요청도 함께 중단됩니다.
+    동시 검색 수는 세마포어로 제한하고, 검색어마다 제한 시간을 둡니다.
+    SQLite 검색 캐시 I/O는 기본 스레드 풀과 분리된 전용 스레드 풀에서 실행합니다.
+    같은 검색어가 동시에 요청되면(미리 시작한 검색 포함) 하나의 호출을 공유합니다.
+    """
+
     def __init__(self):
         self.api_key = settings.TAVILY_API_KEY
         self.is_enabled = bool(self.api_key)
-        
+        self.cache = SearchResultCache()
+        self.call_stats = SearchCallStats()
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self._cache_executor: Optional[ThreadPoolExecutor] = None
+        self._single_flight = SingleFlight()
+        self._prefetches: Dict[str, asyncio.Task] = {}
+
         if not self.is_enabled:
             logger.warning("Tavily API Key가 설정되지 않았습니다. 검색 기능이 비활성화됩니다.")
             self.search_tool = None
         else:
-            try:
-                self.search_tool = TavilySearchResults(
-                    api_key=self.api_key,
-                    max_results=5,  # 최대 검색 결과 수
-                    search_depth="advanced"  # 기본 또는 고급 검색
-                )
-                logger.info("Tavily Search 서비스가 초기화되었습니다.")
-            except Exception as e:
-                logger.error(f"Tavily Search 초기화 실패: {str(e)}")
-                self.search_tool = None
-                self.is_enabled = False
-    
+            self.search_tool = CachedSearchTool(service=self)
+            logger.info("Tavily Search 서비스가 초기화되었습니다.")
+
     def get_search_tool(self):
         """검색 툴 반환 (Langchain Tool)"""
         if not self.is_enabled or not self.search_tool:
             return None
         return self.search_tool
-    
+
     def get_tools(self) -> List:
         """사용 가능한 검색 툴 목록 반환"""
         tool = self.get_search_tool()
         if tool:
             return [tool]
         return []
+
+    @staticmethod
+    def _new_http_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=settings.TAVILY_BASE_URL,
+            limits=httpx.Limits(
+                max_connections=settings.SEARCH_MAX_CONCURRENCY,
+                max_keepalive_connections=settings.SEARCH_MAX_CONCURRENCY,
+            ),
+            timeout=settings.SEARCH_TIMEOUT_SECONDS,
+        )
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = self._new_http_client()
+        return self._http_client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # 세마포어는 이벤트 루프에 묶이므로 루프가 바뀌면 새로 생성
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(settings.SEARCH_MAX_CONCURRENCY)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _get_cache_executor(self) -> ThreadPoolExecutor:
+        if self._cache_executor is None:
+            self._cache_executor = ThreadPoolExecutor(
+                max_workers=settings.SEARCH_CACHE_IO_WORKERS,
+                thread_name_prefix="search-cache"
+            )
+        return self._cache_executor
+
+    async def _run_cache_io(self, func, *args):
+        """SQLite 캐시 I/O를 전용 스레드 풀에서 실행 (메모리 전용 캐시는 바로 실행)"""
+        if not self.cache.persistent:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_cache_executor(), func, *args)
+
+    async def _fetch(self, query: str, client: Optional[httpx.AsyncClient] = None) -> List[Dict]:
+        """Tavily Search API 호출"""
+        response = await (client or self._get_http_client()).post("/search", json={
+            "api_key": self.api_key,
+            "query": query,
+            "max_results": 5,  # 최대 검색 결과 수
+            "search_depth": "advanced",  # 기본 또는 고급 검색
+        })
+        response.raise_for_status()
+        return [
+            {"url": result.get("url", ""), "content": result.get("content", "")}
+            for result in response.json().get("results", [])
+        ]
+
+    async def _search_uncached(
+        self,
+        query: str,
+        client: Optional[httpx.AsyncClient] = None,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> List[Dict]:
+        cached = await self._run_cache_io(self.cache.get, query)
+        if cached is not None:
+            return cached
+
+        queued_at = time.monotonic()
+        async with semaphore or self._get_semaphore():
+            started_at = time.monotonic()
+            self.call_stats.in_flight += 1
+            try:
+                results = await self._fetch(query, client)
+            finally:
+                self.call_stats.in_flight -= 1
+                self.call_stats.record(started_at - queued_at, time.monotonic() - started_at)
+
+        await self._run_cache_io(self.cache.set, query, results)
+        return results
+
+    async def _search_once(
+        self,
+        query: str,
+        client: Optional[httpx.AsyncClient] = None,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> List[Dict]:
+        """제한 시간 안에서 검색 실행 (실패하거나 제한 시간을 넘기면 예외)"""
+        try:
+            return await asyncio.wait_for(
+                self._search_uncached(query, client, semaphore),
+                timeout=settings.SEARCH_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            self.call_stats.timeouts += 1
+            logger.warning(f"검색 제한 시간({settings.SEARCH_TIMEOUT_SECONDS}초)을 초과했습니다: {query[:50]}")
+            raise
+        except asyncio.CancelledError:
+            # 기다리는 요청이 모두 취소되면(클라이언트 연결 종료 등) HTTP 요청도 중단됨
+            self.call_stats.cancelled += 1
+            raise
+        except Exception as e:
+            self.call_stats.errors += 1
+            logger.error(f"검색 실행 중 오류 발생: {str(e)}")
+            raise
+
+    async def _search_or_raise(self, query: str) -> List[Dict]:
+        """캐시 → 진행 중인 같은 검색 합류 → 새 검색 순으로 실행 (실패하면 예외)"""
+        started = time.perf_counter()
+        # 메모리 캐시 히트는 바로 반환
+        cached = self.cache.get_hot(query)
+        if cached is not None:
+            SEARCH_DURATION.labels(cache="hit").observe(time.perf_counter() - started)
+            return cached
+
+        try:
+            return await self._single_flight.do(
+                self.cache.make_key(query),
+                lambda: self._search_once(query)
+            )
+        finally:
+            SEARCH_DURATION.labels(cache="miss").observe(time.perf_counter() - started)
     
     async def search(self, query: str) -> List[Dict]:
         """
@@ -50,24 +249,102 @@ class SearchService:
             query: 검색 쿼리
             
         Returns:
-            검색 결과 리스트
+            검색 결과 리스트 (실패하거나 제한 시간을 넘기면 빈 리스트)
         """
         if not self.is_enabled or not self.search_tool:
             return []
-        
         try:
-            # Tavily Search는 동기 함수이므로 run_in_executor 사용
-            import asyncio
-            loop = asyncio.get_event_loop()
-            results = await loop.run_in_executor(
-                None,
-                self.search_tool.invoke,
-                query
-            )
-            return results if isinstance(results, list) else []
-        except Exception as e:
-            logger.error(f"검색 실행 중 오류 발생: {str(e)}")
+            return await self._search_or_raise(query)
+        except Exception:
+            return []
+
+    def search_sync(self, query: str) -> List[Dict]:
+        """동기 검색 (이벤트 루프 밖의 스레드에서 호출)
+
+        앱 이벤트 루프에서 검색 자원을 쓰고 있으면 그 루프에서 실행해 HTTP 연결 풀,
+        동시 실행 제한, 단일 호출 공유를 그대로 사용합니다. 그런 루프가 없으면 이번 호출 전용
+        클라이언트와 세마포어로 새 루프에서 실행하고 끝나면 닫습니다 (공유 자원은 건드리지 않음).
+        """
+        if not self.is_enabled or not self.search_tool:
+            return []
+        loop = self._semaphore_loop
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            return asyncio.run_coroutine_threadsafe(self.search(query), loop).result()
+        return asyncio.run(self._search_detached(query))
+
+    async def _search_detached(self, query: str) -> List[Dict]:
+        async with self._new_http_client() as client:
+            try:
+                return await self._search_once(query, client, asyncio.Semaphore(1))
+            except Exception:
+                return []
+
+    @staticmethod
+    def _failed(task: asyncio.Task) -> bool:
+        return task.done() and (task.cancelled() or task.exception() is not None)
+    
+    def prefetch(self, query: str) -> Optional[asyncio.Task]:
+        """검색을 미리 시작 (이후 같은 검색어의 search 호출이 진행 중인 검색에 합류)
+
+        진행 중이거나 성공한 같은 검색어의 검색이 있으면 그 작업을 반환합니다.
+        """
+        if not self.is_enabled or not self.search_tool:
+            return None
+        key = self.cache.make_key(query)
+        task = self._prefetches.get(key)
+        if task is not None and not self._failed(task) and task.get_loop() is asyncio.get_running_loop():
+            return task
+
+        task = asyncio.ensure_future(self._search_or_raise(query))
+        # 완료 후에도 빈 결과를 포함한 결과를 잠시 보관 (실패/취소는 기록만 하고 보관하지 않음)
+        self._prefetches[key] = task
+        task.add_done_callback(lambda _: self._expire_prefetch(key, task))
+        return task
+
+    def _expire_prefetch(self, key: str, task: asyncio.Task) -> None:
+        if self._failed(task):
+            self._forget_prefetch(key, task)
+            return
+        asyncio.get_running_loop().call_later(PREFETCH_RESULT_TTL_SECONDS, self._forget_prefetch, key, task)
+
+    def _forget_prefetch(self, key: str, task: asyncio.Task) -> None:
+        if self._prefetches.get(key) is task:
+            del self._prefetches[key]
+    
+    async def search_within_budget(self, query: str, budget: float) -> List[Dict]:
+        """budget 초 안에 끝나는 검색 결과만 사용 (넘기면 빈 리스트, 검색은 계속 진행되어 캐시에 저장)
+
+        미리 시작한 검색이 끝나 있으면 빈 결과라도 그대로 사용하고,
+        실패했거나 제한 시간을 넘긴 경우에만 다시 검색합니다.
+        """
+        task = self.prefetch(query)
+        if task is None:
+            return []
+        await asyncio.wait({task}, timeout=budget)
+        if not task.done():
+            self.call_stats.budget_exceeded += 1
+            logger.info(f"검색이 예산({budget}초)을 넘어 검색 결과 없이 답변합니다: {query[:50]}")
             return []
+        if self._failed(task):
+            return []
+        return task.result()
+    
+    def get_cache_stats(self) -> dict:
+        """검색 캐시 히트율"""
+        return self.cache.stats()
+
+    def get_stats(self) -> dict:
+        """검색 호출 및 캐시 통계"""
+        return {"calls": self.call_stats.to_dict(), "cache": self.cache.stats()}
+
+    async def aclose(self) -> None:
+        """HTTP 클라이언트와 캐시 스레드 풀 정리 (앱 종료 시)"""
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        if self._cache_executor is not None:
+            self._cache_executor.shutdown(wait=False)
+            self._cache_executor = None
+        self.cache.close()
 
 
 # 싱글톤 인스턴스
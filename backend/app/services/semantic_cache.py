@@ -0,0 +1,211 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import hashlib
+import json
+import re
+import time
+import zlib
+import numpy as np
+from app.core.config import settings
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedder:
+    """오프라인 해싱 임베딩 (단어 + 문자 n-gram 해싱 벡터)
+
+    외부 모델 없이 동작하며, 어순/띄어쓰기가 조금 다른 문장도
+    비슷한 벡터가 되도록 단어와 문자 n-gram을 함께 사용합니다.
+    """
+
+    def __init__(self, dim: int = 1024, ngram: int = 3):
+        self.dim = dim
+        self.ngram = ngram
+
+    def _features(self, text: str) -> List[str]:
+        text = text.lower()
+        words = _WORD_PATTERN.findall(text)
+        features = [f"w:{word}" for word in words]
+
+        # 문자 n-gram (한국어처럼 조사가 붙는 언어에서 단어 단위보다 강건함)
+        compact = " ".join(words)
+        for i in range(max(len(compact) - self.ngram + 1, 0)):
+            features.append(f"c:{compact[i:i + self.ngram]}")
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        """L2 정규화된 임베딩 벡터 반환"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            # 상위 비트로 부호를 정해 해시 충돌의 편향을 줄임
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class SemanticCache:
+    """유사 프롬프트 캐시 (NumPy 행렬 기반 코사인 유사도 검색)
+
+    같은 (모델, temperature, max_tokens) 조합 안에서만 검색하며,
+    용량을 넘으면 가장 오래 사용되지 않은 항목을 덮어씁니다.
+    유사도는 마지막 사용자 메시지로만 비교하고, 그 이전 대화(어시스턴트 응답 포함)는
+    해시가 정확히 같을 때만 히트로 인정합니다.
+    """
+
+    def __init__(
+        self,
+        capacity: int = None,
+        dim: int = None,
+        threshold: float = None,
+        ttl_seconds: float = None,
+        enabled: bool = None,
+    ):
+        self.capacity = settings.SEMANTIC_CACHE_CAPACITY if capacity is None else capacity
+        self.threshold = settings.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.ttl_seconds = settings.SEMANTIC_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.enabled = settings.SEMANTIC_CACHE_ENABLED if enabled is None else enabled
+        self.embedder = HashingEmbedder(dim=settings.SEMANTIC_CACHE_DIM if dim is None else dim)
+
+        self._vectors = np.zeros((self.capacity, self.embedder.dim), dtype=np.float32)
+        self._namespaces = np.full(self.capacity, -1, dtype=np.int64)  # -1: 빈 슬롯
+        self._contexts = np.zeros(self.capacity, dtype=np.int64)  # 이전 대화 해시
+        self._expires_at = np.zeros(self.capacity, dtype=np.float64)
+        self._last_used = np.zeros(self.capacity, dtype=np.float64)
+        self._values: List[Optional[dict]] = [None] * self.capacity
+        # (모델, temperature, max_tokens) → 네임스페이스 ID (LRU, 최대 capacity개)
+        self._namespace_ids: "OrderedDict[Tuple, int]" = OrderedDict()
+        self._next_namespace_id = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lookup_seconds_total = 0.0
+        self.lookup_seconds_max = 0.0
+
+    @staticmethod
+    def key_for(messages: List[dict]) -> Tuple[int, str]:
+        """메시지 목록을 (이전 대화 해시, 마지막 사용자 메시지)로 변환"""
+        last_user = max((i for i, msg in enumerate(messages) if msg.get("role") == "user"), default=None)
+        if last_user is None:
+            history, text = messages, ""
+        else:
+            history = messages[:last_user] + messages[last_user + 1:]
+            text = (messages[last_user].get("content") or "").strip()
+        raw = json.dumps(
+            [[msg.get("role"), msg.get("content") or ""] for msg in history],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        digest = hashlib.blake2b(raw.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big", signed=True), text
+
+    def _namespace_id(
+        self,
+        model: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        create: bool = False,
+    ) -> Optional[int]:
+        key = (model, temperature, max_tokens)
+        namespace = self._namespace_ids.get(key)
+        if namespace is not None:
+            self._namespace_ids.move_to_end(key)
+            return namespace
+        if not create:
+            return None
+
+        if len(self._namespace_ids) >= self.capacity:
+            # 가장 오래 쓰이지 않은 네임스페이스와 그 항목을 비움
+            _, evicted = self._namespace_ids.popitem(last=False)
+            stale = self._namespaces == evicted
+            self._namespaces[stale] = -1
+            for slot in np.flatnonzero(stale):
+                self._values[int(slot)] = None
+        namespace = self._next_namespace_id
+        self._next_namespace_id += 1
+        self._namespace_ids[key] = namespace
+        return namespace
+
+    def get(
+        self,
+        text: str,
+        model: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        context: int = 0,
+    ) -> Optional[dict]:
+        """이전 대화 해시가 같고 유사도가 임계값 이상인 캐시 항목 반환"""
+        started = time.perf_counter()
+        try:
+            namespace = self._namespace_id(model, temperature, max_tokens)
+            now = time.monotonic()
+            if namespace is None:
+                self.misses += 1
+                return None
+            valid = (self._namespaces == namespace) & (self._contexts == context) & (self._expires_at > now)
+            if not valid.any():
+                self.misses += 1
+                return None
+
+            scores = self._vectors @ self.embedder.embed(text)
+            scores[~valid] = -1.0
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self._last_used[best] = now
+            self.hits += 1
+            return dict(self._values[best])
+        finally:
+            elapsed = time.perf_counter() - started
+            self.lookup_seconds_total += elapsed
+            self.lookup_seconds_max = max(self.lookup_seconds_max, elapsed)
+
+    def set(
+        self,
+        text: str,
+        model: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        value: dict,
+        context: int = 0,
+    ) -> None:
+        """캐시 저장 (빈 슬롯 또는 만료/LRU 슬롯에 기록)"""
+        if not self.capacity:
+            return
+        namespace = self._namespace_id(model, temperature, max_tokens, create=True)
+        now = time.monotonic()
+        free = np.flatnonzero((self._namespaces < 0) | (self._expires_at <= now))
+        if free.size:
+            slot = int(free[0])
+        else:
+            slot = int(np.argmin(self._last_used))
+            self.evictions += 1
+
+        self._vectors[slot] = self.embedder.embed(text)
+        self._namespaces[slot] = namespace
+        self._contexts[slot] = context
+        self._expires_at[slot] = now + self.ttl_seconds
+        self._last_used[slot] = now
+        self._values[slot] = dict(value)
+
+    def stats(self) -> dict:
+        """캐시 통계 (히트율, 조회 지연)"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": int((self._namespaces >= 0).sum()),
+            "capacity": self.capacity,
+            "namespaces": len(self._namespace_ids),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "avg_lookup_ms": self.lookup_seconds_total / lookups * 1000 if lookups else 0.0,
+            "max_lookup_ms": self.lookup_seconds_max * 1000,
+        }
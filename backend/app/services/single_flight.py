@@ -0,0 +1,123 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+
+
+class _InFlightCall:
+    """진행 중인 단일 호출과 대기 중인 호출자 수"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        self.abandoned = False  # 모든 호출자가 떠나 취소된 상태
+
+
+class _StreamBroadcast:
+    """하나의 업스트림 스트림을 여러 소비자에게 전달 (재생 버퍼 포함)"""
+
+    def __init__(self, source_factory: Callable[[], AsyncIterator[Any]]):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.consumers = 0
+        self.abandoned = False  # 모든 소비자가 떠나 취소된 상태
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source_factory))
+
+    def _notify(self) -> None:
+        # 기다리는 소비자를 모두 깨우고 다음 대기용 이벤트로 교체
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _pump(self, source_factory: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async for chunk in source_factory():
+                self.chunks.append(chunk)
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = ConnectionAbortedError("업스트림 스트림이 취소되었습니다.")
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        """처음부터 수신한 청크를 재생한 뒤 새 청크를 이어서 전달"""
+        index = 0
+        self.consumers += 1
+        try:
+            while True:
+                while index < len(self.chunks):
+                    yield self.chunks[index]
+                    index += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.consumers -= 1
+            # 모든 소비자가 떠나면 업스트림 호출도 중단
+            if self.consumers == 0 and not self.done:
+                self.abandoned = True
+                self.task.cancel()
+
+
+class SingleFlight:
+    """동일한 요청이 동시에 들어오면 하나의 업스트림 호출을 공유"""
+
+    def __init__(self):
+        self._calls: Dict[str, _InFlightCall] = {}
+        self._streams: Dict[str, _StreamBroadcast] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """같은 키의 호출이 진행 중이면 그 결과를 기다리고, 없으면 새로 시작"""
+        call = self._calls.get(key)
+        if call is None or call.abandoned:
+            call = _InFlightCall(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(self._calls, key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            # 한 호출자가 취소되어도 공유 호출은 계속 진행
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.abandoned = True
+                call.task.cancel()
+
+    async def stream(self, key: str, source_factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """같은 키의 스트림이 진행 중이면 합류하고, 없으면 새로 시작"""
+        broadcast = self._streams.get(key)
+        if broadcast is None or broadcast.done or broadcast.abandoned:
+            broadcast = _StreamBroadcast(source_factory)
+            self._streams[key] = broadcast
+            broadcast.task.add_done_callback(lambda _: self._forget(self._streams, key, broadcast))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        async for chunk in broadcast.subscribe():
+            yield chunk
+
+    @staticmethod
+    def _forget(registry: Dict[str, Any], key: str, entry: Any) -> None:
+        if registry.get(key) is entry:
+            del registry[key]
+
+    def stats(self) -> dict:
+        """단일 호출 공유 통계"""
+        return {
+            "in_flight_calls": len(self._calls),
+            "in_flight_streams": len(self._streams),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,116 @@
+from typing import List, Optional
+import logging
+import time
+import anyio
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.conversation import (
+    Conversation,
+    Message,
+    MESSAGE_STATUS_ABORTED,
+    MESSAGE_STATUS_COMPLETE,
+    MESSAGE_STATUS_STREAMING,
+    PREVIEW_LENGTH,
+    utcnow,
+)
+from app.services.history_service import conversation_history
+from app.services.message_persister import message_persister
+
+logger = logging.getLogger(__name__)
+
+_conversations = Conversation.__table__
+
+
+class StreamingReply:
+    """스트리밍 중인 어시스턴트 응답
+
+    청크를 리스트에 모아 저장할 때만 합치고(문자열 += 반복의 O(n²) 복사 방지),
+    interval초마다 지금까지의 내용을 messages 행에 체크포인트합니다(status=streaming).
+    첫 체크포인트에서 행을 만들고 이후에는 같은 행을 갱신하므로, 클라이언트 연결이 끊기거나
+    워커가 죽어도 부분 응답이 남습니다. 요청 세션이 정리된 뒤에도 저장할 수 있도록 모든 저장은
+    같은 엔진의 별도 세션을 사용합니다 (체크포인트 없이 끝난 응답은 write-behind가 켜져 있으면
+    대기열에 넣기만 함).
+    """
+
+    def __init__(self, db: AsyncSession, conversation: Conversation, user_id: int, interval: float = None):
+        self.db = db
+        self.conversation = conversation
+        self.conversation_id = conversation.id
+        self.user_id = user_id
+        self.interval = settings.STREAM_CHECKPOINT_SECONDS if interval is None else interval
+        self.chunks: List[str] = []
+        self.message_id: Optional[int] = None
+        self.checkpoints = 0
+        self._last_checkpoint = time.monotonic()
+
+    def append(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+
+    @property
+    def content(self) -> str:
+        return "".join(self.chunks)
+
+    async def maybe_checkpoint(self) -> None:
+        """마지막 체크포인트 후 interval초가 지났으면 부분 응답 저장"""
+        if self.interval <= 0 or time.monotonic() - self._last_checkpoint < self.interval:
+            return
+        await self._save(MESSAGE_STATUS_STREAMING)
+        self.checkpoints += 1
+        self._last_checkpoint = time.monotonic()
+
+    async def complete(self) -> None:
+        """스트리밍 완료 후 전체 응답 저장"""
+        # 마지막 청크를 보낸 직후 연결이 끊겨도 저장을 마치도록 취소를 막음
+        with anyio.CancelScope(shield=True):
+            if self.message_id is None and message_persister.enabled:
+                # write-behind 경로는 세션을 쓰지 않고 대기열에만 넣음
+                await message_persister.save(self.db, self.conversation, self.user_id, "assistant", self.content)
+            else:
+                await self._save(MESSAGE_STATUS_COMPLETE)
+
+    async def abort(self) -> None:
+        """연결 끊김/업스트림 오류로 중단된 응답의 부분 내용 저장 (저장 실패는 기록만 함)"""
+        if self.message_id is None and not self.chunks:
+            return
+        with anyio.CancelScope(shield=True):
+            try:
+                await self._save(MESSAGE_STATUS_ABORTED)
+            except Exception as e:
+                logger.warning(f"중단된 응답 저장 실패 (대화 {self.conversation_id}): {str(e)}")
+
+    async def _save(self, status: str) -> None:
+        content = self.content
+        message_id = self.message_id
+        async with AsyncSession(
+            self.db.bind, expire_on_commit=False, sync_session_class=type(self.db.sync_session)
+        ) as session:
+            summary = {}
+            if message_id is None:
+                # write-behind 대기 중인 사용자 메시지가 먼저 저장되도록 (ID 순서 유지)
+                await message_persister.sync(conversation_id=self.conversation_id)
+                message = Message(conversation_id=self.conversation_id, role="assistant", content=content, status=status)
+                session.add(message)
+                await session.flush()
+                message_id = message.id
+                summary["message_count"] = _conversations.c.message_count + 1
+            else:
+                await session.execute(
+                    update(Message).where(Message.id == message_id).values(content=content, status=status)
+                )
+            if summary or status != MESSAGE_STATUS_STREAMING:
+                # 대화 요약 컬럼은 행을 만들 때와 완료/중단 시에만 갱신
+                now = utcnow()
+                await session.execute(
+                    update(_conversations).where(_conversations.c.id == self.conversation_id).values(
+                        last_message_preview=content[:PREVIEW_LENGTH],
+                        last_message_at=now,
+                        updated_at=now,
+                        **summary,
+                    )
+                )
+            await session.commit()
+        self.message_id = message_id
+        if status == MESSAGE_STATUS_COMPLETE:
+            # 중단된 부분 응답은 이후 프롬프트 히스토리에 넣지 않음
+            conversation_history.append(self.conversation_id, message_id, "assistant", content)
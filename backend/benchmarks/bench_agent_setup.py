@@ -0,0 +1,90 @@
+"""검색 모드 Agent 준비 비용 벤치마크
+
+요청마다 프롬프트/Agent/AgentExecutor를 새로 만드는 기존 방식과
+캐시된 실행기를 재사용하는 방식의 요청당 준비 시간을 비교합니다. (네트워크 호출 없음)
+
+    cd backend
+    python -m benchmarks.bench_agent_setup --requests 2000
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder  # noqa: E402
+from langchain_core.tools import tool  # noqa: E402
+from app.services.openai_service import (  # noqa: E402
+    OpenAIService,
+    AgentExecutor,
+    create_openai_tools_agent,
+)
+
+
+@tool
+def web_search(query: str) -> str:
+    """웹 검색 (벤치마크용 가짜 툴)"""
+    return query
+
+
+def build_uncached(service: OpenAIService, model: str, tools: list):
+    """기존 방식: 요청마다 프롬프트, Agent, 실행기를 새로 생성"""
+    llm = service._create_llm(model=model, temperature=0.7, max_tokens=1000, streaming=True)
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "당신은 도움이 되는 AI 어시스턴트입니다."),
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ])
+    agent = create_openai_tools_agent(llm, tools, prompt)
+    return AgentExecutor(agent=agent, tools=tools, verbose=False)
+
+
+def build_cached(service: OpenAIService, model: str, tools: list):
+    """개선 방식: 캐시된 실행기 재사용"""
+    return service._build_agent_executor(model, 0.7, 1000, tools, streaming=True)
+
+
+def run_scenario(name: str, build, service: OpenAIService, args) -> dict:
+    tools = [web_search]
+    models = ["gpt-4o-mini", "gpt-4o", "gpt-4-turbo"][:args.models]
+    # 첫 생성 비용은 제외
+    for model in models:
+        build(service, model, tools)
+
+    started = time.perf_counter()
+    for i in range(args.requests):
+        build(service, models[i % len(models)], tools)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": name,
+        "requests": args.requests,
+        "total_ms": round(elapsed * 1000, 2),
+        "us_per_request": round(elapsed / args.requests * 1_000_000, 2),
+    }
+
+
+def main(args) -> None:
+    service = OpenAIService()
+    results = [
+        run_scenario("baseline (build per request)", build_uncached, service, args),
+        run_scenario("cached executor", build_cached, service, args),
+    ]
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+
+    before, after = results
+    if after["us_per_request"]:
+        print(
+            f"setup/request: {before['us_per_request']:.1f}us -> {after['us_per_request']:.1f}us "
+            f"({before['us_per_request'] / after['us_per_request']:.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="검색 모드 Agent 준비 비용 벤치마크")
+    parser.add_argument("--requests", type=int, default=2000, help="요청 수")
+    parser.add_argument("--models", type=int, default=3, choices=[1, 2, 3], help="번갈아 사용할 모델 수")
+    main(parser.parse_args())
@@ -0,0 +1,99 @@
+"""SSE 스트리밍 프레임 인코딩/병합 벤치마크
+
+토큰마다 json.dumps로 프레임을 만드는 기존 방식과
+템플릿 인코더 + 프레임 병합(coalesce_chunks) 방식을 비교합니다.
+
+    cd backend
+    python -m benchmarks.bench_sse --streams 200 --tokens 300 --interval-ms 2
+"""
+from typing import AsyncIterator, Callable
+import argparse
+import asyncio
+import json
+import time
+from app.core.sse import coalesce_chunks, encode_chunk
+
+TOKEN = "토큰 "
+
+
+async def fake_upstream(tokens: int, interval: float) -> AsyncIterator[str]:
+    """일정 간격으로 토큰을 내보내는 가짜 업스트림"""
+    for _ in range(tokens):
+        if interval:
+            await asyncio.sleep(interval)
+        else:
+            await asyncio.sleep(0)
+        yield TOKEN
+
+
+async def baseline_stream(tokens: int, interval: float, _args) -> AsyncIterator[str]:
+    """기존 방식: 토큰마다 json.dumps 프레임"""
+    async for chunk in fake_upstream(tokens, interval):
+        yield f"data: {json.dumps({'chunk': chunk}, ensure_ascii=False)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+async def coalesced_stream(tokens: int, interval: float, args) -> AsyncIterator[str]:
+    """개선 방식: 프레임 병합 + 템플릿 인코더"""
+    async for chunk in coalesce_chunks(
+        fake_upstream(tokens, interval),
+        max_bytes=args.max_bytes,
+        max_delay_ms=args.max_delay_ms,
+    ):
+        yield encode_chunk(chunk)
+    yield "data: [DONE]\n\n"
+
+
+async def run_scenario(name: str, stream_factory: Callable, args) -> dict:
+    frames = 0
+    total_bytes = 0
+
+    async def consume():
+        nonlocal frames, total_bytes
+        async for frame in stream_factory(args.tokens, args.interval_ms / 1000, args):
+            frames += 1
+            total_bytes += len(frame.encode("utf-8"))
+
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    await asyncio.gather(*[consume() for _ in range(args.streams)])
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+
+    return {
+        "scenario": name,
+        "streams": args.streams,
+        "frames": frames,
+        "frames_per_stream": frames / args.streams,
+        "frames_per_sec": frames / wall if wall else 0.0,
+        "bytes": total_bytes,
+        "wall_sec": round(wall, 4),
+        "cpu_ms_per_stream": round(cpu / args.streams * 1000, 4),
+    }
+
+
+async def main(args) -> None:
+    results = [
+        await run_scenario("baseline (token per frame, json.dumps)", baseline_stream, args),
+        await run_scenario("coalesced (template encoder)", coalesced_stream, args),
+    ]
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+
+    before, after = results
+    if after["cpu_ms_per_stream"]:
+        print(
+            f"frames/stream: {before['frames_per_stream']:.1f} -> {after['frames_per_stream']:.1f}, "
+            f"CPU/stream: {before['cpu_ms_per_stream']:.3f}ms -> {after['cpu_ms_per_stream']:.3f}ms "
+            f"({before['cpu_ms_per_stream'] / after['cpu_ms_per_stream']:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SSE 프레임 병합 벤치마크")
+    parser.add_argument("--streams", type=int, default=200, help="동시 스트림 수")
+    parser.add_argument("--tokens", type=int, default=300, help="스트림당 토큰 수")
+    parser.add_argument("--interval-ms", type=float, default=2.0, help="토큰 도착 간격 (0이면 최대 속도)")
+    parser.add_argument("--max-bytes", type=int, default=256, help="병합 버퍼 크기 (bytes)")
+    parser.add_argument("--max-delay-ms", type=float, default=25.0, help="병합 최대 지연 (ms)")
+    asyncio.run(main(parser.parse_args()))
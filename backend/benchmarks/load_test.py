@@ -0,0 +1,488 @@
+"""프롬프트/채팅/대화 목록 엔드포인트 부하 벤치마크
+
+앱을 프로세스 안에서 실행하고(또는 --base-url로 실행 중인 서버), 업스트림은 로컬 스텁 서버
+(benchmarks.stub_upstream)를 사용하며, DB는 DATABASE_URL의 실제 DB(기본값 SQLite 파일)를 사용합니다.
+시나리오마다 처리량, 지연 시간 p50/p95/p99, 첫 토큰 시간(TTFT), 청크 간격, 요청당 DB 쿼리 수를
+측정하고 JSON으로 저장합니다. --compare로 이전 결과와 비교할 수 있습니다.
+chat_stream_db_load 시나리오는 대화 목록 조회로 DB 부하를 계속 주면서 스트리밍 지연 시간을 측정합니다
+(DB 호출이 이벤트 루프를 막으면 TTFT와 청크 간격이 늘어남).
+
+    cd backend
+    python -m benchmarks.load_test --requests 200 --concurrency 20 --output before.json
+    python -m benchmarks.load_test --requests 200 --concurrency 20 --output after.json --compare before.json
+
+PostgreSQL로 측정하려면 DATABASE_URL을 지정하고 먼저 alembic upgrade head를 실행합니다.
+"""
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./load_test.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-load-test")
+os.environ.setdefault("OPENAI_BASE_URL", "http://upstream-stub/v1")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-load-test")
+os.environ.setdefault("TAVILY_BASE_URL", "http://upstream-stub")
+os.environ.setdefault("SEARCH_CACHE_DB_PATH", "")
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.core.security import create_access_token, get_password_hash  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models import conversation  # noqa: E402,F401  (Base에 테이블 등록)
+from app.services.message_persister import message_persister  # noqa: E402
+from app.services.openai_service import openai_service  # noqa: E402
+from app.services.search_service import search_service  # noqa: E402
+from benchmarks.stub_upstream import StubConfig, create_app as create_stub_app  # noqa: E402
+
+SCENARIOS = [
+    "completion", "completion_stream", "chat", "chat_stream", "chat_search", "conversations", "chat_stream_db_load",
+]
+LOAD_TEST_EMAIL = "loadtest@example.com"
+
+
+class _QueueStream(httpx.AsyncByteStream):
+    def __init__(self, queue: asyncio.Queue, task: asyncio.Task, disconnected: asyncio.Event):
+        self._queue = queue
+        self._task = task
+        self._disconnected = disconnected
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            part = await self._queue.get()
+            if part is None:
+                return
+            if part:
+                yield part
+
+    async def aclose(self) -> None:
+        # 클라이언트 연결 종료를 앱에 알리고 의존성 정리(DB 세션 반환 등)까지 기다림
+        self._disconnected.set()
+        await asyncio.wait({self._task}, timeout=5.0)
+        if not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except BaseException:
+                pass
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """응답 본문을 모으지 않고 도착하는 대로 전달하는 ASGI 트랜스포트
+
+    httpx.ASGITransport는 응답이 끝날 때까지 본문을 모아 두므로 TTFT와 청크 간격을 잴 수 없습니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = b"".join([part async for part in request.stream])
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "headers": [(key.lower(), value) for key, value in request.headers.raw],
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "server": (request.url.host, request.url.port or 80),
+            "client": ("127.0.0.1", 50000),
+            "root_path": "",
+        }
+        queue: asyncio.Queue = asyncio.Queue()
+        started = asyncio.get_running_loop().create_future()
+        disconnected = asyncio.Event()
+        request_sent = False
+
+        async def receive() -> dict:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                started.set_result(message)
+            elif message["type"] == "http.response.body":
+                queue.put_nowait(message.get("body", b""))
+                if not message.get("more_body", False):
+                    queue.put_nowait(None)
+
+        async def run() -> None:
+            try:
+                await self.app(scope, receive, send)
+            except Exception as e:
+                if not started.done():
+                    started.set_exception(e)
+            finally:
+                queue.put_nowait(None)
+
+        task = asyncio.ensure_future(run())
+        start = await started
+        return httpx.Response(
+            status_code=start["status"],
+            headers=start.get("headers", []),
+            stream=_QueueStream(queue, task, disconnected),
+            request=request,
+        )
+
+
+class QueryCounter:
+    """SQLAlchemy 엔진들에서 실행한 SQL 문 수"""
+
+    def __init__(self, *target_engines):
+        self.count = 0
+        for target_engine in target_engines:
+            event.listen(target_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """nearest-rank 백분위수"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Optional[Dict[str, float]]:
+    """밀리초 단위 p50/p95/p99/평균/최대"""
+    if not values:
+        return None
+    return {
+        "p50": round(percentile(values, 50) * 1000, 2),
+        "p95": round(percentile(values, 95) * 1000, 2),
+        "p99": round(percentile(values, 99) * 1000, 2),
+        "mean": round(sum(values) / len(values) * 1000, 2),
+        "max": round(max(values) * 1000, 2),
+    }
+
+
+class RequestSample:
+    def __init__(self):
+        self.latency = 0.0
+        self.ttft: Optional[float] = None
+        self.gaps: List[float] = []
+        self.status = 0
+        self.error: Optional[str] = None
+        self.body: Optional[dict] = None
+
+
+class VirtualUser:
+    """대화를 이어가는 가상 사용자 (turns 번 주고받으면 새 대화 시작)"""
+
+    def __init__(self, index: int, turns: int):
+        self.index = index
+        self.turns = turns
+        self.conversation_id: Optional[int] = None
+        self.turn = 0
+
+    def next_conversation_id(self) -> Optional[int]:
+        if self.turn >= self.turns:
+            self.conversation_id, self.turn = None, 0
+        self.turn += 1
+        return self.conversation_id
+
+
+async def timed_json(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> RequestSample:
+    sample = RequestSample()
+    started = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    sample.latency = time.perf_counter() - started
+    sample.status = response.status_code
+    if response.status_code >= 400:
+        sample.error = response.text[:200]
+    sample.body = response.json() if response.status_code < 400 else None
+    return sample
+
+
+async def timed_stream(client: httpx.AsyncClient, url: str, payload: dict) -> RequestSample:
+    """SSE 응답의 첫 텍스트 청크 시간과 청크 간격 측정"""
+    sample = RequestSample()
+    started = time.perf_counter()
+    last_chunk = None
+    async with client.stream("POST", url, json=payload) as response:
+        sample.status = response.status_code
+        if response.status_code >= 400:
+            sample.error = (await response.aread()).decode("utf-8", "replace")[:200]
+        else:
+            async for line in response.aiter_lines():
+                if not line.startswith("data: ") or line == "data: [DONE]":
+                    continue
+                data = json.loads(line[6:])
+                now = time.perf_counter()
+                if "chunk" in data:
+                    if last_chunk is None:
+                        sample.ttft = now - started
+                    else:
+                        sample.gaps.append(now - last_chunk)
+                    last_chunk = now
+                elif "conversation_id" in data:
+                    sample.body = data
+                elif "error" in data:
+                    sample.error = str(data["error"])[:200]
+    sample.latency = time.perf_counter() - started
+    return sample
+
+
+def build_scenario(name: str, args) -> Callable[[httpx.AsyncClient, VirtualUser, int], Awaitable[RequestSample]]:
+    """시나리오 이름에 해당하는 요청 함수 (요청마다 다른 메시지를 사용해 캐시/단일 호출 공유를 피함)"""
+    base = {"model": args.model, "max_tokens": args.max_tokens, "temperature": 0.7}
+
+    async def completion(client, user, i):
+        payload = {**base, "message": f"부하 테스트 요청 {user.index}-{i}"}
+        if name == "completion_stream":
+            return await timed_stream(client, "/api/v1/prompt/completion", {**payload, "stream": True})
+        return await timed_json(client, "POST", "/api/v1/prompt/completion", json=payload)
+
+    async def chat(client, user, i):
+        payload = {
+            **base,
+            "message": f"부하 테스트 대화 {user.index}-{i}",
+            "conversation_id": user.next_conversation_id(),
+            "use_search": name == "chat_search",
+        }
+        if name in ("chat_stream", "chat_stream_db_load"):
+            sample = await timed_stream(client, "/api/v1/prompt/chat", {**payload, "stream": True})
+        else:
+            sample = await timed_json(client, "POST", "/api/v1/prompt/chat", json=payload)
+        if sample.body and sample.body.get("conversation_id"):
+            user.conversation_id = sample.body["conversation_id"]
+        return sample
+
+    async def conversations(client, user, i):
+        return await timed_json(client, "GET", "/api/v1/conversations/", params={"limit": 50})
+
+    if name in ("completion", "completion_stream"):
+        return completion
+    if name in ("chat", "chat_stream", "chat_search", "chat_stream_db_load"):
+        return chat
+    return conversations
+
+
+async def run_scenario(name: str, client: httpx.AsyncClient, args, counter: Optional[QueryCounter]) -> dict:
+    request = build_scenario(name, args)
+    users = [VirtualUser(index, args.turns) for index in range(args.concurrency)]
+
+    for user in users[:args.warmup]:
+        await request(client, user, -1)
+
+    sequence = itertools.count()
+    samples: List[RequestSample] = []
+
+    async def worker(user: VirtualUser) -> None:
+        while True:
+            i = next(sequence)
+            if i >= args.requests:
+                return
+            try:
+                samples.append(await request(client, user, i))
+            except Exception as e:
+                sample = RequestSample()
+                sample.error = f"{type(e).__name__}: {e}"[:200]
+                samples.append(sample)
+
+    # 측정 요청과 동시에 대화 목록 조회를 반복해 DB 부하 발생 (지연 시간은 측정하지 않음)
+    background_requests = 0
+    measuring = True
+
+    async def db_load_worker() -> None:
+        nonlocal background_requests
+        while measuring:
+            await client.get("/api/v1/conversations/", params={"limit": 50})
+            background_requests += 1
+
+    load_tasks = []
+    if name == "chat_stream_db_load":
+        load_tasks = [asyncio.ensure_future(db_load_worker()) for _ in range(args.db_load_workers)]
+
+    queries_before = counter.count if counter else 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(user) for user in users))
+    elapsed = time.perf_counter() - started
+    queries = counter.count - queries_before if counter else None
+    measuring = False
+    await asyncio.gather(*load_tasks, return_exceptions=True)
+    total_requests = len(samples) + background_requests
+
+    ok = [sample for sample in samples if sample.error is None and 0 < sample.status < 400]
+    errors: Dict[str, int] = {}
+    for sample in samples:
+        if sample not in ok:
+            key = str(sample.status or "exception")
+            errors[key] = errors.get(key, 0) + 1
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": summarize([sample.latency for sample in ok]),
+        "ttft_ms": summarize([sample.ttft for sample in ok if sample.ttft is not None]),
+        "inter_chunk_gap_ms": summarize([gap for sample in ok for gap in sample.gaps]),
+        "background_requests": background_requests,
+        "db_queries": queries,
+        "db_queries_per_request": round(queries / total_requests, 2) if queries is not None and total_requests else None,
+    }
+
+
+def prepare_database() -> str:
+    """테이블 생성 후 부하 테스트 사용자의 토큰 반환"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if db.query(User).filter(User.email == LOAD_TEST_EMAIL).first() is None:
+            db.add(User(
+                email=LOAD_TEST_EMAIL,
+                hashed_password=get_password_hash("loadtest-password"),
+                full_name="Load Test",
+                is_active=True,
+            ))
+            db.commit()
+    finally:
+        db.close()
+    return create_access_token(data={"sub": LOAD_TEST_EMAIL})
+
+
+def use_stub_upstream(args) -> None:
+    """서비스의 업스트림 HTTP 클라이언트를 프로세스 내 스텁 서버로 교체"""
+    stub = create_stub_app(StubConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        search_latency_ms=args.search_latency_ms,
+        seed=args.seed,
+    ))
+    transport = StreamingASGITransport(stub)
+    openai_service.client_registry._http_async_client = httpx.AsyncClient(transport=transport)
+    search_service._http_client = httpx.AsyncClient(transport=transport, base_url=settings.TAVILY_BASE_URL)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current: dict, baseline: dict) -> str:
+    """시나리오별 주요 지표 변화율 표"""
+    rows = [f"{'scenario':<22}{'metric':<26}{'baseline':>12}{'current':>12}{'change':>10}"]
+    metrics = [
+        ("throughput_rps", None), ("latency_ms", "p50"), ("latency_ms", "p95"), ("latency_ms", "p99"),
+        ("ttft_ms", "p50"), ("ttft_ms", "p95"), ("inter_chunk_gap_ms", "p95"), ("db_queries_per_request", None),
+    ]
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for metric, key in metrics:
+            before, after = base.get(metric), result.get(metric)
+            if key is not None:
+                before = before.get(key) if before else None
+                after = after.get(key) if after else None
+            if before is None or after is None:
+                continue
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "-"
+            label = f"{metric}.{key}" if key else metric
+            rows.append(f"{name:<22}{label:<26}{before:>12}{after:>12}{change:>10}")
+    return "\n".join(rows)
+
+
+async def main_async(args) -> dict:
+    token = None
+    counter = None
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        token = args.token
+    else:
+        from app.main import app
+
+        token = prepare_database()
+        counter = QueryCounter(engine, async_engine.sync_engine)
+        use_stub_upstream(args)
+        client = httpx.AsyncClient(
+            transport=StreamingASGITransport(app), base_url="http://load-test", timeout=args.timeout
+        )
+    client.headers["Authorization"] = f"Bearer {token}"
+
+    results = {}
+    try:
+        for name in args.scenarios:
+            results[name] = await run_scenario(name, client, args, counter)
+            print(f"{name}: {json.dumps(results[name], ensure_ascii=False)}")
+    finally:
+        await client.aclose()
+        if not args.base_url:
+            await message_persister.aclose()
+            await openai_service.aclose()
+            await search_service.aclose()
+            await async_engine.dispose()
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "database": engine.url.get_backend_name() if not args.base_url else None,
+            "target": args.base_url or "in-process",
+            "args": {key: value for key, value in vars(args).items() if key not in ("token", "compare", "output")},
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=100, help="시나리오별 측정 요청 수")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2, help="측정 전 워밍업 요청 수")
+    parser.add_argument("--turns", type=int, default=5, help="가상 사용자가 한 대화에서 주고받는 횟수")
+    parser.add_argument("--db-load-workers", type=int, default=4, help="chat_stream_db_load의 대화 목록 조회 동시 실행 수")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--max-tokens", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--base-url", default=None, help="실행 중인 서버 주소 (지정하면 프로세스 내 앱/스텁 대신 사용)")
+    parser.add_argument("--token", default=None, help="--base-url 사용 시 인증 토큰")
+    # 프로세스 내 스텁 업스트림 설정
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--completion-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--search-latency-ms", type=float, default=150.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="결과 JSON 파일")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON 파일")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print(compare(report, json.load(f)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""OpenAI / Tavily 호환 로컬 스텁 서버 (부하 테스트용)
+
+실제 API 크레딧 없이 OpenAIService와 SearchService를 부하 테스트할 수 있도록
+Chat Completions(일반/스트리밍)와 Tavily /search를 흉내 냅니다.
+첫 토큰 지연(TTFT), 초당 토큰 수, 오류율, 429 비율을 설정할 수 있고 토큰 사용량을 보고합니다.
+요청에 tools가 있고 아직 툴 결과가 없으면 첫 번째 툴을 호출하여 Agent 경로도 재현합니다.
+
+    cd backend
+    python -m benchmarks.stub_upstream --port 8900 --ttft-ms 400 --tokens-per-sec 60 --rate-limit-rate 0.02
+
+백엔드는 스텁 주소를 바라보도록 실행합니다.
+
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8900/v1 \\
+    TAVILY_API_KEY=stub TAVILY_BASE_URL=http://127.0.0.1:8900 \\
+    uvicorn app.main:app
+"""
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator, List, Optional
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+import zlib
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.services.context_manager import count_message_tokens, TOKENS_PER_REPLY
+
+VOCABULARY = ["스텁", "응답", "토큰", "입니다", "부하", "테스트", "결과", "모델"]
+
+
+@dataclass
+class StubConfig:
+    """스텁 서버 동작 설정 (지연 시간은 jitter 비율만큼 무작위로 흔들림)"""
+    ttft_ms: float = 300.0
+    tokens_per_sec: float = 50.0  # 0이면 지연 없이 전송
+    completion_tokens: int = 120  # 요청의 max_tokens가 더 작으면 그 값 사용
+    error_rate: float = 0.0  # 500 응답 비율
+    rate_limit_rate: float = 0.0  # 429 응답 비율
+    retry_after: float = 1.0
+    search_latency_ms: float = 200.0
+    search_results: int = 5
+    jitter: float = 0.2
+    seed: Optional[int] = None
+
+
+def create_app(config: StubConfig = None) -> FastAPI:
+    """스텁 서버 앱 생성"""
+    config = config or StubConfig()
+    rng = random.Random(config.seed)
+    stats = Counter()
+    app = FastAPI(title="Upstream stub")
+
+    def jittered(ms: float) -> float:
+        if ms <= 0:
+            return 0.0
+        return ms / 1000 * rng.uniform(1 - config.jitter, 1 + config.jitter)
+
+    def injected_failure(kind: str) -> Optional[JSONResponse]:
+        """설정한 비율로 429/500 응답"""
+        roll = rng.random()
+        if roll < config.rate_limit_rate:
+            stats[f"{kind}_rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"Retry-After": str(config.retry_after)},
+                content={"error": {
+                    "message": "Rate limit reached (stub)",
+                    "type": "requests",
+                    "code": "rate_limit_exceeded",
+                }},
+            )
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats[f"{kind}_errors"] += 1
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "Internal error (stub)", "type": "server_error", "code": None}},
+            )
+        return None
+
+    def completion_tokens(body: dict) -> List[str]:
+        limit = body.get("max_completion_tokens") or body.get("max_tokens") or config.completion_tokens
+        count = max(1, min(config.completion_tokens, limit))
+        return [VOCABULARY[i % len(VOCABULARY)] + " " for i in range(count)]
+
+    def pending_tool_call(body: dict) -> Optional[dict]:
+        """툴 결과가 아직 없으면 첫 번째 툴을 마지막 사용자 메시지로 호출"""
+        tools = body.get("tools") or []
+        messages = body.get("messages") or []
+        if not tools or any(msg.get("role") == "tool" for msg in messages):
+            return None
+        query = next((msg.get("content") for msg in reversed(messages) if msg.get("role") == "user"), "")
+        return {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {
+                "name": tools[0]["function"]["name"],
+                "arguments": json.dumps({"query": query if isinstance(query, str) else ""}, ensure_ascii=False),
+            },
+        }
+
+    def usage(body: dict, completion: int) -> dict:
+        model = body.get("model", "gpt-4o-mini")
+        prompt = sum(
+            count_message_tokens({"content": msg.get("content") if isinstance(msg.get("content"), str) else ""}, model)
+            for msg in body.get("messages") or []
+        ) + TOKENS_PER_REPLY
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+    async def stream_chunks(body: dict, completion_id: str, created: int) -> AsyncIterator[str]:
+        def frame(delta: dict, finish_reason: Optional[str] = None) -> str:
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": body.get("model"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }, ensure_ascii=False) + "\n\n"
+
+        stats["active_streams"] += 1
+        try:
+            await asyncio.sleep(jittered(config.ttft_ms))
+            yield frame({"role": "assistant", "content": ""})
+            tool_call = pending_tool_call(body)
+            if tool_call is not None:
+                yield frame({"tool_calls": [{"index": 0, **tool_call}]})
+                yield frame({}, "tool_calls")
+                completion = 16
+            else:
+                tokens = completion_tokens(body)
+                interval = 1 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+                for i, token in enumerate(tokens):
+                    if i and interval:
+                        await asyncio.sleep(interval)
+                    yield frame({"content": token})
+                yield frame({}, "stop")
+                completion = len(tokens)
+            stats["completion_tokens"] += completion
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield "data: " + json.dumps({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": body.get("model"),
+                    "choices": [],
+                    "usage": usage(body, completion),
+                }) + "\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            stats["active_streams"] -= 1
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["chat_requests"] += 1
+        failure = injected_failure("chat")
+        if failure is not None:
+            return failure
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        if body.get("stream"):
+            stats["chat_streams"] += 1
+            return StreamingResponse(
+                stream_chunks(body, completion_id, created),
+                media_type="text/event-stream",
+            )
+
+        tool_call = pending_tool_call(body)
+        if tool_call is not None:
+            await asyncio.sleep(jittered(config.ttft_ms))
+            message = {"role": "assistant", "content": None, "tool_calls": [tool_call]}
+            finish_reason, completion = "tool_calls", 16
+        else:
+            tokens = completion_tokens(body)
+            generation = len(tokens) / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+            await asyncio.sleep(jittered(config.ttft_ms) + generation)
+            message = {"role": "assistant", "content": "".join(tokens).strip()}
+            finish_reason, completion = "stop", len(tokens)
+        stats["completion_tokens"] += completion
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+            "usage": usage(body, completion),
+        }
+
+    @app.post("/search")
+    async def search(request: Request):
+        body = await request.json()
+        stats["search_requests"] += 1
+        failure = injected_failure("search")
+        if failure is not None:
+            return failure
+
+        await asyncio.sleep(jittered(config.search_latency_ms))
+        query = body.get("query", "")
+        count = min(config.search_results, body.get("max_results") or config.search_results)
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": f"{query} - 결과 {i}",
+                    "url": f"https://stub.local/{zlib.crc32(query.encode('utf-8')) % 10000}/{i}",
+                    "content": f"{query}에 대한 스텁 검색 결과 {i}입니다. " * 8,
+                    "score": round(1 - i * 0.1, 2),
+                }
+                for i in range(1, count + 1)
+            ],
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        """스텁 서버 호출 통계와 현재 설정"""
+        return {"config": asdict(config), "stats": dict(stats)}
+
+    return app
+
+
+def main() -> None:
+    defaults = StubConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--ttft-ms", type=float, default=defaults.ttft_ms)
+    parser.add_argument("--tokens-per-sec", type=float, default=defaults.tokens_per_sec)
+    parser.add_argument("--completion-tokens", type=int, default=defaults.completion_tokens)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate)
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after)
+    parser.add_argument("--search-latency-ms", type=float, default=defaults.search_latency_ms)
+    parser.add_argument("--jitter", type=float, default=defaults.jitter)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = StubConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        search_latency_ms=args.search_latency_ms,
+        jitter=args.jitter,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from app.main import app
-from app.core.database import get_db, Base
-from app.core.security import create_access_token
+from app.core.database import get_db, get_async_db, Base
+from app.core.security import create_access_token, get_password_hash
 from app.models.user import User
 from app.core.config import settings
+from app.services.history_service import conversation_history
 
 # 모든 모델을 import하여 Base에 등록
 from app.models import user
@@ -22,6 +24,10 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# API 요청용 비동기 엔진 (같은 파일 DB 사용, 이벤트 루프마다 새 연결)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 @pytest.fixture(scope="function")
 def db():
@@ -33,6 +39,8 @@ def db():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+        # 테이블을 다시 만들면 ID가 재사용되므로 대화 히스토리 캐시도 비움
+        conversation_history.clear()
 
 
 @pytest.fixture(scope="function")
@@ -43,8 +51,13 @@ def client(db):
             yield db
         finally:
             pass
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as async_db:
+            yield async_db
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -53,16 +66,15 @@ def client(db):
 @pytest.fixture
 def test_user(db):
     """테스트용 사용자 생성"""
-    from app.services.auth_service import AuthService
-    from app.schemas.user import UserCreate
-    
-    auth_service = AuthService()
-    user_data = UserCreate(
+    user = User(
         email="test@example.com",
-        password="testpassword123",
-        full_name="Test User"
+        hashed_password=get_password_hash("testpassword123"),
+        full_name="Test User",
+        is_active=True
     )
-    user = auth_service.create_user(db, user_data)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
     return user
 
 
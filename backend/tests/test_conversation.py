@@ -0,0 +1,142 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import status
+from app.models.conversation import Conversation, Message
+
+
+class TestConversationEndpoints:
+    """대화 세션 엔드포인트 테스트"""
+
+    @patch('app.api.api_v1.endpoints.prompt.openai_service')
+    def test_conversation_crud(self, mock_service, client, auth_headers, db):
+        """생성, 목록(메시지 개수/미리보기), 메시지 포함 조회, 제목 변경, 삭제"""
+        mock_service.get_chat_completion = AsyncMock(
+            return_value={"response": "안녕하세요" * 30, "model": "gpt-4o-mini", "usage": None}
+        )
+        response = client.post("/api/v1/conversations/", headers=auth_headers, json={"title": "첫 대화"})
+        assert response.status_code == status.HTTP_201_CREATED
+        created = response.json()
+        assert created["messages"] == []
+
+        response = client.post(
+            "/api/v1/prompt/chat",
+            headers=auth_headers,
+            json={"message": "안녕", "conversation_id": created["id"], "stream": False},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        listed = client.get("/api/v1/conversations/", headers=auth_headers).json()
+        assert [(item["id"], item["message_count"]) for item in listed] == [(created["id"], 2)]
+        assert listed[0]["last_message_preview"] == ("안녕하세요" * 30)[:100]
+        assert listed[0]["last_message_at"] is not None
+
+        detail = client.get(f"/api/v1/conversations/{created['id']}", headers=auth_headers).json()
+        assert [msg["content"] for msg in detail["messages"]] == ["안녕", "안녕하세요" * 30]
+
+        response = client.patch(
+            f"/api/v1/conversations/{created['id']}/title",
+            headers=auth_headers,
+            params={"title": "새 제목"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["title"] == "새 제목"
+        assert len(response.json()["messages"]) == 2
+
+        response = client.delete(f"/api/v1/conversations/{created['id']}", headers=auth_headers)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        db.expire_all()
+        assert db.query(Conversation).count() == 0
+        assert db.query(Message).count() == 0
+
+    def test_list_orders_by_last_activity(self, client, auth_headers, db, test_user):
+        """메시지가 추가된 대화가 목록 맨 위로 이동"""
+        older = Conversation(user_id=test_user.id, title="older")
+        newer = Conversation(user_id=test_user.id, title="newer")
+        db.add(older)
+        db.commit()
+        db.add(newer)
+        db.commit()
+        older.updated_at = datetime(2000, 1, 1)
+        newer.updated_at = datetime(2000, 1, 2)
+        db.commit()
+
+        titles = [item["title"] for item in client.get("/api/v1/conversations/", headers=auth_headers).json()]
+        assert titles == ["newer", "older"]
+
+        db.add(Message(conversation_id=older.id, role="user", content="다시 질문"))
+        older.record_message("다시 질문")
+        db.commit()
+
+        listed = client.get("/api/v1/conversations/", headers=auth_headers).json()
+        assert [item["title"] for item in listed] == ["older", "newer"]
+        assert listed[0]["message_count"] == 1
+        assert listed[0]["last_message_preview"] == "다시 질문"
+
+    def test_keyset_pagination(self, client, auth_headers, db, test_user):
+        """(updated_at, id) 커서로 대화 목록, (created_at, id) 커서로 메시지 페이지 조회"""
+        # 같은 시간이 섞여 있어도 id로 순서가 결정되어야 함
+        times = [datetime(2024, 1, 1, 0, 0, i // 2) for i in range(5)]
+        conversations = [Conversation(user_id=test_user.id, title=f"c{i}") for i in range(5)]
+        db.add_all(conversations)
+        db.commit()
+        for conv, updated_at in zip(conversations, times):
+            conv.updated_at = updated_at
+        db.add_all([
+            Message(conversation_id=conversations[0].id, role="user", content=f"m{i}", created_at=updated_at)
+            for i, updated_at in enumerate(times)
+        ])
+        db.commit()
+
+        titles, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/v1/conversations/", headers=auth_headers, params=params)
+            titles += [item["title"] for item in response.json()]
+            cursor = response.headers.get("x-next-cursor")
+            if cursor is None:
+                break
+        assert titles == ["c4", "c3", "c2", "c1", "c0"]
+
+        url = f"/api/v1/conversations/{conversations[0].id}"
+        response = client.get(url, headers=auth_headers, params={"message_limit": 2})
+        assert [msg["content"] for msg in response.json()["messages"]] == ["m3", "m4"]
+        response = client.get(
+            f"{url}/messages", headers=auth_headers, params={"limit": 2, "cursor": response.headers["x-next-cursor"]}
+        )
+        assert [msg["content"] for msg in response.json()] == ["m1", "m2"]
+        response = client.get(
+            f"{url}/messages", headers=auth_headers, params={"limit": 2, "cursor": response.headers["x-next-cursor"]}
+        )
+        assert [msg["content"] for msg in response.json()] == ["m0"]
+        assert "x-next-cursor" not in response.headers
+
+        response = client.get("/api/v1/conversations/", headers=auth_headers, params={"cursor": "not-a-cursor"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_keyset_pagination_with_default_timestamps(self, client, auth_headers, db, test_user):
+        """기본값으로 채워진 시각이 모두 같아도 중복/누락 없이 페이지 조회"""
+        frozen = MagicMock(wraps=datetime)
+        frozen.utcnow.return_value = datetime(2024, 1, 1, 12, 0, 0, 123456)
+        with patch("app.models.conversation.datetime", frozen):
+            conversations = [Conversation(user_id=test_user.id, title=f"c{i}") for i in range(5)]
+            db.add_all(conversations)
+            db.commit()
+            for conv in conversations:
+                conv.record_message("질문")
+            db.add_all([Message(conversation_id=conversations[0].id, role="user", content=f"m{i}") for i in range(5)])
+            db.commit()
+
+        def pages(url):
+            items, cursor = [], None
+            for _ in range(5):
+                params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+                response = client.get(url, headers=auth_headers, params=params)
+                items.append([item.get("title") or item.get("content") for item in response.json()])
+                cursor = response.headers.get("x-next-cursor")
+                if cursor is None:
+                    break
+            return items
+
+        assert pages("/api/v1/conversations/") == [["c4", "c3"], ["c2", "c1"], ["c0"]]
+        url = f"/api/v1/conversations/{conversations[0].id}/messages"
+        assert pages(url) == [["m3", "m4"], ["m1", "m2"], ["m0"]]
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from app.models.conversation import Conversation, Message
+from app.services.message_persister import MessagePersister, message_persister
+from tests.conftest import TestingAsyncSessionLocal, async_engine
+
+
+class TestMessagePersister:
+    """메시지 쓰기 지연(write-behind) 저장 테스트"""
+
+    def test_batches_and_summaries(self, db, test_user):
+        """크기/시간 조건에서 한 트랜잭션으로 저장하고 대화 요약 컬럼을 대화별로 갱신"""
+        conversations = [Conversation(user_id=test_user.id, title=f"c{i}") for i in range(2)]
+        db.add_all(conversations)
+        db.commit()
+        first, second = (conv.id for conv in conversations)
+        persister = MessagePersister(
+            session_factory=TestingAsyncSessionLocal, enabled=True, batch_size=3, flush_interval=0.05
+        )
+        commits = []
+
+        def record(conn):
+            commits.append(conn)
+
+        event.listen(async_engine.sync_engine, "commit", record)
+
+        async def scenario():
+            persister.enqueue(first, test_user.id, "user", "질문 1")
+            persister.enqueue(second, test_user.id, "user", "질문 2")
+            assert persister.has_pending(conversation_id=first)
+            persister.enqueue(first, test_user.id, "assistant", "답변 1")  # batch_size 도달
+            await asyncio.sleep(0.01)
+            after_size_trigger = persister.stats()["pending"]
+            persister.enqueue(second, test_user.id, "assistant", "답변 2")
+            await asyncio.sleep(0.2)  # flush_interval 경과
+            return after_size_trigger
+
+        try:
+            assert asyncio.run(scenario()) == 0
+        finally:
+            event.remove(async_engine.sync_engine, "commit", record)
+        assert persister.stats()["flushes"] == 2
+        assert persister.stats()["flushed_messages"] == 4
+        # 배치마다 커밋 한 번
+        assert len(commits) == 2
+
+        db.expire_all()
+        rows = db.query(Message).order_by(Message.id).all()
+        assert [(row.conversation_id, row.content) for row in rows] == [
+            (first, "질문 1"), (second, "질문 2"), (first, "답변 1"), (second, "답변 2")
+        ]
+        first_conv = db.get(Conversation, first)
+        assert (first_conv.message_count, first_conv.last_message_preview) == (2, "답변 1")
+        assert first_conv.last_message_at is not None
+
+    def test_outage_longer_than_retry_window(self, db, test_user):
+        """DB 장애가 재시도 간격보다 길어도 메시지를 버리지 않고, 대기열이 가득 차면 저장 요청이 대기"""
+        conversation = Conversation(user_id=test_user.id, title="장애")
+        db.add(conversation)
+        db.commit()
+        down_until = time.monotonic() + 0.5
+
+        def flaky_session_factory():
+            if time.monotonic() < down_until:
+                raise OperationalError("INSERT", {}, ConnectionRefusedError("database is down"))
+            return TestingAsyncSessionLocal()
+
+        persister = MessagePersister(
+            session_factory=flaky_session_factory,
+            enabled=True,
+            batch_size=2,
+            flush_interval=0.01,
+            retry_base_delay=0.01,
+            retry_max_delay=0.05,
+            max_pending=3,
+        )
+
+        async def scenario():
+            for i in range(3):
+                await persister.save(None, conversation, test_user.id, "user", f"메시지 {i}")
+            blocked = asyncio.ensure_future(
+                persister.save(None, conversation, test_user.id, "user", "메시지 3")
+            )
+            await asyncio.sleep(0.2)
+            assert not blocked.done()  # 대기열이 가득 차 자리가 날 때까지 대기
+            await blocked
+            await persister.aclose()
+
+        asyncio.run(scenario())
+        stats = persister.stats()
+        assert stats["failures"] >= 5  # 예전 재시도 한도(3회)를 넘는 실패
+        assert stats["backpressure_waits"] == 1
+        assert stats["pending"] == 0
+        assert stats["flushed_messages"] == 4
+
+        db.expire_all()
+        rows = db.query(Message).filter(Message.conversation_id == conversation.id).order_by(Message.id).all()
+        assert [row.content for row in rows] == [f"메시지 {i}" for i in range(4)]
+        assert db.get(Conversation, conversation.id).message_count == 4
+
+    @patch('app.api.api_v1.endpoints.prompt.openai_service')
+    def test_read_your_writes(self, mock_service, client, auth_headers, monkeypatch):
+        """요청 경로에서 커밋하지 않아도 이어지는 대화/조회에서 방금 쓴 메시지가 보임"""
+        monkeypatch.setattr(message_persister, "enabled", True)
+        monkeypatch.setattr(message_persister, "session_factory", TestingAsyncSessionLocal)
+        monkeypatch.setattr(message_persister, "flush_interval", 60.0)  # 시간 조건으로는 플러시되지 않도록
+        mock_service.get_chat_completion = AsyncMock(
+            return_value={"response": "첫 답변", "model": "gpt-4o-mini", "usage": None}
+        )
+
+        first = client.post(
+            "/api/v1/prompt/chat", headers=auth_headers, json={"message": "첫 질문", "stream": False}
+        ).json()
+        assert message_persister.has_pending(conversation_id=first["conversation_id"])
+
+        client.post(
+            "/api/v1/prompt/chat",
+            headers=auth_headers,
+            json={"message": "두 번째 질문", "conversation_id": first["conversation_id"], "stream": False},
+        )
+        history = mock_service.get_chat_completion.call_args.kwargs["messages"]
+        assert [msg["content"] for msg in history] == ["첫 질문", "첫 답변", "두 번째 질문"]
+
+        detail = client.get(f"/api/v1/conversations/{first['conversation_id']}", headers=auth_headers).json()
+        assert [msg["content"] for msg in detail["messages"]] == ["첫 질문", "첫 답변", "두 번째 질문", "첫 답변"]
+        listed = client.get("/api/v1/conversations/", headers=auth_headers).json()
+        assert listed[0]["message_count"] == 4
+        assert not message_persister.has_pending()
@@ -0,0 +1,72 @@
+import asyncio
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.core.metrics import instrument_session_commits, observe_llm_stream
+
+
+def sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+class TestMetrics:
+    """Prometheus 메트릭 테스트"""
+
+    def test_route_and_auth_histograms(self, client, auth_headers):
+        """라우트 템플릿별 요청 시간과 인증 단계별 시간 기록"""
+        route_labels = {"method": "GET", "route": "/api/v1/conversations/{conversation_id}", "status": "404"}
+        before_route = sample("http_request_duration_seconds_count", route_labels)
+        before_lookup = sample("auth_duration_seconds_count", {"stage": "user_lookup"})
+
+        client.get("/api/v1/conversations/999", headers=auth_headers)
+
+        assert sample("http_request_duration_seconds_count", route_labels) == before_route + 1
+        assert sample("auth_duration_seconds_count", {"stage": "user_lookup"}) == before_lookup + 1
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert "http_request_duration_seconds_bucket" in response.text
+
+    def test_commit_and_stream_metrics(self):
+        """DB 커밋 시간과 LLM 스트림 첫 청크/전체 시간, 진행 중인 스트림 수 기록"""
+        session_factory = sessionmaker(bind=create_engine("sqlite://"))
+        instrument_session_commits(session_factory)
+        before_commits = sample("db_commit_duration_seconds_count")
+        session = session_factory()
+        session.execute(text("SELECT 1"))
+        session.commit()
+        session.close()
+        assert sample("db_commit_duration_seconds_count") == before_commits + 1
+
+        labels = {"model": "metrics-test-model"}
+        active = []
+
+        async def fake_stream():
+            for token in ["a", "b"]:
+                active.append(sample("llm_active_streams", labels))
+                yield token
+
+        async def consume():
+            return [chunk async for chunk in observe_llm_stream("metrics-test-model", fake_stream())]
+
+        assert asyncio.run(consume()) == ["a", "b"]
+        assert active == [1.0, 1.0]
+        assert sample("llm_active_streams", labels) == 0.0
+        assert sample("llm_time_to_first_token_seconds_count", labels) == 1
+        assert sample("llm_stream_duration_seconds_count", labels) == 1
+
+    def test_stats_endpoints(self, client, auth_headers):
+        """캐시/검색/클라이언트 통계를 모델 통계 엔드포인트로 노출"""
+        caches = client.get("/api/v1/models/caches", headers=auth_headers)
+        assert caches.status_code == 200
+        assert {"response", "semantic", "single_flight"} <= caches.json().keys()
+        assert "hit_rate" in caches.json()["semantic"]
+
+        search = client.get("/api/v1/models/search", headers=auth_headers).json()
+        assert "avg_queue_wait_ms" in search["calls"]
+        assert "hit_rate" in search["cache"]
+
+        clients = client.get("/api/v1/models/clients", headers=auth_headers).json()
+        assert "agent_executors" in clients
+
+        assert client.get("/api/v1/models/caches").status_code in (401, 403)
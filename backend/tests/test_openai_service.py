@@ -1,23 +1,26 @@
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from app.services.openai_service import OpenAIService
 from app.core.config import settings
 
 
+@pytest.fixture
+def mock_openai_key(monkeypatch):
+    """OpenAI API 키 모킹"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-api-key")
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test-api-key")
+
+
+@pytest.fixture
+def service(mock_openai_key):
+    """OpenAI 서비스 인스턴스"""
+    return OpenAIService()
+
+
 class TestOpenAIService:
     """OpenAI 서비스 테스트"""
     
-    @pytest.fixture
-    def mock_openai_key(self, monkeypatch):
-        """OpenAI API 키 모킹"""
-        monkeypatch.setenv("OPENAI_API_KEY", "test-api-key")
-        monkeypatch.setattr(settings, "OPENAI_API_KEY", "test-api-key")
-    
-    @pytest.fixture
-    def service(self, mock_openai_key):
-        """OpenAI 서비스 인스턴스"""
-        return OpenAIService()
-    
     def test_init_without_api_key(self, monkeypatch):
         """API 키 없이 초기화 시 에러"""
         monkeypatch.setattr(settings, "OPENAI_API_KEY", "")
@@ -25,7 +28,7 @@ class TestOpenAIService:
             OpenAIService()
     
     @patch('app.services.openai_service.ChatOpenAI')
-    def test_get_completion(self, mock_chat_openai, service):
+    async def test_get_completion(self, mock_chat_openai, service):
         """get_completion 메서드 테스트"""
         # Mock ChatOpenAI 인스턴스
         mock_llm = MagicMock()
@@ -40,8 +43,7 @@ class TestOpenAIService:
         mock_llm.ainvoke = AsyncMock(return_value=mock_response)
         mock_chat_openai.return_value = mock_llm
         
-        import asyncio
-        result = asyncio.run(service.get_completion("테스트 메시지"))
+        result = await service.get_completion("테스트 메시지")
         
         assert result["response"] == "테스트 응답"
         assert result["model"] == "gpt-4o-mini"
@@ -49,7 +51,7 @@ class TestOpenAIService:
         mock_llm.ainvoke.assert_called_once()
     
     @patch('app.services.openai_service.ChatOpenAI')
-    def test_get_chat_completion(self, mock_chat_openai, service):
+    async def test_get_chat_completion(self, mock_chat_openai, service):
         """get_chat_completion 메서드 테스트"""
         # Mock ChatOpenAI 인스턴스
         mock_llm = MagicMock()
@@ -64,12 +66,11 @@ class TestOpenAIService:
         mock_llm.ainvoke = AsyncMock(return_value=mock_response)
         mock_chat_openai.return_value = mock_llm
         
-        import asyncio
         messages = [
             {"role": "user", "content": "안녕하세요"},
             {"role": "assistant", "content": "안녕하세요!"}
         ]
-        result = asyncio.run(service.get_chat_completion(messages))
+        result = await service.get_chat_completion(messages)
         
         assert result["response"] == "채팅 응답"
         assert result["model"] == "gpt-4o-mini"
@@ -94,3 +95,711 @@ class TestOpenAIService:
         assert result[0].content == "사용자 메시지"
         assert result[1].content == "어시스턴트 메시지"
         assert result[2].content == "시스템 메시지"
+    
+    @patch('app.services.openai_service.ChatOpenAI')
+    def test_llm_client_reused(self, mock_chat_openai, service):
+        """동일한 파라미터 형태의 LLM 클라이언트 재사용 테스트"""
+        mock_chat_openai.side_effect = lambda **kwargs: MagicMock()
+        
+        llm1 = service._create_llm(model="gpt-4o-mini", temperature=0.7, max_tokens=1000)
+        llm2 = service._create_llm(model="gpt-4o-mini", temperature=0.7, max_tokens=1000)
+        llm3 = service._create_llm(model="gpt-4o-mini", temperature=0.7, max_tokens=1000, streaming=True)
+        
+        assert llm1 is llm2
+        assert llm1 is not llm3
+        assert mock_chat_openai.call_count == 2
+        
+        # 모든 인스턴스가 하나의 HTTP 클라이언트를 공유
+        http_clients = {id(call.kwargs["http_async_client"]) for call in mock_chat_openai.call_args_list}
+        assert len(http_clients) == 1
+        
+        stats = service.get_client_stats()
+        assert stats["created"] == 2
+        assert stats["reused"] == 1
+        assert stats["pool"]["max_connections"] == settings.OPENAI_MAX_CONNECTIONS
+    
+    @patch('app.services.openai_service.create_openai_tools_agent')
+    @patch('app.services.openai_service.AgentExecutor')
+    def test_agent_executor_reused(self, mock_executor, mock_create_agent, service):
+        """같은 모델/파라미터/툴 구성의 Agent 실행기는 한 번만 생성"""
+        mock_executor.side_effect = lambda **kwargs: MagicMock()
+        tool = MagicMock()
+        tool.name = "tavily_search_results_json"
+        
+        executor1 = service._build_agent_executor("gpt-4o-mini", 0.7, 1000, [tool], streaming=True)
+        executor2 = service._build_agent_executor("gpt-4o-mini", 0.7, 1000, [tool], streaming=True)
+        executor3 = service._build_agent_executor("gpt-4o-mini", 0.7, 1000, [tool], streaming=False)
+        
+        assert executor1 is executor2
+        assert executor1 is not executor3
+        assert mock_create_agent.call_count == 2
+        assert service.get_client_stats()["agent_executors"]["reused"] == 1
+    
+    @patch('app.services.openai_service.ChatOpenAI')
+    async def test_chat_completion_cache_hit(self, mock_chat_openai, service):
+        """temperature 0 요청은 응답 캐시에서 재사용"""
+        mock_llm = MagicMock()
+        mock_response = MagicMock()
+        mock_response.content = "캐시될 응답"
+        mock_response.response_metadata = MagicMock()
+        mock_response.response_metadata.token_usage = {"total_tokens": 10}
+        mock_llm.ainvoke = AsyncMock(return_value=mock_response)
+        mock_chat_openai.return_value = mock_llm
+        
+        messages = [{"role": "user", "content": "자주 묻는 질문"}]
+        first = await service.get_chat_completion(messages, temperature=0)
+        second = await service.get_chat_completion(
+            [{"role": "user", "content": "  자주 묻는 질문 "}], temperature=0
+        )
+        
+        assert first["response"] == second["response"] == "캐시될 응답"
+        mock_llm.ainvoke.assert_called_once()
+        # 캐시 적중은 토큰을 쓰지 않으므로 사용량을 중복 집계하지 않음
+        assert first["usage"]["total_tokens"] == 10
+        assert second["usage"] == {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cached": True}
+        assert service.response_cache.stats()["hits"] == 1
+        
+        # 캐시 히트 시 스트리밍은 캐시된 텍스트를 청크로 재생
+        chunks = [chunk async for chunk in service.stream_chat_completion(messages, temperature=0)]
+        assert "".join(chunks) == "캐시될 응답"
+        mock_llm.astream.assert_not_called()
+    
+    @patch('app.services.openai_service.ChatOpenAI')
+    async def test_chat_completion_not_cached_by_default(self, mock_chat_openai, service):
+        """temperature가 0이 아니고 use_cache가 없으면 캐시하지 않음"""
+        mock_llm = MagicMock()
+        mock_response = MagicMock()
+        mock_response.content = "응답"
+        mock_llm.ainvoke = AsyncMock(return_value=mock_response)
+        mock_chat_openai.return_value = mock_llm
+        
+        messages = [{"role": "user", "content": "질문"}]
+        await service.get_chat_completion(messages, temperature=0.7)
+        await service.get_chat_completion(messages, temperature=0.7)
+        assert mock_llm.ainvoke.call_count == 2
+        
+        await service.get_chat_completion(messages, temperature=0.7, use_cache=True)
+        await service.get_chat_completion(messages, temperature=0.7, use_cache=True)
+        assert mock_llm.ainvoke.call_count == 3
+
+
+class TestResponseCache:
+    """응답 캐시 테스트"""
+    
+    def test_lru_eviction(self):
+        """최대 개수 초과 시 가장 오래 사용되지 않은 항목 제거"""
+        from app.services.response_cache import ResponseCache
+        cache = ResponseCache(max_entries=2, enabled=True)
+        cache.set("a", {"response": "A"})
+        cache.set("b", {"response": "B"})
+        assert cache.get("a") is not None  # a를 최근 사용으로 갱신
+        cache.set("c", {"response": "C"})
+        
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
+    
+    def test_ttl_and_memory_cap(self, monkeypatch):
+        """TTL 만료 및 메모리 상한 적용"""
+        from app.services import response_cache
+        cache = response_cache.ResponseCache(ttl_seconds=10, max_bytes=100, enabled=True)
+        
+        now = [1000.0]
+        monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+        cache.set("a", {"response": "A"})
+        now[0] += 11
+        assert cache.get("a") is None
+        
+        cache.set("big", {"response": "x" * 200})
+        assert cache.get("big") is None
+        assert cache.stats()["bytes"] == 0
+    
+    def test_explicit_zero_limits(self):
+        """0으로 지정한 한도는 설정 기본값으로 바뀌지 않음"""
+        from app.services.response_cache import ResponseCache
+        from app.services.semantic_cache import SemanticCache
+        cache = ResponseCache(max_entries=0, ttl_seconds=0, enabled=True)
+        assert (cache.max_entries, cache.ttl_seconds) == (0, 0)
+        cache.set("a", {"response": "A"})
+        assert cache.get("a") is None
+        
+        semantic = SemanticCache(capacity=0, threshold=0, enabled=True)
+        assert (semantic.capacity, semantic.threshold) == (0, 0)
+        semantic.set("질문", "gpt-4o-mini", 0, 100, {"response": "A"})
+        assert semantic.get("질문", "gpt-4o-mini", 0, 100) is None
+
+
+class TestSemanticCache:
+    """유사 프롬프트 캐시 테스트"""
+    
+    def test_paraphrase_hit_and_unrelated_miss(self):
+        """표현이 조금 다른 질문은 히트, 무관한 질문은 미스"""
+        from app.services.semantic_cache import SemanticCache
+        cache = SemanticCache(capacity=8, threshold=0.8, enabled=True)
+        cache.set("비밀번호를 어떻게 변경하나요?", "gpt-4o-mini", 0.7, 1000, {"response": "설정 메뉴에서 변경하세요."})
+        
+        hit = cache.get("비밀번호를 어떻게 변경하나요", "gpt-4o-mini", 0.7, 1000)
+        assert hit is not None
+        assert hit["response"] == "설정 메뉴에서 변경하세요."
+        
+        assert cache.get("오늘 서울 날씨 알려줘", "gpt-4o-mini", 0.7, 1000) is None
+        # 다른 모델/파라미터 조합에서는 검색하지 않음
+        assert cache.get("비밀번호를 어떻게 변경하나요?", "gpt-4o", 0.7, 1000) is None
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["avg_lookup_ms"] >= 0
+    
+    def test_bounded_eviction(self):
+        """용량을 넘으면 가장 오래 사용되지 않은 항목을 덮어씀"""
+        from app.services.semantic_cache import SemanticCache
+        cache = SemanticCache(capacity=2, threshold=0.99, enabled=True)
+        cache.set("첫 번째 질문", "gpt-4o-mini", 0.7, 1000, {"response": "1"})
+        cache.set("두 번째 질문", "gpt-4o-mini", 0.7, 1000, {"response": "2"})
+        cache.set("세 번째 질문", "gpt-4o-mini", 0.7, 1000, {"response": "3"})
+        
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
+        assert cache.get("첫 번째 질문", "gpt-4o-mini", 0.7, 1000) is None
+        assert cache.get("세 번째 질문", "gpt-4o-mini", 0.7, 1000)["response"] == "3"
+
+    def test_shared_history_different_question_misses(self):
+        """이전 대화가 같아도 마지막 질문이 다르면 미스, 이전 대화가 다르면 같은 질문도 미스"""
+        from app.services.semantic_cache import SemanticCache
+        cache = SemanticCache(capacity=8, threshold=0.9, enabled=True)
+        history = [
+            {"role": "system", "content": "당신은 여행 안내원입니다. " * 20},
+            {"role": "user", "content": "다음 달에 일본 여행을 가려고 하는데 일정을 짜 주세요. " * 5},
+            {"role": "assistant", "content": "도쿄와 오사카를 중심으로 5일 일정을 추천드립니다. " * 10},
+        ]
+        first = history + [{"role": "user", "content": "숙소는 어디가 좋을까요?"}]
+        second = history + [{"role": "user", "content": "환전은 어떻게 하나요?"}]
+        context, text = SemanticCache.key_for(first)
+        cache.set(text, "gpt-4o-mini", 0.7, 1000, {"response": "신주쿠 근처를 추천합니다."}, context=context)
+
+        context, text = SemanticCache.key_for(second)
+        assert cache.get(text, "gpt-4o-mini", 0.7, 1000, context=context) is None
+
+        other_reply = history[:2] + [{"role": "assistant", "content": "유럽 일정을 추천드립니다."}] + first[-1:]
+        context, text = SemanticCache.key_for(other_reply)
+        assert cache.get(text, "gpt-4o-mini", 0.7, 1000, context=context) is None
+
+        context, text = SemanticCache.key_for(first)
+        assert cache.get(text, "gpt-4o-mini", 0.7, 1000, context=context)["response"] == "신주쿠 근처를 추천합니다."
+
+    def test_namespaces_bounded(self):
+        """조회만으로는 네임스페이스가 늘지 않고, 저장 시에도 용량까지만 유지"""
+        from app.services.semantic_cache import SemanticCache
+        cache = SemanticCache(capacity=2, threshold=0.9, enabled=True)
+        for max_tokens in range(100):
+            assert cache.get("질문", "gpt-4o-mini", 0.7, max_tokens) is None
+        assert cache.stats()["namespaces"] == 0
+
+        for max_tokens in range(5):
+            cache.set("질문", "gpt-4o-mini", 0.7, max_tokens, {"response": str(max_tokens)})
+        assert cache.stats()["namespaces"] == 2
+        assert cache.stats()["entries"] == 2
+        assert cache.get("질문", "gpt-4o-mini", 0.7, 0) is None
+        assert cache.get("질문", "gpt-4o-mini", 0.7, 4)["response"] == "4"
+
+
+class TestSingleFlight:
+    """동시 요청 병합 테스트"""
+    
+    @patch('app.services.openai_service.ChatOpenAI')
+    async def test_concurrent_identical_requests_share_one_call(self, mock_chat_openai, service):
+        """동시에 들어온 동일한 요청은 업스트림을 한 번만 호출"""
+        mock_response = MagicMock()
+        mock_response.content = "공유된 응답"
+        
+        async def slow_ainvoke(_):
+            await asyncio.sleep(0.05)
+            return mock_response
+        
+        mock_llm = MagicMock()
+        mock_llm.ainvoke = AsyncMock(side_effect=slow_ainvoke)
+        mock_chat_openai.return_value = mock_llm
+        
+        messages = [{"role": "user", "content": "공통 템플릿 질문"}]
+        
+        results = await asyncio.gather(*[
+            service.get_chat_completion(messages, temperature=0.7) for _ in range(5)
+        ])
+        
+        assert mock_llm.ainvoke.call_count == 1
+        assert all(result["response"] == "공유된 응답" for result in results)
+        # 호출자별로 독립된 결과 객체
+        assert len({id(result) for result in results}) == 5
+        assert service.single_flight.stats()["coalesced"] == 4
+    
+    async def test_stream_fan_out_with_replay(self):
+        """늦게 합류한 소비자도 놓친 청크부터 모두 수신"""
+        from app.services.single_flight import SingleFlight
+        
+        single_flight = SingleFlight()
+        source_calls = []
+        
+        async def source():
+            source_calls.append(1)
+            for chunk in ["가", "나", "다", "라"]:
+                await asyncio.sleep(0.01)
+                yield chunk
+        
+        async def consume(delay):
+            await asyncio.sleep(delay)
+            return [chunk async for chunk in single_flight.stream("key", source)]
+        
+        first, late = await asyncio.gather(consume(0), consume(0.025))
+        
+        assert first == ["가", "나", "다", "라"]
+        assert late == ["가", "나", "다", "라"]
+        assert len(source_calls) == 1
+
+
+class TestContextWindowManager:
+    """컨텍스트 윈도우 관리 테스트"""
+    
+    def test_fits_without_trimming(self):
+        """예산 안에 들어가면 그대로 유지"""
+        from app.services.context_manager import ContextWindowManager
+        messages = [
+            {"role": "system", "content": "시스템"},
+            {"role": "user", "content": "안녕하세요"}
+        ]
+        fitted, stats = ContextWindowManager().fit(messages, "gpt-4o-mini", 1000)
+        
+        assert fitted == messages
+        assert stats["trimmed_tokens"] == 0
+        assert stats["trimmed_messages"] == 0
+    
+    def test_trims_oldest_turns_and_keeps_system(self, monkeypatch):
+        """오래된 메시지부터 제외하고 시스템 메시지는 유지"""
+        from app.constants import models
+        from app.services.context_manager import ContextWindowManager, count_message_tokens
+        
+        messages = [{"role": "system", "content": "당신은 도우미입니다."}]
+        for i in range(10):
+            messages.append({"role": "user", "content": f"질문 {i} " + "내용 " * 20})
+            messages.append({"role": "assistant", "content": f"답변 {i} " + "내용 " * 20})
+        messages.append({"role": "user", "content": "마지막 질문"})
+        
+        manager = ContextWindowManager(safety_margin=0)
+        # 시스템 메시지 + 최근 3개 메시지만 들어가는 크기로 컨텍스트 윈도우 설정
+        keep = [messages[0]] + messages[-3:]
+        window = sum(count_message_tokens(m, "gpt-4o-mini") for m in keep) + 100 + 3
+        monkeypatch.setitem(models.MODEL_CONTEXT_WINDOWS, "gpt-4o-mini", window)
+        
+        fitted, stats = manager.fit(messages, "gpt-4o-mini", 100)
+        
+        assert fitted == keep
+        assert stats["trimmed_messages"] == len(messages) - 4
+        assert stats["trimmed_tokens"] > 0
+        assert stats["input_tokens"] <= stats["budget"]
+    
+    def test_last_message_too_long(self, monkeypatch):
+        """마지막 메시지조차 들어가지 않으면 ValueError"""
+        from app.constants import models
+        from app.services.context_manager import ContextWindowManager
+        
+        monkeypatch.setitem(models.MODEL_CONTEXT_WINDOWS, "gpt-4o-mini", 200)
+        with pytest.raises(ValueError, match="컨텍스트 윈도우"):
+            ContextWindowManager(safety_margin=0).fit(
+                [{"role": "user", "content": "긴 메시지 " * 200}], "gpt-4o-mini", 100
+            )
+
+    def test_token_count_cache_keeps_hashes_only(self, monkeypatch):
+        """토큰 수 캐시는 원문 대신 해시를 키로 쓰고 크기가 제한됨"""
+        from app.services import context_manager
+
+        monkeypatch.setattr(context_manager, "TOKEN_COUNT_CACHE_SIZE", 3)
+        monkeypatch.setattr(context_manager, "_token_counts", context_manager.OrderedDict())
+        texts = [f"메시지 {i} " * 100 for i in range(5)]
+        counts = [context_manager.count_tokens(text, "gpt-4o-mini") for text in texts]
+
+        assert len(context_manager._token_counts) == 3
+        assert all(len(digest) == 16 for digest, _ in context_manager._token_counts)
+        assert [context_manager.count_tokens(text, "gpt-4o-mini") for text in texts] == counts
+
+
+class TestSearchStreaming:
+    """검색 포함 스트리밍 테스트"""
+    
+    async def test_agent_stream_emits_tool_events_and_tokens(self, service, monkeypatch):
+        """검색 툴 진행 이벤트 후 최종 답변 토큰을 도착하는 대로 전달"""
+        from app.services import openai_service as module
+        
+        async def fake_events(agent_input, version):
+            assert agent_input["input"] == "오늘 뉴스 알려줘"
+            yield {"event": "on_chat_model_stream", "data": {"chunk": MagicMock(content="")}}
+            yield {"event": "on_tool_start", "name": "tavily_search_results_json", "data": {}}
+            yield {"event": "on_tool_end", "name": "tavily_search_results_json", "data": {}}
+            for token in ["오늘의", " 뉴스", "입니다"]:
+                yield {"event": "on_chat_model_stream", "data": {"chunk": MagicMock(content=token)}}
+        
+        fake_executor = MagicMock()
+        fake_executor.astream_events = fake_events
+        monkeypatch.setattr(module.search_service, "is_enabled", True)
+        monkeypatch.setattr(module.search_service, "get_tools", lambda: [MagicMock()])
+        monkeypatch.setattr(service, "_build_agent_executor", lambda *args, **kwargs: fake_executor)
+        
+        chunks = [
+            chunk async for chunk in service.stream_chat_completion(
+                [{"role": "user", "content": "오늘 뉴스 알려줘"}], use_search=True
+            )
+        ]
+        
+        events = [chunk for chunk in chunks if isinstance(chunk, module.StreamEvent)]
+        texts = [chunk for chunk in chunks if isinstance(chunk, str)]
+        assert [event.data["status"] for event in events] == ["running", "done"]
+        assert texts == ["오늘의", " 뉴스", "입니다"]
+        # 툴 이벤트가 답변 토큰보다 먼저 전달됨
+        assert isinstance(chunks[0], module.StreamEvent)
+    
+    async def test_pipelined_search_skips_agent(self, service, monkeypatch):
+        """파이프라인 모드에서는 Agent 없이 미리 시작한 검색 결과를 포함하여 스트리밍"""
+        from app.services import openai_service as module
+        
+        monkeypatch.setattr(settings, "SEARCH_PIPELINED", True)
+        monkeypatch.setattr(module.search_service, "is_enabled", True)
+        monkeypatch.setattr(service, "_build_agent_executor", MagicMock(side_effect=AssertionError))
+        budgets = []
+        
+        async def fake_search(query, budget):
+            budgets.append((query, budget))
+            return [{"url": "https://example.com", "content": "검색 결과"}]
+        
+        monkeypatch.setattr(module.search_service, "search_within_budget", fake_search)
+        seen = []
+        
+        async def fake_stream(llm_input, model, temperature, max_tokens, user_id=None):
+            seen.extend(llm_input)
+            yield "답변"
+        
+        monkeypatch.setattr(service, "_stream_llm", fake_stream)
+        
+        chunks = [
+            chunk async for chunk in service.stream_chat_completion(
+                [{"role": "user", "content": "오늘 뉴스 알려줘"}], use_search=True
+            )
+        ]
+        assert chunks[-1] == "답변"
+        assert budgets == [("오늘 뉴스 알려줘", settings.SEARCH_BUDGET_SECONDS)]
+        assert "검색 결과" in seen[0].content
+    
+    async def test_pipelined_search_refits_context(self, service, monkeypatch):
+        """검색 결과를 더한 뒤에도 컨텍스트 윈도우 예산 안에 들어가도록 오래된 대화를 제외"""
+        from app.constants import models
+        from app.services import openai_service as module
+        from app.services.context_manager import context_window_manager, count_message_tokens
+        
+        monkeypatch.setattr(settings, "SEARCH_PIPELINED", True)
+        monkeypatch.setitem(models.MODEL_CONTEXT_WINDOWS, "gpt-4o-mini", 2000)
+        monkeypatch.setattr(module.search_service, "is_enabled", True)
+        
+        async def fake_search(query, budget):
+            return [{"url": "https://example.com", "content": "검색 결과 " * 200}]
+        
+        monkeypatch.setattr(module.search_service, "search_within_budget", fake_search)
+        seen = []
+        
+        async def fake_stream(llm_input, model, temperature, max_tokens, user_id=None):
+            seen.extend(llm_input)
+            yield "답변"
+        
+        monkeypatch.setattr(service, "_stream_llm", fake_stream)
+        history = [
+            {"role": "system", "content": "친절하게 답변하세요."},
+            *[
+                {"role": role, "content": f"{i}번째 대화 " * 30}
+                for i in range(8) for role in ("user", "assistant")
+            ],
+            {"role": "user", "content": "오늘 뉴스 알려줘"},
+        ]
+        
+        async for _ in service.stream_chat_completion(history, max_tokens=500, use_search=True):
+            pass
+        assert "검색 결과" in seen[0].content
+        assert seen[-1].content == "오늘 뉴스 알려줘"
+        sent = [{"content": message.content} for message in seen]
+        budget = context_window_manager.get_budget("gpt-4o-mini", 500)
+        assert sum(count_message_tokens(message, "gpt-4o-mini") for message in sent) <= budget
+    
+    def test_prepare_agent_input_keeps_previous_user_turns(self, service):
+        """이전 사용자 메시지도 chat_history에 포함"""
+        agent_input = service._prepare_agent_input([
+            {"role": "user", "content": "첫 질문"},
+            {"role": "assistant", "content": "첫 답변"},
+            {"role": "user", "content": "두 번째 질문"}
+        ])
+        
+        assert agent_input["input"] == "두 번째 질문"
+        assert agent_input["chat_history"] == [("human", "첫 질문"), ("assistant", "첫 답변")]
+
+
+class TestRateLimiter:
+    """모델별 요청 한도 스케줄러 테스트"""
+    
+    async def test_round_robin_between_users(self):
+        """한 사용자가 몰아서 보낸 요청이 다른 사용자를 밀어내지 않음"""
+        from app.services.rate_limiter import ModelRateLimiter
+        
+        # 분당 600회 = 초당 10회, 버킷에는 1회분만 있음
+        limiter = ModelRateLimiter("gpt-4o-mini", rpm=600, tpm=1000000)
+        limiter.request_bucket.capacity = 1
+        limiter.request_bucket.tokens = 1
+        order = []
+        
+        async def call(user, label):
+            await limiter.acquire(10, user, max_wait=5)
+            order.append(label)
+        
+        tasks = [asyncio.ensure_future(call("a", f"a{i}")) for i in range(4)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(call("b", "b0")))
+        await asyncio.gather(*tasks)
+        
+        assert order[:3] == ["a0", "a1", "b0"]
+        stats = limiter.stats()
+        assert stats["admitted"] == 5
+        assert stats["queue_depth"] == 0
+        assert stats["max_wait_ms"] > 0
+    
+    async def test_rejects_after_max_wait(self):
+        """대기 시간을 넘기면 429 오류로 거절"""
+        from app.core.exceptions import RateLimitExceededError
+        from app.services.rate_limiter import ModelRateLimiter
+        
+        limiter = ModelRateLimiter("gpt-4o-mini", rpm=1, tpm=1000000)
+        
+        await limiter.acquire(10, "a", max_wait=0.05)
+        with pytest.raises(RateLimitExceededError) as exc_info:
+            await limiter.acquire(10, "a", max_wait=0.05)
+        
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.retry_after > 0
+        assert limiter.stats()["rejected"] == 1
+        assert limiter.stats()["queue_depth"] == 0
+    
+    async def test_unused_tokens_are_returned(self):
+        """실제 사용량이 예약보다 적으면 차이만큼 TPM 예산 반환"""
+        from app.services.rate_limiter import RateLimitScheduler
+        
+        scheduler = RateLimitScheduler(max_wait=1)
+        reserved = await scheduler.acquire("gpt-4o", 1000, user_key=1)
+        before = scheduler.stats()["gpt-4o"]["available_tokens"]
+        scheduler.release("gpt-4o", reserved, 200)
+        
+        assert scheduler.stats()["gpt-4o"]["available_tokens"] >= before + 800
+
+
+class TestHedging:
+    """지연 기반 헤지 요청 테스트"""
+    
+    @pytest.fixture(autouse=True)
+    def hedge_settings(self, monkeypatch):
+        """service fixture보다 먼저 헤지 설정 적용"""
+        monkeypatch.setattr(settings, "HEDGE_ENABLED", True)
+        monkeypatch.setattr(settings, "HEDGE_FALLBACK_MODELS", {"gpt-4o": "gpt-4o-mini"})
+    
+    @patch('app.services.openai_service.ChatOpenAI')
+    async def test_slow_primary_answered_by_fallback(self, mock_chat_openai, service):
+        """주 모델이 임계값 안에 응답하지 않으면 대체 모델 응답을 사용하고 주 모델 호출은 취소"""
+        cancelled = []
+        
+        def make_llm(**kwargs):
+            model = kwargs["model"]
+            response = MagicMock()
+            response.content = f"{model} 응답"
+            
+            async def ainvoke(_):
+                try:
+                    await asyncio.sleep(1.0 if model == "gpt-4o" else 0.01)
+                except asyncio.CancelledError:
+                    cancelled.append(model)
+                    raise
+                return response
+            
+            llm = MagicMock()
+            llm.ainvoke = AsyncMock(side_effect=ainvoke)
+            return llm
+        
+        mock_chat_openai.side_effect = make_llm
+        service.hedger.tracker.default_delay = 0.02
+        
+        result = await service.get_chat_completion(
+            [{"role": "user", "content": "느린 질문"}], model="gpt-4o"
+        )
+        
+        assert result["model"] == "gpt-4o-mini"
+        assert result["response"] == "gpt-4o-mini 응답"
+        # 패배한 요청은 기다리지 않고 취소하므로 취소가 처리될 때까지 이벤트 루프를 양보
+        for _ in range(100):
+            if cancelled:
+                break
+            await asyncio.sleep(0)
+        assert cancelled == ["gpt-4o"]
+        stats = service.get_hedge_stats()
+        assert stats["fallback_wins"] == 1
+        # 취소된 주 모델 요청도 중도 절단 표본으로 기록
+        assert stats["thresholds"]["gpt-4o"]["censored"] == 1
+    
+    async def test_stream_race_uses_first_chunk(self):
+        """스트리밍은 첫 청크를 먼저 보낸 모델을 선택하고 다른 스트림은 닫음"""
+        from app.services.hedging import LatencyTracker, RequestHedger
+        
+        hedger = RequestHedger(ttft_tracker=LatencyTracker(default_delay=0.02))
+        closed = []
+        
+        async def source(model):
+            try:
+                await asyncio.sleep(1.0 if model == "slow" else 0.03)
+                for chunk in [f"{model}-1", f"{model}-2"]:
+                    yield chunk
+            finally:
+                closed.append(model)
+        
+        winner, stream = await hedger.start_stream("slow", "fast", source)
+        chunks = [chunk async for chunk in stream]
+        
+        assert winner == "fast"
+        assert chunks == ["fast-1", "fast-2"]
+        assert sorted(closed) == ["fast", "slow"]
+        assert hedger.ttft_tracker.stats()["slow"]["censored"] == 1
+        assert hedger.tracker.stats() == {}
+    
+    def test_threshold_counts_censored_attempts(self):
+        """취소된 느린 시도를 빼지 않고 백분위수를 추정 (생존 편향 방지)"""
+        from app.services.hedging import LatencyTracker
+        
+        tracker = LatencyTracker(percentile=90, min_samples=1, min_delay=0)
+        for _ in range(80):
+            tracker.record("gpt-4o", 1.0)
+        for _ in range(20):
+            tracker.record("gpt-4o", 3.0, censored=True)  # 3초에 헤지되어 취소됨
+        # 완료된 표본만 쓰면 1.0초로 떨어지지만, 상위 20%가 3초 이상이므로 3.0초 유지
+        assert tracker.threshold("gpt-4o") == 3.0
+        
+        tracker = LatencyTracker(percentile=50, min_samples=1, min_delay=0)
+        for seconds in [1.0, 2.0, 3.0, 4.0]:
+            tracker.record("gpt-4o", seconds)
+        assert tracker.threshold("gpt-4o") == 2.0
+
+
+class TestResilience:
+    """업스트림 재시도 및 서킷 브레이커 테스트"""
+    
+    @staticmethod
+    def _connection_error():
+        import httpx
+        import openai
+        return openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+    
+    @staticmethod
+    def _bad_request_error():
+        import httpx
+        import openai
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        return openai.BadRequestError(
+            "invalid", response=httpx.Response(400, request=request), body=None
+        )
+    
+    def test_classify_error(self):
+        """업스트림 예외를 재시도 가능 여부가 담긴 오류로 변환"""
+        from app.core.exceptions import UpstreamUnavailableError, UpstreamRequestError
+        from app.services.resilience import classify_error
+        
+        unavailable = classify_error(self._connection_error())
+        assert isinstance(unavailable, UpstreamUnavailableError)
+        assert unavailable.retryable and unavailable.status_code == 502
+        
+        bad_request = classify_error(self._bad_request_error())
+        assert isinstance(bad_request, UpstreamRequestError)
+        assert not bad_request.retryable and bad_request.status_code == 400
+    
+    async def test_retries_only_retryable_errors(self):
+        """재시도 가능한 오류는 재시도하고, 요청 오류는 바로 실패"""
+        from app.core.exceptions import UpstreamRequestError
+        from app.services.resilience import UpstreamResilience
+        
+        resilience = UpstreamResilience(max_attempts=3, base_delay=0)
+        calls = []
+        
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise self._connection_error()
+            return "성공"
+        
+        assert await resilience.call("gpt-4o-mini", flaky) == "성공"
+        assert len(calls) == 3
+        
+        bad_calls = []
+        
+        async def bad():
+            bad_calls.append(1)
+            raise self._bad_request_error()
+        
+        with pytest.raises(UpstreamRequestError):
+            await resilience.call("gpt-4o-mini", bad)
+        assert len(bad_calls) == 1
+    
+    async def test_breaker_opens_and_probes_half_open(self):
+        """연속 장애로 열린 브레이커는 바로 실패하고, 복구 시간 후 시험 호출이 성공하면 닫힘"""
+        from app.core.exceptions import CircuitOpenError, UpstreamUnavailableError
+        from app.services.resilience import UpstreamResilience, CircuitBreaker
+        
+        resilience = UpstreamResilience(max_attempts=1, base_delay=0)
+        resilience._breakers["gpt-4o"] = CircuitBreaker("gpt-4o", failure_threshold=2, recovery_seconds=0.05)
+        calls = []
+        
+        async def failing():
+            calls.append(1)
+            raise self._connection_error()
+        
+        async def healthy():
+            calls.append(1)
+            return "복구"
+        
+        for _ in range(2):
+            with pytest.raises(UpstreamUnavailableError):
+                await resilience.call("gpt-4o", failing)
+        
+        with pytest.raises(CircuitOpenError):
+            await resilience.call("gpt-4o", healthy)
+        assert len(calls) == 2
+        assert resilience.stats()["breakers"]["gpt-4o"]["state"] == "open"
+        
+        import time
+        time.sleep(0.06)
+        assert await resilience.call("gpt-4o", healthy) == "복구"
+        assert resilience.stats()["breakers"]["gpt-4o"]["state"] == "closed"
+    
+    async def test_stream_not_retried_after_first_chunk(self):
+        """스트리밍은 첫 청크 이후 실패하면 재시도하지 않음"""
+        from app.core.exceptions import UpstreamUnavailableError
+        from app.services.resilience import UpstreamResilience
+        
+        resilience = UpstreamResilience(max_attempts=3, base_delay=0)
+        opened = []
+        
+        def open_stream():
+            opened.append(1)
+            
+            async def stream():
+                if len(opened) == 1:
+                    raise self._connection_error()
+                yield "첫 청크"
+                raise self._connection_error()
+            
+            return stream()
+        
+        received = []
+        
+        with pytest.raises(UpstreamUnavailableError):
+            async for chunk in resilience.stream("gpt-4o-mini", open_stream):
+                received.append(chunk)
+        assert len(opened) == 2
+        assert received == ["첫 청크"]
@@ -1,6 +1,11 @@
+import asyncio
 import pytest
 from fastapi import status
 from unittest.mock import AsyncMock, patch, MagicMock
+from app.core.config import settings
+from app.models.conversation import Conversation, Message
+from app.services.history_service import conversation_history
+from tests.conftest import TestingAsyncSessionLocal
 
 
 class TestPromptEndpoints:
@@ -56,7 +61,7 @@ class TestPromptEndpoints:
     def test_completion_stream(self, mock_service, client, auth_headers):
         """completion 스트리밍 테스트"""
         # Mock 스트리밍 응답
-        async def mock_stream(message, model=None, temperature=None, max_tokens=None):
+        async def mock_stream(message, model=None, temperature=None, max_tokens=None, **kwargs):
             chunks = ["안녕", "하세요", "!"]
             for chunk in chunks:
                 yield chunk
@@ -130,7 +135,7 @@ class TestPromptEndpoints:
     def test_chat_stream(self, mock_service, client, auth_headers):
         """chat 스트리밍 테스트"""
         # Mock 스트리밍 응답
-        async def mock_stream(messages, model=None, temperature=None, max_tokens=None):
+        async def mock_stream(messages, model=None, temperature=None, max_tokens=None, **kwargs):
             chunks = ["Python은", " 프로그래밍", " 언어입니다."]
             for chunk in chunks:
                 yield chunk
@@ -185,3 +190,226 @@ class TestPromptEndpoints:
         
         assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
         assert "오류 발생" in response.json()["detail"]
+    
+    @patch('app.api.api_v1.endpoints.prompt.openai_service')
+    def test_batch_completion(self, mock_service, client, auth_headers):
+        """배치 엔드포인트는 항목별 결과/오류를 NDJSON으로 반환"""
+        import json
+        
+        async def mock_completion(message, **kwargs):
+            if message == "실패":
+                raise Exception("OpenAI API 오류")
+            return {"response": f"{message} 응답", "model": "gpt-4o-mini", "usage": None}
+        
+        mock_service.get_completion = AsyncMock(side_effect=mock_completion)
+        
+        response = client.post(
+            "/api/v1/prompt/batch",
+            headers=auth_headers,
+            json={
+                "items": [
+                    {"message": "첫 번째"},
+                    {"message": "실패"},
+                    {"message": "세 번째"}
+                ],
+                "concurrency": 2
+            }
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.strip().split("\n")]
+        by_index = {line["index"]: line for line in lines}
+        
+        assert sorted(by_index) == [0, 1, 2]
+        assert by_index[0]["result"]["response"] == "첫 번째 응답"
+        assert by_index[1]["error"]["status_code"] == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert by_index[2]["result"]["response"] == "세 번째 응답"
+        assert mock_service.get_completion.call_count == 3
+    
+    @patch('app.api.api_v1.endpoints.prompt.openai_service')
+    def test_completion_rate_limited(self, mock_service, client, auth_headers):
+        """요청 한도 초과 시 429와 Retry-After 헤더 반환"""
+        from app.core.exceptions import RateLimitExceededError
+        mock_service.get_completion = AsyncMock(
+            side_effect=RateLimitExceededError("요청 한도를 초과했습니다.", retry_after=2.5)
+        )
+        
+        response = client.post(
+            "/api/v1/prompt/completion",
+            headers=auth_headers,
+            json={"message": "안녕하세요", "stream": False}
+        )
+        
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response.headers["Retry-After"] == "3"
+        assert mock_service.get_completion.call_args.kwargs["user_id"] is not None
+    
+    def test_batch_completion_empty(self, client, auth_headers):
+        """빈 배치 요청은 검증 오류"""
+        response = client.post(
+            "/api/v1/prompt/batch",
+            headers=auth_headers,
+            json={"items": []}
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    @patch('app.api.api_v1.endpoints.prompt.openai_service')
+    def test_chat_with_server_side_history(self, mock_service, client, auth_headers):
+        """conversation_id와 새 메시지만 보내면 서버가 히스토리를 재구성"""
+        mock_service.get_chat_completion = AsyncMock(return_value={
+            "response": "첫 번째 답변",
+            "model": "gpt-4o-mini",
+            "usage": None
+        })
+        
+        first = client.post(
+            "/api/v1/prompt/chat",
+            headers=auth_headers,
+            json={"messages": [{"role": "user", "content": "첫 번째 질문"}]}
+        )
+        assert first.status_code == status.HTTP_200_OK
+        conversation_id = first.json()["conversation_id"]
+        
+        mock_service.get_chat_completion = AsyncMock(return_value={
+            "response": "두 번째 답변",
+            "model": "gpt-4o-mini",
+            "usage": None
+        })
+        second = client.post(
+            "/api/v1/prompt/chat",
+            headers=auth_headers,
+            json={"conversation_id": conversation_id, "message": "두 번째 질문"}
+        )
+        
+        assert second.status_code == status.HTTP_200_OK
+        sent_messages = mock_service.get_chat_completion.call_args.kwargs["messages"]
+        assert sent_messages == [
+            {"role": "user", "content": "첫 번째 질문"},
+            {"role": "assistant", "content": "첫 번째 답변"},
+            {"role": "user", "content": "두 번째 질문"}
+        ]
+    
+    def test_chat_requires_messages_or_message(self, client, auth_headers):
+        """messages와 message가 모두 없으면 검증 오류"""
+        response = client.post(
+            "/api/v1/prompt/chat",
+            headers=auth_headers,
+            json={"conversation_id": 1}
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    @patch('app.api.api_v1.endpoints.prompt.openai_service')
+    def test_chat_stream_checkpoints_partial_reply(self, mock_service, client, auth_headers, db, monkeypatch):
+        """스트리밍 중 부분 응답을 streaming 상태로 저장하고 완료 시 같은 행을 complete로 갱신"""
+        monkeypatch.setattr(settings, "STREAM_CHECKPOINT_SECONDS", 0.01)
+        observed = []
+        
+        def assistant_rows():
+            rows = db.query(Message.status, Message.content).filter(Message.role == "assistant").all()
+            db.rollback()  # 읽기 트랜잭션을 닫아 이후 쓰기를 막지 않도록
+            return [tuple(row) for row in rows]
+        
+        async def mock_stream(messages, **kwargs):
+            for chunk in ["첫", " 번째", " 청크"]:
+                yield chunk
+                await asyncio.sleep(0.05)
+                observed.append(assistant_rows())
+        
+        mock_service.stream_chat_completion = mock_stream
+        response = client.post(
+            "/api/v1/prompt/chat",
+            headers=auth_headers,
+            json={"message": "긴 답변을 해주세요", "stream": True}
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        # 스트리밍 중에는 행이 하나뿐이고 지금까지 받은 내용(최종 응답의 앞부분)이 저장됨
+        assert all(len(rows) <= 1 for rows in observed)
+        partial = [content for rows in observed for row_status, content in rows if row_status == "streaming"]
+        assert partial and all("첫 번째 청크".startswith(content) for content in partial)
+        assert assistant_rows() == [("complete", "첫 번째 청크")]
+        conversation = db.query(Conversation).one()
+        assert (conversation.message_count, conversation.last_message_preview) == (2, "첫 번째 청크")
+    
+    @patch('app.api.api_v1.endpoints.prompt.openai_service')
+    def test_chat_stream_aborted_reply_is_kept(self, mock_service, client, auth_headers, db):
+        """스트림이 중간에 끊기면 받은 부분까지 aborted 상태로 저장"""
+        async def mock_stream(messages, **kwargs):
+            yield "부분"
+            yield " 응답"
+            raise RuntimeError("업스트림 연결 끊김")
+        
+        mock_service.stream_chat_completion = mock_stream
+        with pytest.raises(RuntimeError):
+            client.post(
+                "/api/v1/prompt/chat",
+                headers=auth_headers,
+                json={"message": "질문", "stream": True}
+            )
+        
+        rows = db.query(Message.role, Message.status, Message.content).order_by(Message.id).all()
+        assert [tuple(row) for row in rows] == [
+            ("user", "complete", "질문"),
+            ("assistant", "aborted", "부분 응답"),
+        ]
+        conversation = db.query(Conversation).one()
+        assert conversation.message_count == 2
+        
+        # 중단된 부분 응답은 다음 요청의 히스토리에 포함하지 않음
+        mock_service.get_chat_completion = AsyncMock(
+            return_value={"response": "다시 답변", "model": "gpt-4o-mini", "usage": None}
+        )
+        client.post(
+            "/api/v1/prompt/chat",
+            headers=auth_headers,
+            json={"message": "다시 질문", "conversation_id": conversation.id, "stream": False}
+        )
+        sent = mock_service.get_chat_completion.call_args.kwargs["messages"]
+        assert [msg["content"] for msg in sent] == ["질문", "다시 질문"]
+    
+    def test_history_cache_skips_partial_and_appends_once(self, db, test_user):
+        """스트리밍 중인 행은 히스토리에서 빠지고, 다시 읽은 뒤 완료 반영이 와도 한 번만 포함"""
+        conversation = Conversation(user_id=test_user.id, title="대화")
+        db.add(conversation)
+        db.commit()
+        db.add(Message(conversation_id=conversation.id, role="user", content="질문"))
+        reply = Message(conversation_id=conversation.id, role="assistant", content="부분", status="streaming")
+        db.add(reply)
+        db.commit()
+        
+        async def history(user_id=test_user.id):
+            async with TestingAsyncSessionLocal() as session:
+                return await conversation_history.get_history(session, conversation.id, user_id)
+        
+        assert [msg["content"] for msg in asyncio.run(history())] == ["질문"]
+        
+        # 완료 저장과 캐시 반영 사이에 다른 요청이 DB에서 다시 읽은 경우
+        reply.content, reply.status = "전체 응답", "complete"
+        db.commit()
+        assert [msg["content"] for msg in asyncio.run(history())] == ["질문", "전체 응답"]
+        conversation_history.append(conversation.id, reply.id, "assistant", "전체 응답")
+        assert [msg["content"] for msg in asyncio.run(history())] == ["질문", "전체 응답"]
+        # 다른 사용자는 캐시에 있는 대화라도 히스토리를 받지 못함
+        assert asyncio.run(history(test_user.id + 1)) == []
+    
+    def test_short_stream_reply_saved_on_separate_session(self, db, test_user):
+        """체크포인트 없이 끝난 응답도 요청 세션이 아닌 별도 세션으로 저장"""
+        from app.services.streaming_reply import StreamingReply
+        conversation = Conversation(user_id=test_user.id, title="대화")
+        db.add(conversation)
+        db.commit()
+        
+        async def stream():
+            async with TestingAsyncSessionLocal() as session:
+                loaded = await session.get(Conversation, conversation.id)
+                reply = StreamingReply(session, loaded, test_user.id, interval=0)
+                reply.append("짧은 ")
+                reply.append("응답")
+                await reply.complete()
+                return [type(obj) for obj in session.identity_map.values()]
+        
+        assert asyncio.run(stream()) == [Conversation]
+        db.expire_all()
+        saved = db.query(Message).filter(Message.conversation_id == conversation.id).one()
+        assert (saved.content, saved.status) == ("짧은 응답", "complete")
@@ -0,0 +1,217 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from app.core.config import settings
+from app.services.search_cache import SearchResultCache, normalize_query
+from app.services.search_service import SearchService, CachedSearchTool
+from app.services.search_context import build_search_context, build_search_messages, dedupe_results
+from app.services.context_manager import count_tokens
+
+
+class TestSearchResultCache:
+    """검색 결과 캐시 테스트"""
+    
+    def test_normalize_query(self):
+        """대소문자, 공백, 문장부호 차이는 같은 검색어로 취급"""
+        assert normalize_query("  OpenAI   GPT-5 출시일?! ") == normalize_query("openai gpt 5 출시일")
+        assert normalize_query("서울 날씨") != normalize_query("부산 날씨")
+    
+    def test_warm_tier_survives_restart(self, tmp_path):
+        """SQLite에 저장된 결과는 새 인스턴스(재시작)에서도 조회"""
+        db_path = str(tmp_path / "search_cache.db")
+        results = [{"url": "https://example.com", "content": "결과"}]
+        
+        cache = SearchResultCache(db_path=db_path, ttl_seconds=60, enabled=True)
+        cache.set("서울 날씨", results)
+        cache.close()
+        
+        restarted = SearchResultCache(db_path=db_path, ttl_seconds=60, enabled=True)
+        assert restarted.get_hot("서울 날씨") is None
+        assert restarted.get("서울 날씨!") == results
+        assert restarted.get_hot("서울 날씨") == results
+        
+        stats = restarted.stats()
+        assert stats["disk_hits"] == 1
+        assert stats["memory_hits"] == 1
+        restarted.close()
+    
+    def test_ttl_and_memory_limit(self, tmp_path):
+        """TTL이 지난 결과는 만료되고 메모리 계층은 최대 개수를 유지"""
+        cache = SearchResultCache(db_path="", max_memory_entries=2, ttl_seconds=0, enabled=True)
+        cache.set("만료", [{"content": "오래된 결과"}])
+        assert cache.get("만료") is None
+        
+        cache = SearchResultCache(db_path="", max_memory_entries=2, ttl_seconds=60, enabled=True)
+        for query in ["가", "나", "다"]:
+            cache.set(query, [{"content": query}])
+        assert cache.get("가") is None
+        assert cache.get("다") == [{"content": "다"}]
+
+
+class TestSearchContext:
+    """검색 결과 컨텍스트 생성 테스트"""
+    
+    RESULTS = [
+        {"url": "https://a.com", "content": "주식 시장 오늘 마감 시황 요약"},
+        {"url": "https://b.com", "content": "서울 날씨 내일 비 소식, 기온은 평년보다 낮음"},
+        {"url": "https://c.com", "content": "서울 날씨 내일 비 소식, 기온은 평년보다 낮음!"},
+        {"url": "https://a.com", "content": "같은 URL의 다른 스니펫"},
+        {"url": "https://d.com", "content": "부산 해수욕장 개장 일정"},
+    ]
+    
+    def test_dedupe_and_rank_by_query(self):
+        """중복 스니펫과 같은 URL은 제거하고 검색어와 관련된 결과를 먼저 포함"""
+        assert [r["url"] for r in dedupe_results(self.RESULTS)] == ["https://a.com", "https://b.com", "https://d.com"]
+        
+        context = build_search_context("서울 내일 날씨", self.RESULTS, "gpt-4o-mini")
+        assert context.index("https://b.com") < context.index("https://a.com")
+        assert "https://c.com" not in context
+    
+    def test_token_budget(self):
+        """검색 결과 컨텍스트는 예산을 넘지 않음"""
+        results = [{"url": f"https://{i}.com", "content": f"검색 결과 {i} " + "긴 본문 " * 200} for i in range(5)]
+        context = build_search_context("검색 결과", results, "gpt-4o-mini", budget=300)
+        
+        assert 0 < count_tokens(context, "gpt-4o-mini") <= 300
+        assert "https://0.com" in context
+    
+    def test_messages_not_mutated(self):
+        """원본 메시지(시스템 메시지 포함)는 변경하지 않음"""
+        messages = [
+            {"role": "system", "content": "친절하게 답변하세요."},
+            {"role": "user", "content": "서울 내일 날씨"}
+        ]
+        enhanced = build_search_messages(messages, self.RESULTS, "서울 내일 날씨", "gpt-4o-mini")
+        
+        assert messages[0]["content"] == "친절하게 답변하세요."
+        assert enhanced[0]["content"].startswith("친절하게 답변하세요.\n\n[검색 결과]")
+        assert enhanced[1] is messages[1]
+        assert build_search_messages(messages, [], "서울 내일 날씨", "gpt-4o-mini") == messages
+
+
+class TestSearchService:
+    """검색 서비스 캐시 연동 및 호출 제한 테스트"""
+    
+    @pytest.fixture
+    def service(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "TAVILY_API_KEY", "test-tavily-key")
+        service = SearchService()
+        service.cache = SearchResultCache(db_path=str(tmp_path / "search_cache.db"), ttl_seconds=60, enabled=True)
+        service._fetch = AsyncMock(return_value=[{"url": "https://example.com", "content": "결과"}])
+        return service
+    
+    def test_repeated_search_uses_cache(self, service):
+        """같은 검색어(정규화 기준)는 Tavily를 한 번만 호출"""
+        first = asyncio.run(service.search("최신 AI 뉴스"))
+        second = asyncio.run(service.search("최신 ai 뉴스?"))
+        
+        assert first == second
+        assert service._fetch.call_count == 1
+        assert service.get_cache_stats()["hit_rate"] == 0.5
+    
+    def test_agent_tool_goes_through_cache(self, service):
+        """Agent용 툴도 같은 캐시를 사용"""
+        tools = service.get_tools()
+        assert len(tools) == 1 and isinstance(tools[0], CachedSearchTool)
+        assert tools[0].name == "tavily_search_results_json"
+        
+        asyncio.run(service.search("최신 AI 뉴스"))
+        asyncio.run(tools[0].ainvoke({"query": "최신 AI 뉴스"}))
+        
+        assert service._fetch.call_count == 1
+    
+    def test_agent_tool_sync_invoke(self, service):
+        """동기 호출은 앱 루프의 공유 자원을 쓰거나 전용 자원으로 실행하고, 루프 안에서는 거부"""
+        tool = service.get_tools()[0]
+        expected = [{"url": "https://example.com", "content": "결과"}]
+        
+        # 앱 루프가 없으면 호출 전용 클라이언트로 실행하고 공유 자원은 만들지 않음
+        assert tool.invoke({"query": "동기 검색"}) == expected
+        assert service._semaphore is None and service._http_client is None
+        
+        async def from_worker_thread():
+            await service.search("루프 준비")
+            semaphore = service._semaphore
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(None, tool.invoke, {"query": "스레드 동기 검색"})
+            return result, service._semaphore is semaphore
+        
+        # 다른 스레드에서의 동기 호출은 앱 루프에서 같은 세마포어로 실행
+        assert asyncio.run(from_worker_thread()) == (expected, True)
+        assert service._fetch.call_count == 3
+        
+        async def inside_loop():
+            return tool.invoke({"query": "루프 안 동기 검색"})
+        
+        with pytest.raises(RuntimeError, match="ainvoke"):
+            asyncio.run(inside_loop())
+    
+    def test_timeout_and_concurrency_limit(self, service, monkeypatch):
+        """동시 실행 수를 넘는 검색은 대기하고, 제한 시간을 넘기면 빈 결과 반환"""
+        monkeypatch.setattr(settings, "SEARCH_MAX_CONCURRENCY", 1)
+        monkeypatch.setattr(settings, "SEARCH_TIMEOUT_SECONDS", 0.3)
+        
+        async def slow_fetch(query, client=None):
+            await asyncio.sleep(0.5 if query == "느린 검색" else 0.05)
+            return [{"url": "https://example.com", "content": query}]
+        
+        service._fetch = slow_fetch
+        
+        async def run():
+            return await asyncio.gather(service.search("검색 1"), service.search("검색 2"))
+        
+        first, second = asyncio.run(run())
+        assert first and second
+        stats = service.get_stats()["calls"]
+        assert stats["requests"] == 2
+        assert stats["max_queue_wait_ms"] >= 40
+        
+        assert asyncio.run(service.search("느린 검색")) == []
+        assert service.get_stats()["calls"]["timeouts"] == 1
+    
+    def test_prefetch_joined_and_budget(self, service):
+        """미리 시작한 검색에 합류하고, 예산을 넘기면 빈 결과로 진행하되 검색은 끝까지 실행"""
+        async def slow_fetch(query, client=None):
+            await asyncio.sleep(0.2)
+            return [{"url": "https://example.com", "content": query}]
+        
+        service._fetch = AsyncMock(side_effect=slow_fetch)
+        
+        async def run():
+            service.prefetch("파이프라인 검색")
+            joined = await service.search_within_budget("파이프라인 검색", budget=1.0)
+            
+            service.prefetch("예산 초과 검색")
+            late = await service.search_within_budget("예산 초과 검색", budget=0.05)
+            await asyncio.sleep(0.3)
+            return joined, late
+        
+        joined, late = asyncio.run(run())
+        assert joined == [{"url": "https://example.com", "content": "파이프라인 검색"}]
+        assert late == []
+        assert service._fetch.call_count == 2
+        assert service.get_stats()["calls"]["budget_exceeded"] == 1
+        # 예산을 넘긴 검색도 완료되어 다음 요청에서 캐시로 사용
+        assert service.cache.get_hot("예산 초과 검색") is not None
+    
+    def test_empty_prefetch_result_is_the_answer(self, service):
+        """미리 시작한 검색이 빈 결과로 끝났으면 다시 검색하지 않고, 실패했으면 다시 검색"""
+        service._fetch = AsyncMock(return_value=[])
+        
+        async def run():
+            await service.prefetch("결과 없는 검색")
+            return await service.search_within_budget("결과 없는 검색", budget=1.0)
+        
+        assert asyncio.run(run()) == []
+        assert service._fetch.call_count == 1
+        
+        service._fetch = AsyncMock(side_effect=[RuntimeError("down"), [{"url": "https://example.com", "content": "재시도"}]])
+        
+        async def run_failed():
+            task = service.prefetch("실패한 검색")
+            await asyncio.wait({task})
+            return await service.search_within_budget("실패한 검색", budget=1.0)
+        
+        assert asyncio.run(run_failed()) == [{"url": "https://example.com", "content": "재시도"}]
+        assert service._fetch.call_count == 2
+        assert service.get_stats()["calls"]["errors"] == 1
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import pytest
+from app.core.sse import coalesce_chunks, encode_chunk, encode_event
+
+
+class TestSSE:
+    """SSE 인코딩 및 프레임 병합 테스트"""
+    
+    @pytest.mark.parametrize("text", ["안녕", 'say "hi"\n', "tab\t\\ end", "", "🙂 emoji"])
+    def test_encode_chunk_matches_json_dumps(self, text):
+        """템플릿 인코더는 json.dumps와 같은 프레임을 생성"""
+        expected = f"data: {json.dumps({'chunk': text}, ensure_ascii=False)}\n\n"
+        assert encode_chunk(text) == expected
+    
+    def test_encode_event(self):
+        """이벤트 페이로드 인코딩"""
+        assert encode_event({"conversation_id": 1}) == 'data: {"conversation_id": 1}\n\n'
+    
+    def test_coalesce_by_size(self):
+        """버퍼가 max_bytes에 도달하면 한 번에 전달"""
+        async def source():
+            for token in ["ab", "cd", "ef", "g"]:
+                yield token
+        
+        async def collect():
+            return [chunk async for chunk in coalesce_chunks(source(), max_bytes=4, max_delay_ms=1000)]
+        
+        assert asyncio.run(collect()) == ["abcd", "efg"]
+    
+    def test_coalesce_by_time_and_passthrough_events(self):
+        """시간 조건으로 전달하고, 텍스트가 아닌 항목은 버퍼를 비운 뒤 그대로 전달"""
+        event = {"event": "tool"}
+        
+        async def source():
+            yield "a"
+            yield "b"
+            await asyncio.sleep(0.05)
+            yield "c"
+            yield event
+            yield "d"
+        
+        async def collect():
+            return [chunk async for chunk in coalesce_chunks(source(), max_bytes=1024, max_delay_ms=10)]
+        
+        assert asyncio.run(collect()) == ["ab", "c", event, "d"]
+    
+    def test_coalesce_disabled(self):
+        """max_bytes가 0이면 병합하지 않음"""
+        async def source():
+            for token in ["a", "b"]:
+                yield token
+        
+        async def collect():
+            return [chunk async for chunk in coalesce_chunks(source(), max_bytes=0, max_delay_ms=10)]
+        
+        assert asyncio.run(collect()) == ["a", "b"]
+    
+    def test_coalesce_backpressure(self):
+        """소비자가 멈추면 대기 프레임 수만큼만 읽고 업스트림 읽기를 멈춤"""
+        produced = []
+        
+        async def source():
+            for i in range(100):
+                produced.append(i)
+                yield "x" * 4
+        
+        async def scenario():
+            stream = coalesce_chunks(source(), max_bytes=4, max_delay_ms=1000, max_pending=2)
+            first = await stream.__anext__()
+            await asyncio.sleep(0.05)  # 느린 클라이언트
+            read_while_stalled = len(produced)
+            rest = [chunk async for chunk in stream]
+            return first, read_while_stalled, rest
+        
+        first, read_while_stalled, rest = asyncio.run(scenario())
+        assert read_while_stalled <= 5
+        assert [first] + rest == ["xxxx"] * 100
@@ -0,0 +1,63 @@
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.services.openai_service import OpenAIService
+from app.services.search_service import SearchService
+from benchmarks.stub_upstream import StubConfig, create_app
+
+
+class TestStubUpstream:
+    """로컬 스텁 서버로 서비스 전체 경로 실행 테스트"""
+
+    @pytest.fixture
+    def stub_app(self):
+        return create_app(StubConfig(ttft_ms=0, tokens_per_sec=0, completion_tokens=12, search_latency_ms=0, seed=1))
+
+    @pytest.fixture
+    def service(self, stub_app, monkeypatch):
+        monkeypatch.setattr(settings, "OPENAI_API_KEY", "stub")
+        monkeypatch.setattr(settings, "OPENAI_BASE_URL", "http://stub/v1")
+        service = OpenAIService()
+        service.client_registry._http_async_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_app))
+        return service
+
+    def test_chat_completion_and_stream(self, service):
+        """OPENAI_BASE_URL로 스텁 서버에 일반/스트리밍 요청"""
+        messages = [{"role": "user", "content": "안녕하세요"}]
+
+        async def run():
+            result = await service.get_chat_completion(messages, model="gpt-4o-mini", max_tokens=5)
+            chunks = [
+                chunk async for chunk in service.stream_chat_completion(messages, model="gpt-4o-mini", max_tokens=5)
+            ]
+            return result, chunks
+
+        result, chunks = asyncio.run(run())
+        assert result["response"] == "스텁 응답 토큰 입니다 부하"
+        assert result["usage"]["completion_tokens"] == 5
+        assert result["usage"]["prompt_tokens"] > 0
+        assert "".join(chunks).strip() == result["response"]
+
+    def test_search_through_stub(self, stub_app, monkeypatch):
+        """Tavily 호환 /search 응답을 검색 서비스가 사용"""
+        monkeypatch.setattr(settings, "TAVILY_API_KEY", "stub")
+        service = SearchService()
+        service.cache.enabled = False
+        service._http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_app), base_url="http://stub")
+
+        results = asyncio.run(service.search("서울 날씨"))
+        assert len(results) == 5
+        assert results[0]["url"].startswith("https://stub.local/")
+        assert "서울 날씨" in results[0]["content"]
+
+    def test_injected_rate_limit(self):
+        """429 비율을 설정하면 Retry-After와 함께 OpenAI 형식의 오류 응답"""
+        client = TestClient(create_app(StubConfig(rate_limit_rate=1.0, retry_after=2)))
+        response = client.post("/v1/chat/completions", json={"model": "gpt-4o-mini", "messages": []})
+
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "2"
+        assert response.json()["error"]["code"] == "rate_limit_exceeded"
+        assert client.get("/stats").json()["stats"]["chat_rate_limited"] == 1
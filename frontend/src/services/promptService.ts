@@ -1,7 +1,24 @@
 import { apiClient, API_BASE_URL } from '@/lib/api';
-import { PromptRequest, PromptResponse, ChatRequest, ChatMessage } from '@/types/prompt';
+import { PromptRequest, PromptResponse, ChatRequest, ChatMessage, StreamToolEvent } from '@/types/prompt';
 import { DEFAULT_MODEL } from '@/constants/models';
 
+/**
+ * 채팅 요청의 히스토리 부분 생성
+ * 기존 대화를 이어가는 경우 새 사용자 메시지만 보내고, 히스토리는 서버에서 재구성합니다.
+ */
+const buildChatHistoryPayload = (request: ChatRequest) => {
+  const lastMessage = request.messages[request.messages.length - 1];
+  if (request.conversation_id && lastMessage?.role === 'user') {
+    return { message: lastMessage.content };
+  }
+  return {
+    messages: request.messages.map(msg => ({
+      role: msg.role,
+      content: msg.content,
+    })),
+  };
+};
+
 export const promptService = {
   /**
    * 단일 프롬프트 완성 요청
@@ -118,7 +135,8 @@ export const promptService = {
     request: ChatRequest,
     onChunk: (chunk: string) => void,
     onComplete?: (conversationId?: number) => void,
-    onError?: (error: Error) => void
+    onError?: (error: Error) => void,
+    onEvent?: (event: StreamToolEvent) => void
   ): Promise<void> {
     try {
       const token = localStorage.getItem('access_token');
@@ -131,10 +149,7 @@ export const promptService = {
           Authorization: `Bearer ${token}`,
         },
         body: JSON.stringify({
-          messages: request.messages.map(msg => ({
-            role: msg.role,
-            content: msg.content,
-          })),
+          ...buildChatHistoryPayload(request),
           model: request.model || DEFAULT_MODEL,
           temperature: request.temperature ?? 0.7,
           max_tokens: request.max_tokens ?? 1000,
@@ -181,6 +196,9 @@ export const promptService = {
               const parsed = JSON.parse(data);
               if (parsed.chunk) {
                 onChunk(parsed.chunk);
+              } else if (parsed.event === 'tool') {
+                // 웹 검색 등 툴 진행 상황
+                onEvent?.(parsed as StreamToolEvent);
               } else if (parsed.conversation_id) {
                 // conversation_id가 포함된 경우 저장
                 conversationId = parsed.conversation_id;
@@ -34,3 +34,10 @@ export interface PromptResponse {
 export interface StreamChunk {
   chunk: string;
 }
+
+export interface StreamToolEvent {
+  event: 'tool';
+  tool: string;
+  status: 'running' | 'done';
+  message?: string;
+}